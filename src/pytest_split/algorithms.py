@@ -1,12 +1,26 @@
 import enum
+import hashlib
 import heapq
+import itertools
+import math
 from abc import ABC, abstractmethod
 from operator import itemgetter
 from typing import TYPE_CHECKING, NamedTuple
 
+from pytest_split import vectorized
+
 if TYPE_CHECKING:
     from _pytest import nodes
 
+# Suites with at least this many items are split with the array-backed implementations
+VECTORIZED_MIN_ITEMS = 10_000
+
+# How many standard deviations above its mean the tail duration of a group is, the 95th percentile
+TAIL_Z = 1.645
+
+# Range of the hashes of the rendezvous hashing of the deterministic algorithm
+_HASH_RANGE = 1 << 64
+
 
 class TestGroup(NamedTuple):
     selected: "list[nodes.Item]"
@@ -45,28 +59,50 @@ class LeastDurationAlgorithm(AlgorithmBase):
     :param splits: How many groups we're splitting in.
     :param items: Test items passed down by Pytest.
     :param durations: Our cached test runtimes. Assumes contains timings only of relevant tests
+    :param file_costs:
+        Cost of collecting each test file, added once to every group which runs tests of the file.
+        A test is also considered for the groups which already run tests of its file.
+    :param eligible_groups:
+        Indexes of the groups which can run a test, by node id. Tests which are missing can run in any group.
+        These tests are assigned first, each to the eligible group with the smallest duration sum.
+    :param group_weights:
+        How many times its estimated duration a test takes in each group, e.g. because the group runs on a slower
+        machine. Each test goes to the group whose weighted duration sum ends up the smallest, counting the cost of
+        its file for the groups which don't run tests of the file yet. The durations of the groups aren't weighted.
     :return:
         List of groups
     """
 
-    def __call__(
-        self, splits: int, items: "list[nodes.Item]", durations: "dict[str, float]"
+    def __call__(  # noqa: PLR0913
+        self,
+        splits: int,
+        items: "list[nodes.Item]",
+        durations: "dict[str, float]",
+        *,
+        file_costs: "dict[str, float] | None" = None,
+        eligible_groups: "dict[str, list[int]] | None" = None,
+        group_weights: "list[float] | None" = None,
     ) -> "list[TestGroup]":
-        items_with_durations = _get_items_with_durations(items, durations)
-
-        # add index of item in list
-        items_with_durations_indexed = [
-            (*tup, i) for i, tup in enumerate(items_with_durations)
-        ]
-
-        # Sort by name to ensure it's always the same order
-        items_with_durations_indexed = sorted(
-            items_with_durations_indexed, key=lambda tup: str(tup[0])
-        )
-
-        # sort in ascending order
-        sorted_items_with_durations = sorted(
-            items_with_durations_indexed, key=lambda tup: tup[1], reverse=True
+        if group_weights:
+            return self._split_weighted(
+                splits,
+                items,
+                durations,
+                file_costs,
+                eligible_groups or {},
+                group_weights,
+            )
+        if (
+            len(items) >= VECTORIZED_MIN_ITEMS
+            and not file_costs
+            and not eligible_groups
+        ):
+            return self._split_vectorized(splits, items, durations)
+
+        items_with_durations = get_items_with_durations(items, durations)
+        eligible_groups = eligible_groups or {}
+        sorted_items_with_durations = _sort_items_with_durations(
+            items_with_durations, eligible_groups
         )
 
         selected: list[list[tuple[nodes.Item, int]]] = [[] for _ in range(splits)]
@@ -76,10 +112,37 @@ class LeastDurationAlgorithm(AlgorithmBase):
         # create a heap of the form (summed_durations, group_index)
         heap: list[tuple[float, int]] = [(0, i) for i in range(splits)]
         heapq.heapify(heap)
+        # groups which run tests of each file, only tracked when files have a cost
+        file_groups: dict[str, list[int]] = {}
+        time_per_group = 0.0
+        if file_costs:
+            time_per_group = (
+                _get_total_duration(items_with_durations, file_costs) / splits
+            )
         for item, item_duration, original_index in sorted_items_with_durations:
-            # get group with smallest sum
-            summed_durations, group_idx = heapq.heappop(heap)
-            new_group_durations = summed_durations + item_duration
+            if item.nodeid in eligible_groups:
+                group_idx, new_group_durations = _pick_eligible_group(
+                    duration,
+                    file_groups,
+                    file_costs,
+                    eligible_groups[item.nodeid],
+                    item,
+                    item_duration,
+                )
+            elif file_costs:
+                group_idx, new_group_durations = _pick_group_by_file_cost(
+                    heap,
+                    duration,
+                    file_groups,
+                    file_costs,
+                    time_per_group,
+                    item,
+                    item_duration,
+                )
+            else:
+                # get group with smallest sum
+                summed_durations, group_idx = _pop_smallest_group(heap, duration)
+                new_group_durations = summed_durations + item_duration
 
             # store assignment
             selected[group_idx].append((item, original_index))
@@ -105,6 +168,59 @@ class LeastDurationAlgorithm(AlgorithmBase):
             groups.append(group)
         return groups
 
+    @staticmethod
+    def _split_weighted(  # noqa: PLR0913
+        splits: int,
+        items: "list[nodes.Item]",
+        durations: "dict[str, float]",
+        file_costs: "dict[str, float] | None",
+        eligible_groups: "dict[str, list[int]]",
+        group_weights: "list[float]",
+    ) -> "list[TestGroup]":
+        duration = [0.0] * splits
+        group_files: list[set[str]] = [set() for _ in range(splits)]
+        assignment = [0] * len(items)
+        for item, item_duration, original_index in _sort_items_with_durations(
+            get_items_with_durations(items, durations), eligible_groups
+        ):
+            fpath = get_file(item.nodeid)
+            group_idx = min(
+                eligible_groups.get(item.nodeid, range(splits)),
+                key=lambda i: (
+                    (
+                        duration[i]
+                        + item_duration
+                        + _get_file_cost(file_costs, group_files[i], fpath)
+                    )
+                    * group_weights[i],
+                    i,
+                ),
+            )
+            duration[group_idx] += item_duration + _get_file_cost(
+                file_costs, group_files[group_idx], fpath
+            )
+            group_files[group_idx].add(fpath)
+            assignment[original_index] = group_idx
+        return _get_groups(splits, items, assignment, duration)
+
+    @staticmethod
+    def _split_vectorized(
+        splits: int, items: "list[nodes.Item]", durations: "dict[str, float]"
+    ) -> "list[TestGroup]":
+        item_durations = get_durations(items, durations)
+        order, assignment, group_durations = vectorized.least_duration_assignment(
+            splits, item_durations, [str(item) for item in items]
+        )
+        partitions = vectorized.partition_by_assignment(
+            splits, items, order, assignment
+        )
+        return [
+            TestGroup(selected=selected, deselected=deselected, duration=duration)
+            for (selected, deselected), duration in zip(
+                partitions, group_durations, strict=True
+            )
+        ]
+
 
 class DurationBasedChunksAlgorithm(AlgorithmBase):
     """
@@ -116,22 +232,34 @@ class DurationBasedChunksAlgorithm(AlgorithmBase):
     :param splits: How many groups we're splitting in.
     :param items: Test items passed down by Pytest.
     :param durations: Our cached test runtimes. Assumes contains timings only of relevant tests
+    :param file_costs: Cost of collecting each test file, added once to every group which runs tests of the file.
     :return: List of TestGroup
     """
 
     def __call__(
-        self, splits: int, items: "list[nodes.Item]", durations: "dict[str, float]"
+        self,
+        splits: int,
+        items: "list[nodes.Item]",
+        durations: "dict[str, float]",
+        *,
+        file_costs: "dict[str, float] | None" = None,
     ) -> "list[TestGroup]":
-        items_with_durations = _get_items_with_durations(items, durations)
-        time_per_group = sum(map(itemgetter(1), items_with_durations)) / splits
+        if len(items) >= VECTORIZED_MIN_ITEMS and not file_costs:
+            return self._split_vectorized(splits, items, durations)
+
+        items_with_durations = get_items_with_durations(items, durations)
+        time_per_group = _get_total_duration(items_with_durations, file_costs) / splits
 
         selected: list[list[nodes.Item]] = [[] for i in range(splits)]
         deselected: list[list[nodes.Item]] = [[] for i in range(splits)]
         duration: list[float] = [0 for i in range(splits)]
+        group_files: list[set[str]] = [set() for i in range(splits)]
 
         group_idx = 0
         for item, item_duration in items_with_durations:
-            if duration[group_idx] >= time_per_group:
+            # The cost of a file counts in every group which runs tests of it, so the groups can take more than
+            # the time per group in total, the last one takes the rest
+            if group_idx < splits - 1 and duration[group_idx] >= time_per_group:
                 group_idx += 1
 
             selected[group_idx].append(item)
@@ -140,6 +268,217 @@ class DurationBasedChunksAlgorithm(AlgorithmBase):
                     deselected[i].append(item)
             duration[group_idx] += item_duration
 
+            if file_costs:
+                fpath = get_file(item.nodeid)
+                if fpath not in group_files[group_idx]:
+                    group_files[group_idx].add(fpath)
+                    duration[group_idx] += file_costs.get(fpath, 0)
+
+        return [
+            TestGroup(
+                selected=selected[i], deselected=deselected[i], duration=duration[i]
+            )
+            for i in range(splits)
+        ]
+
+    @staticmethod
+    def _split_vectorized(
+        splits: int, items: "list[nodes.Item]", durations: "dict[str, float]"
+    ) -> "list[TestGroup]":
+        item_durations = get_durations(items, durations)
+        time_per_group = sum(item_durations) / splits
+        boundaries, group_durations = vectorized.duration_based_chunks_boundaries(
+            splits, item_durations, time_per_group
+        )
+        return [
+            TestGroup(
+                selected=items[start:end],
+                deselected=items[:start] + items[end:],
+                duration=group_durations[i],
+            )
+            for i, (start, end) in enumerate(itertools.pairwise(boundaries))
+        ]
+
+
+class LeastTailDurationAlgorithm(AlgorithmBase):
+    """
+    Split tests into groups by runtime and its variance.
+    Like ``LeastDurationAlgorithm``, it walks the test items, starting with the test which adds the most to the tail.
+    It assigns each test to the group whose tail duration ends up the smallest.
+
+    The duration of a group is taken to be normally distributed, with the sums of the means and of the variances of
+    its tests. Its tail duration is ``TAIL_Z`` standard deviations above its mean. Tests with a high variance are
+    therefore spread across the groups, which shortens the slowest group even when the means are already balanced.
+    Spreading them can unbalance the means too much, so the groups of ``LeastDurationAlgorithm`` are used instead
+    if their longest tail duration is shorter. Without any variances of the tests it's the same as that algorithm.
+
+    :param splits: How many groups we're splitting in.
+    :param items: Test items passed down by Pytest.
+    :param durations: Our cached test runtimes. Assumes contains timings only of relevant tests
+    :param file_costs: Cost of collecting each test file, added once to every group which runs tests of the file.
+    :param variances: Variance of the duration of each test, by node id. Tests which are missing don't vary.
+    :return:
+        List of groups
+    """
+
+    def __call__(
+        self,
+        splits: int,
+        items: "list[nodes.Item]",
+        durations: "dict[str, float]",
+        *,
+        file_costs: "dict[str, float] | None" = None,
+        variances: "dict[str, float] | None" = None,
+    ) -> "list[TestGroup]":
+        variances = {
+            item.nodeid: variances[item.nodeid]
+            for item in items
+            if variances and item.nodeid in variances
+        }
+        least_duration_groups = LeastDurationAlgorithm()(
+            splits, items, durations, file_costs=file_costs
+        )
+        if not variances:
+            return least_duration_groups
+
+        groups = self._split_by_tail(splits, items, durations, file_costs, variances)
+        if _get_max_tail(least_duration_groups, variances) < _get_max_tail(
+            groups, variances
+        ):
+            return least_duration_groups
+        return groups
+
+    @staticmethod
+    def _split_by_tail(
+        splits: int,
+        items: "list[nodes.Item]",
+        durations: "dict[str, float]",
+        file_costs: "dict[str, float] | None",
+        variances: "dict[str, float]",
+    ) -> "list[TestGroup]":
+        items_with_stats = [
+            (item, item_duration, variances.get(item.nodeid, 0.0), i)
+            for i, (item, item_duration) in enumerate(
+                get_items_with_durations(items, durations)
+            )
+        ]
+        # Sort by name to ensure it's always the same order, then by what each test adds to the tail
+        items_with_stats.sort(key=lambda tup: str(tup[0]))
+        items_with_stats.sort(key=lambda tup: _get_tail(tup[1], tup[2]), reverse=True)
+
+        duration = [0.0] * splits
+        variance = [0.0] * splits
+        group_files: list[set[str]] = [set() for _ in range(splits)]
+        assignment = [0] * len(items)
+        for item, item_duration, item_variance, original_index in items_with_stats:
+            fpath = get_file(item.nodeid)
+            group_idx = min(
+                range(splits),
+                key=lambda i: (
+                    _get_tail(
+                        duration[i]
+                        + item_duration
+                        + _get_file_cost(file_costs, group_files[i], fpath),
+                        variance[i] + item_variance,
+                    ),
+                    i,
+                ),
+            )
+            duration[group_idx] += item_duration + _get_file_cost(
+                file_costs, group_files[group_idx], fpath
+            )
+            variance[group_idx] += item_variance
+            group_files[group_idx].add(fpath)
+            assignment[original_index] = group_idx
+
+        return _get_groups(splits, items, assignment, duration)
+
+
+class DeterministicAlgorithm(AlgorithmBase):
+    """
+    Split tests into groups by runtime, independently of the order in which they were collected.
+
+    The tests with a stored duration are assigned like ``LeastDurationAlgorithm`` does, but walked in an order
+    which only depends on their durations and node ids. Each test without a stored duration is assigned by weighted
+    rendezvous hashing of its node id: every group draws a score from the hash of the node id and the group, scaled
+    by how much room the group has left after the tests with durations, and the highest score wins. So all nodes
+    agree on the groups even when they collect the tests in a different order, and the group of a test without a
+    duration only depends on its node id and the room of the groups.
+
+    :param splits: How many groups we're splitting in.
+    :param items: Test items passed down by Pytest.
+    :param durations: Our cached test runtimes. Assumes contains timings only of relevant tests
+    :param file_costs: Cost of collecting each test file, added once to every group which runs tests of the file.
+    :return:
+        List of groups
+    """
+
+    def __call__(
+        self,
+        splits: int,
+        items: "list[nodes.Item]",
+        durations: "dict[str, float]",
+        *,
+        file_costs: "dict[str, float] | None" = None,
+    ) -> "list[TestGroup]":
+        items_with_durations = get_items_with_durations(items, durations)
+        known = [tup for tup in items_with_durations if tup[0].nodeid in durations]
+        known.sort(key=lambda tup: (-tup[1], tup[0].nodeid))
+        unknown = sorted(
+            (tup for tup in items_with_durations if tup[0].nodeid not in durations),
+            key=lambda tup: tup[0].nodeid,
+        )
+        duration: list[float] = [0 for _ in range(splits)]
+        assignment: dict[str, int] = {}
+
+        heap: list[tuple[float, int]] = [(0, i) for i in range(splits)]
+        # groups which run tests of each file, only tracked when files have a cost
+        file_groups: dict[str, list[int]] = {}
+        time_per_group = 0.0
+        if file_costs:
+            files = {get_file(item.nodeid) for item, _ in items_with_durations}
+            # fsum doesn't depend on the order of the summands
+            time_per_group = (
+                math.fsum(d for _, d in items_with_durations)
+                + math.fsum(file_costs.get(fpath, 0) for fpath in files)
+            ) / splits
+        for item, item_duration in known:
+            if file_costs:
+                group_idx, new_group_durations = _pick_group_by_file_cost(
+                    heap,
+                    duration,
+                    file_groups,
+                    file_costs,
+                    time_per_group,
+                    item,
+                    item_duration,
+                )
+            else:
+                summed_durations, group_idx = _pop_smallest_group(heap, duration)
+                new_group_durations = summed_durations + item_duration
+            assignment[item.nodeid] = group_idx
+            duration[group_idx] = new_group_durations
+            heapq.heappush(heap, (new_group_durations, group_idx))
+
+        if unknown:
+            target = (math.fsum(duration) + math.fsum(d for _, d in unknown)) / splits
+            weights = [max(target - group_duration, 0) for group_duration in duration]
+            for item, item_duration in unknown:
+                group_idx = _get_rendezvous_group(item.nodeid, weights)
+                assignment[item.nodeid] = group_idx
+                duration[group_idx] += item_duration + _get_new_file_cost(
+                    file_costs, file_groups, item.nodeid, group_idx
+                )
+
+        selected: list[list[nodes.Item]] = [[] for _ in range(splits)]
+        deselected: list[list[nodes.Item]] = [[] for _ in range(splits)]
+        for item in items:
+            group_idx = assignment[item.nodeid]
+            selected[group_idx].append(item)
+            for i in range(splits):
+                if i != group_idx:
+                    deselected[i].append(item)
+
         return [
             TestGroup(
                 selected=selected[i], deselected=deselected[i], duration=duration[i]
@@ -148,20 +487,247 @@ class DurationBasedChunksAlgorithm(AlgorithmBase):
         ]
 
 
-def _get_items_with_durations(
+def _get_new_file_cost(
+    file_costs: "dict[str, float] | None",
+    file_groups: "dict[str, list[int]]",
+    nodeid: str,
+    group_idx: int,
+) -> float:
+    """
+    Returns the cost of the file of a test if the group doesn't run tests of the file yet, and records that it does.
+    """
+    if not file_costs:
+        return 0
+    fpath = get_file(nodeid)
+    groups_with_file = file_groups.setdefault(fpath, [])
+    if group_idx in groups_with_file:
+        return 0
+    groups_with_file.append(group_idx)
+    return file_costs.get(fpath, 0)
+
+
+def _get_rendezvous_group(nodeid: str, weights: "list[float]") -> int:
+    """
+    Returns the group of a test by weighted rendezvous hashing, groups without weight are never picked.
+    """
+    best_score = -1.0
+    best_group = 0
+    for group_idx, weight in enumerate(weights):
+        if weight <= 0:
+            continue
+        digest = hashlib.blake2b(
+            f"{group_idx}:{nodeid}".encode(), digest_size=8
+        ).digest()
+        # A uniformly distributed number in (0, 1)
+        draw = (int.from_bytes(digest, "big") + 0.5) / _HASH_RANGE
+        score = -weight / math.log(draw)
+        if score > best_score:
+            best_score = score
+            best_group = group_idx
+    return best_group
+
+
+def _sort_items_with_durations(
+    items_with_durations: "list[tuple[nodes.Item, float]]",
+    eligible_groups: "dict[str, list[int]]",
+) -> "list[tuple[nodes.Item, float, int]]":
+    """
+    Returns the items with their durations and original indexes in the order in which they're assigned to groups.
+    """
+    # add index of item in list
+    items_with_durations_indexed = [
+        (*tup, i) for i, tup in enumerate(items_with_durations)
+    ]
+
+    # Sort by name to ensure it's always the same order
+    items_with_durations_indexed = sorted(
+        items_with_durations_indexed, key=lambda tup: str(tup[0])
+    )
+
+    # sort in ascending order
+    sorted_items_with_durations = sorted(
+        items_with_durations_indexed, key=lambda tup: tup[1], reverse=True
+    )
+    if eligible_groups:
+        # the tests which can only run in some groups go first, while those groups still have room
+        sorted_items_with_durations.sort(
+            key=lambda tup: tup[0].nodeid not in eligible_groups
+        )
+    return sorted_items_with_durations
+
+
+def _get_groups(
+    splits: int,
+    items: "list[nodes.Item]",
+    assignment: "list[int]",
+    duration: "list[float]",
+) -> "list[TestGroup]":
+    """
+    Returns the groups of an assignment of the items to the groups, keeping the order of the items.
+    """
+    return [
+        TestGroup(
+            selected=[
+                item for item, g in zip(items, assignment, strict=True) if g == i
+            ],
+            deselected=[
+                item for item, g in zip(items, assignment, strict=True) if g != i
+            ],
+            duration=duration[i],
+        )
+        for i in range(splits)
+    ]
+
+
+def _get_tail(duration: float, variance: float) -> float:
+    return duration + TAIL_Z * math.sqrt(variance)
+
+
+def _get_max_tail(groups: "list[TestGroup]", variances: "dict[str, float]") -> float:
+    return max(
+        _get_tail(
+            group.duration,
+            sum(variances.get(item.nodeid, 0.0) for item in group.selected),
+        )
+        for group in groups
+    )
+
+
+def _get_file_cost(
+    file_costs: "dict[str, float] | None", files: "set[str]", fpath: str
+) -> float:
+    if not file_costs or fpath in files:
+        return 0.0
+    return file_costs.get(fpath, 0.0)
+
+
+def _pick_group_by_file_cost(  # noqa: PLR0913
+    heap: "list[tuple[float, int]]",
+    duration: "list[float]",
+    file_groups: "dict[str, list[int]]",
+    file_costs: "dict[str, float]",
+    time_per_group: float,
+    item: "nodes.Item",
+    item_duration: float,
+) -> "tuple[int, float]":
+    """
+    Returns the group for the item and the new duration of that group.
+
+    The item stays with the other tests of its file if one of their groups can take it without exceeding
+    the ideal duration of a group. Otherwise it goes to the group to which it adds the least, which is either
+    the group with the smallest sum or a group which already runs tests of the file and therefore doesn't
+    pay the cost of the file again.
+    The heap is updated lazily: entries whose sum differs from the group's duration are outdated.
+    """
+    while heap[0][0] != duration[heap[0][1]]:
+        heapq.heappop(heap)
+
+    fpath = get_file(item.nodeid)
+    groups_with_file = file_groups.setdefault(fpath, [])
+    with_file = [(duration[i] + item_duration, i) for i in groups_with_file]
+    fitting = [candidate for candidate in with_file if candidate[0] <= time_per_group]
+    if fitting:
+        new_group_durations, group_idx = min(fitting)
+    else:
+        summed_durations, group_idx = heap[0]
+        if group_idx not in groups_with_file:
+            summed_durations += file_costs.get(fpath, 0)
+        new_group_durations, group_idx = min(
+            [(summed_durations + item_duration, group_idx), *with_file]
+        )
+
+    if group_idx == heap[0][1]:
+        heapq.heappop(heap)
+    if group_idx not in groups_with_file:
+        groups_with_file.append(group_idx)
+    return group_idx, new_group_durations
+
+
+def _pop_smallest_group(
+    heap: "list[tuple[float, int]]", duration: "list[float]"
+) -> "tuple[float, int]":
+    """
+    Pop the group with the smallest sum, skipping the outdated entries of groups picked by eligibility.
+    """
+    summed_durations, group_idx = heapq.heappop(heap)
+    while summed_durations != duration[group_idx]:
+        summed_durations, group_idx = heapq.heappop(heap)
+    return summed_durations, group_idx
+
+
+def _pick_eligible_group(  # noqa: PLR0913
+    duration: "list[float]",
+    file_groups: "dict[str, list[int]]",
+    file_costs: "dict[str, float] | None",
+    eligible: "list[int]",
+    item: "nodes.Item",
+    item_duration: float,
+) -> "tuple[int, float]":
+    """
+    Returns the eligible group to which the item adds the least and the new duration of that group.
+
+    The heap isn't updated, its entry of the picked group becomes outdated.
+    """
+    fpath = get_file(item.nodeid)
+    groups_with_file = file_groups.setdefault(fpath, []) if file_costs else []
+    file_cost = file_costs.get(fpath, 0) if file_costs else 0
+    new_group_durations, group_idx = min(
+        (
+            duration[i] + item_duration + (0 if i in groups_with_file else file_cost),
+            i,
+        )
+        for i in eligible
+    )
+    if file_costs and group_idx not in groups_with_file:
+        groups_with_file.append(group_idx)
+    return group_idx, new_group_durations
+
+
+def get_file(nodeid: str) -> str:
+    """
+    Returns the path of the file of a test.
+    """
+    return nodeid.split("::", 1)[0]
+
+
+def _get_total_duration(
+    items_with_durations: "list[tuple[nodes.Item, float]]",
+    file_costs: "dict[str, float] | None",
+) -> float:
+    total_duration: float = sum(map(itemgetter(1), items_with_durations))
+    if file_costs:
+        files = sorted({get_file(item.nodeid) for item, _ in items_with_durations})
+        total_duration += sum(file_costs.get(fpath, 0) for fpath in files)
+    return total_duration
+
+
+def get_items_with_durations(
     items: "list[nodes.Item]", durations: "dict[str, float]"
 ) -> "list[tuple[nodes.Item, float]]":
+    """
+    Returns the tests with their durations, see ``get_durations``.
+    """
+    return list(zip(items, get_durations(items, durations), strict=True))
+
+
+def get_durations(
+    items: "list[nodes.Item]", durations: "dict[str, float]"
+) -> "list[float]":
+    """
+    Returns the durations of the tests, the tests without a stored duration get the average of the others.
+    """
     durations = _remove_irrelevant_durations(items, durations)
-    avg_duration_per_test = _get_avg_duration_per_test(durations)
-    items_with_durations = [
-        (item, durations.get(item.nodeid, avg_duration_per_test)) for item in items
-    ]
-    return items_with_durations
+    avg_duration_per_test = get_avg_duration_per_test(durations)
+    return [durations.get(item.nodeid, avg_duration_per_test) for item in items]
 
 
-def _get_avg_duration_per_test(durations: "dict[str, float]") -> float:
+def get_avg_duration_per_test(durations: "dict[str, float]") -> float:
+    """
+    Returns the duration of tests without a stored duration, the average of the given durations.
+    """
     if durations:
-        avg_duration_per_test = sum(durations.values()) / len(durations)
+        # fsum, so that the average doesn't depend on the order in which the tests were collected
+        avg_duration_per_test = math.fsum(durations.values()) / len(durations)
     else:
         # If there are no durations, give every test the same arbitrary value
         avg_duration_per_test = 1
@@ -180,6 +746,8 @@ def _remove_irrelevant_durations(
 class Algorithms(enum.Enum):
     duration_based_chunks = DurationBasedChunksAlgorithm()
     least_duration = LeastDurationAlgorithm()
+    least_tail_duration = LeastTailDurationAlgorithm()
+    deterministic = DeterministicAlgorithm()
 
     @staticmethod
     def names() -> "list[str]":
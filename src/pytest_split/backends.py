@@ -0,0 +1,286 @@
+"""
+Storage backends for the durations file.
+
+``--durations-path`` is either a local path or an ``http://`` / ``https://`` URL. The HTTP backend talks to a
+service which serves the durations as a JSON document, see ``pytest_split.server`` for a stand-in implementation:
+
+* ``GET`` returns the document with an ``ETag``, or ``304 Not Modified`` when ``If-None-Match`` matches it.
+* ``PATCH`` merges a JSON object into the document like a JSON merge patch (RFC 7386): objects are merged
+  recursively and ``null`` values remove entries.
+* ``PUT`` replaces the document, with ``If-None-Match: *`` only if it doesn't exist yet.
+"""
+
+import copy
+import hashlib
+import http.client
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+# How many changed entries, including those of the metadata, are uploaded per request
+UPLOAD_BATCH_SIZE = 1000
+
+TIMEOUT = 30  # seconds
+
+
+class DurationsBackend(ABC):
+    """Abstract base class for the places in which durations are stored."""
+
+    @abstractmethod
+    def load(self) -> Any:
+        """
+        Returns the stored JSON document, or an empty dict if nothing has been stored yet.
+        """
+
+    @abstractmethod
+    def save(self, document: "dict[str, Any]") -> None:
+        pass
+
+
+class FileBackend(DurationsBackend):
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def load(self) -> Any:
+        try:
+            with open(self.path) as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return {}
+
+    def save(self, document: "dict[str, Any]") -> None:
+        with open(self.path, "w") as f:
+            json.dump(document, f, sort_keys=True, indent=4)
+
+
+class HttpBackend(DurationsBackend):
+    """
+    Durations stored in a remote service.
+
+    The last fetched or saved document is cached in a local file together with its ETag, so that unchanged
+    durations are not downloaded again, and used instead when the service can't be reached. Only the entries which changed
+    since loading are uploaded when saving, down to the entries of the metadata sections, so that groups storing
+    at the same time don't overwrite each other's.
+    """
+
+    def __init__(self, url: str, cache_dir: str) -> None:
+        self.url = url
+        digest = hashlib.sha256(url.encode()).hexdigest()[:16]
+        self.cache_path = os.path.join(cache_dir, f"durations-{digest}.json")
+        self.loaded: dict[str, Any] = {}
+        # Why the cached document was loaded instead of the one of the service, if it was
+        self.offline_reason: str | None = None
+
+    def load(self) -> Any:
+        """
+        Returns the stored document.
+
+        :raises RemoteError: If the service can't be reached and no document is cached.
+        """
+        cached = self._read_cache()
+        headers = {"If-None-Match": cached["etag"]} if cached and cached["etag"] else {}
+        try:
+            status, response_headers, body = POOL.request(
+                "GET", self.url, headers=headers
+            )
+        except (http.client.HTTPException, OSError) as e:
+            if not cached:
+                raise RemoteError(f"GET {self.url} failed: {e}") from e
+            self.offline_reason = str(e)
+            status, response_headers, body = http.client.NOT_MODIFIED, {}, b""
+
+        if status == http.client.NOT_MODIFIED and cached:
+            document = cached["document"]
+        elif status == http.client.NOT_FOUND:
+            document = {}
+            self._write_cache(None, document)
+        elif status == http.client.OK:
+            document = json.loads(body)
+            if "etag" in response_headers:
+                self._write_cache(response_headers["etag"], document)
+        else:
+            raise RemoteError(f"GET {self.url} failed with status {status}")
+
+        # A copy, as the plugin updates the metadata in place
+        self.loaded = copy.deepcopy(document) if isinstance(document, dict) else {}
+        return document
+
+    def save(self, document: "dict[str, Any]") -> None:
+        """
+        Uploads the entries of the document which changed since loading it.
+
+        :raises RemoteError: If the service can't be reached or rejects the changes.
+        """
+        changes = sorted(
+            _get_changes(self.loaded, document), key=lambda change: change[0]
+        )
+
+        for batch in _batched(changes, UPLOAD_BATCH_SIZE):
+            try:
+                status, _, _ = POOL.request(
+                    "PATCH",
+                    self.url,
+                    body=json.dumps(_to_patch(batch)).encode(),
+                    headers={"Content-Type": "application/json"},
+                )
+            except (http.client.HTTPException, OSError) as e:
+                raise RemoteError(f"PATCH {self.url} failed: {e}") from e
+            if status not in (http.client.OK, http.client.NO_CONTENT):
+                raise RemoteError(f"PATCH {self.url} failed with status {status}")
+        self.loaded = copy.deepcopy(document)
+        # Without an ETag, as the service may also have entries of others, the next load downloads them
+        self._write_cache(None, document)
+
+    def _read_cache(self) -> "dict[str, Any] | None":
+        try:
+            with open(self.cache_path) as f:
+                cached: dict[str, Any] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return cached
+
+    def _write_cache(self, etag: "str | None", document: Any) -> None:
+        with open(self.cache_path, "w") as f:
+            json.dump({"etag": etag, "document": document}, f)
+
+
+class RemoteError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Keeps idle HTTP connections open per host so that consecutive requests reuse them.
+    """
+
+    def __init__(self) -> None:
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: "bytes | None" = None,
+        headers: "dict[str, str] | None" = None,
+    ) -> "tuple[int, dict[str, str], bytes]":
+        """
+        Send a request and read the whole response.
+
+        :return: Tuple of the status, the lower-cased response headers and the body.
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+
+        connection, reused = self._acquire(key)
+        try:
+            response = self._send(connection, method, path, body, headers)
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            if not reused:
+                raise
+            # The server may have closed an idle connection, retry once on a fresh one
+            connection, _ = self._acquire(key, fresh=True)
+            response = self._send(connection, method, path, body, headers)
+
+        data = response.read()
+        response_headers = {
+            name.lower(): value for name, value in response.getheaders()
+        }
+        if response.will_close:
+            connection.close()
+        else:
+            with self._lock:
+                self._idle.setdefault(key, []).append(connection)
+        return response.status, response_headers, data
+
+    def _acquire(
+        self, key: "tuple[str, str]", *, fresh: bool = False
+    ) -> "tuple[http.client.HTTPConnection, bool]":
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle and not fresh:
+                return idle.pop(), True
+
+        scheme, netloc = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=TIMEOUT), False
+        return http.client.HTTPConnection(netloc, timeout=TIMEOUT), False
+
+    @staticmethod
+    def _send(
+        connection: http.client.HTTPConnection,
+        method: str,
+        path: str,
+        body: "bytes | None",
+        headers: "dict[str, str] | None",
+    ) -> http.client.HTTPResponse:
+        connection.request(method, path, body=body, headers=headers or {})
+        return connection.getresponse()
+
+    def close(self) -> None:
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+
+POOL = ConnectionPool()
+
+
+def get_backend(location: str, cache_dir: str) -> DurationsBackend:
+    """
+    Returns the backend for a '--durations-path' value.
+
+    :param location: Local path or URL of the durations.
+    :param cache_dir: Directory in which remote durations are cached.
+    """
+    if urlsplit(location).scheme in ("http", "https"):
+        return HttpBackend(location, cache_dir)
+    return FileBackend(location)
+
+
+def _get_changes(
+    old: "Mapping[str, Any]", new: "Mapping[str, Any]", path: "tuple[str, ...]" = ()
+) -> "Iterator[tuple[tuple[str, ...], Any]]":
+    """
+    Yields the path and the new value of each changed entry, None for removed ones.
+
+    Objects in both documents are compared entry by entry, any other value is replaced as a whole.
+    """
+    for name, value in new.items():
+        old_value = old.get(name)
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            yield from _get_changes(old_value, value, (*path, name))
+        elif name not in old or old_value != value:
+            yield (*path, name), value
+    for name in old:
+        if name not in new:
+            yield (*path, name), None
+
+
+def _to_patch(changes: "list[tuple[tuple[str, ...], Any]]") -> "dict[str, Any]":
+    patch: dict[str, Any] = {}
+    for path, value in changes:
+        target = patch
+        for name in path[:-1]:
+            target = target.setdefault(name, {})
+        target[path[-1]] = value
+    return patch
+
+
+def _batched(
+    changes: "list[tuple[tuple[str, ...], Any]]", size: int
+) -> "Iterator[list[tuple[tuple[str, ...], Any]]]":
+    for start in range(0, len(changes), size):
+        yield changes[start : start + size]
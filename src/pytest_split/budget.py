@@ -0,0 +1,147 @@
+"""
+Selection of the most valuable tests which fit in a time budget.
+
+Every test has a value: a base value, plus a bonus if it failed in the last run, if its file or the module it
+tests changed, and if no other selected test covers its test module yet. Tests are picked greedily by value per
+second of estimated duration, like the classic approximation of the knapsack problem. The bonus for covering a
+new module is only given to the first test picked from each module, so the values are re-evaluated lazily.
+"""
+
+import heapq
+import posixpath
+from typing import TYPE_CHECKING
+
+from pytest_split import algorithms
+from pytest_split.algorithms import TestGroup
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from _pytest import nodes
+
+BASE_VALUE = 1.0
+FAILED_VALUE = 10.0
+CHANGED_VALUE = 5.0
+NEW_MODULE_VALUE = 2.0
+
+
+def select_within_budget(
+    items: "list[nodes.Item]",
+    durations: "dict[str, float]",
+    budget: float,
+    *,
+    failed: "Iterable[str]" = (),
+    changed_files: "Iterable[str]" = (),
+) -> TestGroup:
+    """
+    Select the tests to run within the time budget.
+
+    The cells of a notebook are selected or deselected together.
+
+    :param items: Test items passed down by Pytest.
+    :param durations: Our cached test runtimes.
+    :param budget: Time budget in seconds.
+    :param failed: Node ids of the tests which failed in the last run.
+    :param changed_files: Paths of the changed files, relative to the root directory.
+    :return: The selected and deselected tests, in collection order, and the estimated duration.
+    """
+    failed = set(failed)
+    changed_modules = _get_changed_modules(changed_files)
+    units = _get_units(algorithms.get_items_with_durations(items, durations))
+
+    heap: list[tuple[float, int]] = []
+    for index, (fpath, unit) in enumerate(units):
+        value = _get_value(fpath, unit, failed, changed_modules) + NEW_MODULE_VALUE
+        heapq.heappush(heap, (-_get_density(value, unit), index))
+
+    covered: set[str] = set()
+    selected_units: set[int] = set()
+    duration = 0.0
+    while heap:
+        density, index = heapq.heappop(heap)
+        fpath, unit = units[index]
+        unit_duration = sum(d for _, d in unit)
+        if duration + unit_duration > budget:
+            continue
+        if fpath in covered:
+            value = _get_value(fpath, unit, failed, changed_modules)
+            # The module bonus is gone, pick it later if it's still worth it
+            if -_get_density(value, unit) > density:
+                heapq.heappush(heap, (-_get_density(value, unit), index))
+                continue
+        covered.add(fpath)
+        selected_units.add(index)
+        duration += unit_duration
+
+    selected_ids = {id(item) for index in selected_units for item, _ in units[index][1]}
+    return TestGroup(
+        selected=[item for item in items if id(item) in selected_ids],
+        deselected=[item for item in items if id(item) not in selected_ids],
+        duration=duration,
+    )
+
+
+def _get_units(
+    items_with_durations: "list[tuple[nodes.Item, float]]",
+) -> "list[tuple[str, list[tuple[nodes.Item, float]]]]":
+    """
+    Returns the units which are selected as a whole, with the file of their tests.
+    """
+    units: list[tuple[str, list[tuple[nodes.Item, float]]]] = []
+    notebooks: dict[str, list[tuple[nodes.Item, float]]] = {}
+    for item, duration in items_with_durations:
+        fpath = algorithms.get_file(item.nodeid)
+        if not fpath.endswith(".ipynb"):
+            units.append((fpath, [(item, duration)]))
+        elif fpath in notebooks:
+            notebooks[fpath].append((item, duration))
+        else:
+            notebooks[fpath] = [(item, duration)]
+            units.append((fpath, notebooks[fpath]))
+    return units
+
+
+def _get_value(
+    fpath: str,
+    unit: "list[tuple[nodes.Item, float]]",
+    failed: "set[str]",
+    changed_modules: "set[str]",
+) -> float:
+    value = 0.0
+    changed = fpath in changed_modules or _get_tested_module(fpath) in changed_modules
+    for item, _ in unit:
+        value += BASE_VALUE
+        if item.nodeid in failed:
+            value += FAILED_VALUE
+        if changed:
+            value += CHANGED_VALUE
+    return value
+
+
+def _get_density(value: float, unit: "list[tuple[nodes.Item, float]]") -> float:
+    # Tests without any duration are worth picking first
+    return value / max(sum(d for _, d in unit), 1e-9)
+
+
+def _get_changed_modules(changed_files: "Iterable[str]") -> "set[str]":
+    """
+    Returns the changed files and the names of the changed Python modules.
+    """
+    changed: set[str] = set()
+    for line in changed_files:
+        fpath = line.strip().replace("\\", "/")
+        if not fpath:
+            continue
+        changed.add(fpath)
+        name, ext = posixpath.splitext(posixpath.basename(fpath))
+        if ext == ".py":
+            changed.add(name)
+    return changed
+
+
+def _get_tested_module(fpath: str) -> str:
+    """
+    Returns the name of the module which the test file tests by naming convention, e.g. 'foo' for 'test_foo.py'.
+    """
+    name = posixpath.splitext(posixpath.basename(fpath))[0]
+    return name.removeprefix("test_").removesuffix("_test")
@@ -0,0 +1,43 @@
+"""
+Calibration of durations recorded on machines of different speed.
+
+A short CPU-bound micro-benchmark gives the speed of the current machine relative to a reference machine.
+Durations are stored as they would have taken on the reference machine, i.e. multiplied by the speed factor,
+and divided by the speed factor of the machine which splits the tests to estimate their durations there.
+"""
+
+import functools
+import time
+
+# How long the benchmark takes on the reference machine
+REFERENCE_SECONDS = 0.01
+
+BENCHMARK_ROUNDS = 5
+
+
+@functools.cache
+def measure_speed() -> float:
+    """
+    Returns how many times faster than the reference machine the current machine runs the benchmark.
+
+    The benchmark is run a few times and the fastest round is used, which is the least disturbed by other
+    processes. The result is cached, so the benchmark runs at most once per process.
+    """
+    fastest = min(_time_benchmark() for _ in range(BENCHMARK_ROUNDS))
+    return REFERENCE_SECONDS / fastest
+
+
+def _time_benchmark() -> float:
+    start = time.perf_counter()
+    _benchmark()
+    return time.perf_counter() - start
+
+
+def _benchmark() -> None:
+    # A mix of the operations typical test code spends its time on: calls, attribute and dict access,
+    # string formatting and list building
+    counts: dict[str, int] = {}
+    for i in range(20_000):
+        key = f"key{i % 97}"
+        counts[key] = counts.get(key, 0) + 1
+    sorted([str(value) * 3 for value in counts.values()] * 50)
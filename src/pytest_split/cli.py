@@ -1,5 +1,25 @@
 import argparse
 import json
+import os
+import posixpath
+import sys
+import tempfile
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+from pytest_split import (
+    algorithms,
+    backends,
+    durations,
+    junit,
+    plan,
+    rerun,
+    runners,
+    trace,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
 
 def list_slowest_tests() -> None:
@@ -21,7 +41,9 @@ def list_slowest_tests() -> None:
         type=int,
     )
     args = parser.parse_args()
-    return _list_slowest_tests(json.load(args.durations_path), args.count)
+    test_durations, metadata = durations.split_metadata(json.load(args.durations_path))
+    test_durations = durations.expand(test_durations, metadata)
+    return _list_slowest_tests(test_durations, args.count)
 
 
 def _list_slowest_tests(durations: "dict[str, float]", count: int) -> None:
@@ -30,3 +52,436 @@ def _list_slowest_tests(durations: "dict[str, float]", count: int) -> None:
     )[:count]
     for test, duration in slowest_tests:
         print(f"{duration:.2f} {test}")  # noqa: T201
+
+
+def main(argv: "list[str] | None" = None) -> None:  # noqa: PLR0915
+    """
+    Entry point of the ``pytest-split`` command.
+    """
+    parser = argparse.ArgumentParser(prog="pytest-split")
+    subparsers = parser.add_subparsers(required=True)
+
+    diff_parser = subparsers.add_parser(
+        "diff",
+        help="Compare two durations files and list the tests, files and packages which became slower",
+        description=(
+            "Compare two durations files and list the tests, files and packages which became slower. "
+            "Exits with status 1 if any of them became slower by more than both thresholds, "
+            "or if heavy tests were added."
+        ),
+    )
+    diff_parser.add_argument(
+        "old", type=argparse.FileType(), help="Durations file before"
+    )
+    diff_parser.add_argument(
+        "new", type=argparse.FileType(), help="Durations file after"
+    )
+    diff_parser.add_argument(
+        "--min-increase",
+        type=float,
+        default=1.0,
+        help=(
+            "How many seconds longer a test, file or package must take to be reported, "
+            "and how long a new or removed test must take, default is 1"
+        ),
+    )
+    diff_parser.add_argument(
+        "--min-ratio",
+        type=float,
+        default=0.2,
+        help="How many times longer a test, file or package must take to be reported, default is 0.2 (20%%)",
+    )
+    diff_parser.set_defaults(func=_diff)
+
+    import_parser = subparsers.add_parser(
+        "import-junit",
+        help="Store the durations of tests from JUnit XML reports",
+        description=(
+            "Store the durations of tests from JUnit XML reports, e.g. written by pytest's '--junitxml', "
+            "in the same way as '--store-durations' does."
+        ),
+    )
+    import_parser.add_argument(
+        "reports", nargs="+", type=argparse.FileType("rb"), help="JUnit XML reports"
+    )
+    import_parser.add_argument(
+        "--durations-path",
+        default=".test_durations",
+        help=(
+            "Path or http(s) URL of the durations, "
+            "default is .test_durations in the current working directory"
+        ),
+    )
+    import_parser.add_argument(
+        "--durations-key",
+        help="Also store the durations under this key, like the '--durations-key' option of pytest",
+    )
+    import_parser.add_argument(
+        "--rootdir",
+        default=".",
+        help="Root directory of the tests when the reports were written, default is the current working directory",
+    )
+    import_parser.add_argument(
+        "--clean-durations",
+        action="store_true",
+        help="Remove the durations of tests which are not in the reports",
+    )
+    import_parser.set_defaults(func=_import_junit)
+
+    rerun_parser = subparsers.add_parser(
+        "rerun-groups",
+        help="Print how many groups to rerun the failed tests in with '--split-failed'",
+        description=(
+            "Print how many groups to rerun the failed tests in with '--split-failed', "
+            "e.g. to start only that many CI jobs. Prints 0 if no test failed."
+        ),
+    )
+    rerun_parser.add_argument(
+        "failed",
+        nargs="+",
+        help="Files with the failed tests of the groups, either pytest's lastfailed files or one node id per line",
+    )
+    rerun_parser.add_argument(
+        "--durations-path",
+        default=".test_durations",
+        help=(
+            "Path or http(s) URL of the durations, "
+            "default is .test_durations in the current working directory"
+        ),
+    )
+    rerun_parser.add_argument(
+        "--target-duration",
+        type=float,
+        default=rerun.TARGET_DURATION,
+        help=f"How many seconds each group should run for, default is {rerun.TARGET_DURATION:g}",
+    )
+    rerun_parser.add_argument(
+        "--max-groups", type=int, help="The most groups to use, e.g. '--splits'"
+    )
+    rerun_parser.set_defaults(func=_rerun_groups)
+
+    merge_parser = subparsers.add_parser(
+        "merge-traces",
+        help="Merge the traces written by '--split-trace' into one timeline",
+        description=(
+            "Merge the traces written by '--split-trace' into one timeline, "
+            "which Perfetto (https://ui.perfetto.dev) and chrome://tracing open."
+        ),
+    )
+    merge_parser.add_argument(
+        "traces", nargs="+", type=argparse.FileType(), help="Traces of the groups"
+    )
+    merge_parser.add_argument(
+        "-o",
+        "--output",
+        default="trace.json",
+        help="Path of the merged trace, default is trace.json",
+    )
+    merge_parser.set_defaults(func=_merge_traces)
+
+    runners_parser = subparsers.add_parser(
+        "merge-runner-history",
+        help="Merge the records written by '--split-runner-record' into the runner history",
+        description=(
+            "Merge the records which the groups wrote with '--split-runner-record' into the history "
+            "which '--split-runner-history' reads, e.g. after all groups of a pipeline finished."
+        ),
+    )
+    runners_parser.add_argument(
+        "history", help="Path of the history, which doesn't have to exist yet"
+    )
+    runners_parser.add_argument(
+        "records", nargs="+", type=argparse.FileType(), help="Records of the groups"
+    )
+    runners_parser.add_argument(
+        "-o",
+        "--output",
+        help="Path of the merged history, default is the path of the history",
+    )
+    runners_parser.set_defaults(func=_merge_runner_history)
+
+    plan_parser = subparsers.add_parser(
+        "plan",
+        help="Split the tests of several pytest root directories together",
+        description=(
+            "Split the tests of several pytest root directories together, e.g. the packages of a monorepo, "
+            "so that the groups are balanced across all of them. Collects the tests of each root directory "
+            "and writes a plan, whose groups are run with 'pytest-split run-plan'."
+        ),
+    )
+    plan_parser.add_argument(
+        "rootdirs", nargs="+", help="Root directories of the tests"
+    )
+    plan_parser.add_argument(
+        "--splits",
+        type=int,
+        required=True,
+        help="The number of groups to split the tests into",
+    )
+    plan_parser.add_argument(
+        "--durations-path",
+        default=".test_durations",
+        help=(
+            "Path or http(s) URL of the durations shared by the root directories, "
+            "default is .test_durations in the current working directory"
+        ),
+    )
+    plan_parser.add_argument(
+        "--splitting-algorithm",
+        choices=algorithms.Algorithms.names(),
+        default="least_duration",
+        help="Algorithm used to split the tests, default is least_duration",
+    )
+    plan_parser.add_argument(
+        "-o",
+        "--output",
+        default="plan.json",
+        help="Path of the plan, default is plan.json",
+    )
+    plan_parser.set_defaults(func=_plan)
+
+    run_plan_parser = subparsers.add_parser(
+        "run-plan",
+        help="Run a group of a plan written by 'pytest-split plan'",
+        description=(
+            "Run a group of a plan written by 'pytest-split plan', running pytest with '--split-plan' "
+            "once in each root directory which has tests in the group. Further arguments of pytest follow "
+            "after '--'. Exits with the first non-zero exit code of pytest."
+        ),
+    )
+    run_plan_parser.add_argument("plan", help="Path of the plan")
+    run_plan_parser.add_argument(
+        "--group",
+        type=_parse_groups,
+        required=True,
+        help="The group to run, or a comma separated list of groups",
+    )
+    run_plan_parser.set_defaults(func=_run_plan)
+
+    # Further arguments of pytest are passed to run-plan after '--'
+    argv = sys.argv[1:] if argv is None else argv
+    pytest_args: list[str] = []
+    if "--" in argv:
+        index = argv.index("--")
+        argv, pytest_args = argv[:index], argv[index + 1 :]
+    args = parser.parse_args(argv)
+    if pytest_args and args.func is not _run_plan:
+        parser.error(f"unrecognized arguments: -- {' '.join(pytest_args)}")
+    args.pytest_args = pytest_args
+    command: Callable[[argparse.Namespace], int] = args.func
+    sys.exit(command(args))
+
+
+def _diff(args: argparse.Namespace) -> int:
+    old = dict(durations.iter_durations(args.old))
+    new_heavy: list[tuple[str, float]] = []
+    increased: list[tuple[str, float, float]] = []
+    old_groups: dict[str, dict[str, float]] = {"file": {}, "package": {}}
+    new_groups: dict[str, dict[str, float]] = {
+        "file": defaultdict(float),
+        "package": defaultdict(float),
+    }
+    seen: set[str] = set()
+    new_total = 0.0
+
+    for name, duration in durations.iter_durations(args.new):
+        seen.add(name)
+        new_total += duration
+        for kind, group in _get_groups(name).items():
+            new_groups[kind][group] += duration
+        old_duration = old.get(name)
+        if old_duration is None:
+            if duration >= args.min_increase:
+                new_heavy.append((name, duration))
+        elif _is_regression(old_duration, duration, args):
+            increased.append((name, old_duration, duration))
+
+    removed_heavy = [
+        (name, duration)
+        for name, duration in old.items()
+        if name not in seen and duration >= args.min_increase
+    ]
+    for name, duration in old.items():
+        for kind, group in _get_groups(name).items():
+            old_groups[kind][group] = old_groups[kind].get(group, 0) + duration
+
+    increased_groups = {
+        kind: [
+            (group, old_groups[kind].get(group, 0), duration)
+            for group, duration in new_groups[kind].items()
+            if _is_regression(old_groups[kind].get(group, 0), duration, args)
+        ]
+        for kind in new_groups
+    }
+
+    old_total = sum(old.values())
+    print(  # noqa: T201
+        f"Total duration: {old_total:.2f}s -> {new_total:.2f}s ({_format_change(old_total, new_total)})"
+    )
+    _print_increased("Tests", increased)
+    _print_increased("Files", increased_groups["file"])
+    _print_increased("Packages", increased_groups["package"])
+    _print_tests("New heavy tests", new_heavy)
+    _print_tests("Removed heavy tests", removed_heavy)
+
+    return 1 if increased or new_heavy or any(increased_groups.values()) else 0
+
+
+def _import_junit(args: argparse.Namespace) -> int:
+    measured: dict[str, float] = {}
+    outcomes: dict[str, str] = {}
+    for report in args.reports:
+        with report:
+            # A test in several reports keeps its last duration
+            for nodeid, duration, outcome in junit.iter_testcases(report, args.rootdir):
+                measured[nodeid] = duration
+                outcomes[nodeid] = outcome
+
+    backend = backends.get_backend(args.durations_path, tempfile.gettempdir())
+    stored, metadata = durations.load(backend)
+    # Files in the compact layout are stored in it again
+    compact = "families" in metadata
+    stored = durations.expand(stored, metadata)
+    recorded, counts = durations.weigh_by_outcome(measured, stored, outcomes)
+    if not args.clean_durations:
+        recorded = {**stored, **recorded}
+
+    if args.durations_key:
+        keys = metadata.setdefault("keys", {})
+        keyed, _ = durations.weigh_by_outcome(
+            measured, keys.get(args.durations_key, {}), outcomes
+        )
+        if args.clean_durations:
+            keys[args.durations_key] = keyed
+        else:
+            keys.setdefault(args.durations_key, {}).update(keyed)
+
+    if compact:
+        recorded = durations.compact(recorded, metadata)
+    durations.dump(backend, recorded, metadata)
+    print(  # noqa: T201
+        f"Imported {counts['updated']} durations from {len(args.reports)} reports, "
+        f"kept {counts['kept']} and ignored {counts['ignored']} of skipped or errored tests"
+    )
+    return 0
+
+
+def _rerun_groups(args: argparse.Namespace) -> int:
+    backend = backends.get_backend(args.durations_path, tempfile.gettempdir())
+    stored, metadata = durations.load(backend)
+    stored = durations.expand(stored, metadata)
+    groups = rerun.count_groups(
+        rerun.load_failed(args.failed),
+        durations.expected_costs(stored, metadata),
+        args.target_duration,
+        max_groups=args.max_groups,
+    )
+    print(groups)  # noqa: T201
+    return 0
+
+
+def _plan(args: argparse.Namespace) -> int:
+    # The root directories are stored relative to the directory of the plan
+    base = os.path.dirname(os.path.abspath(args.output))
+    try:
+        collected = {
+            os.path.relpath(rootdir, base).replace(os.sep, "/"): plan.collect(rootdir)
+            for rootdir in args.rootdirs
+        }
+    except ValueError as e:
+        print(e, file=sys.stderr)  # noqa: T201
+        return 2
+
+    backend = backends.get_backend(args.durations_path, tempfile.gettempdir())
+    stored, metadata = durations.load(backend)
+    stored = durations.expand(stored, metadata)
+    split_plan = plan.make(
+        collected,
+        durations.expected_costs(stored, metadata),
+        args.splits,
+        args.splitting_algorithm,
+    )
+    plan.dump(args.output, split_plan)
+
+    count = sum(len(nodeids) for nodeids in collected.values())
+    longest = max(group["duration"] for group in split_plan["groups"])
+    print(  # noqa: T201
+        f"Planned {count} tests of {len(collected)} root directories in {args.splits} groups "
+        f"into {args.output}, the longest group taking {longest:.2f}s"
+    )
+    return 0
+
+
+def _run_plan(args: argparse.Namespace) -> int:
+    try:
+        return plan.run(args.plan, args.group, args.pytest_args)
+    except ValueError as e:
+        print(e, file=sys.stderr)  # noqa: T201
+        return 2
+
+
+def _parse_groups(value: str) -> "list[int]":
+    return [int(group) for group in value.split(",")]
+
+
+def _merge_traces(args: argparse.Namespace) -> int:
+    traces = []
+    for f in args.traces:
+        with f:
+            traces.append(json.load(f))
+    merged = trace.merge(traces)
+    trace.dump(args.output, merged)
+    print(  # noqa: T201
+        f"Merged {len(traces)} traces with {len(merged['traceEvents'])} events into {args.output}"
+    )
+    return 0
+
+
+def _merge_runner_history(args: argparse.Namespace) -> int:
+    records = []
+    for f in args.records:
+        with f:
+            records.append(json.load(f))
+    history = runners.load(args.history)
+    runners.merge(history, records)
+    output = args.output or args.history
+    runners.dump(output, history)
+    print(  # noqa: T201
+        f"Merged {len(records)} records of {len(history['runners'])} runners into {output}"
+    )
+    return 0
+
+
+def _get_groups(name: str) -> "dict[str, str]":
+    fpath = name.split("::", 1)[0]
+    return {"file": fpath, "package": posixpath.dirname(fpath) or "."}
+
+
+def _is_regression(old: float, new: float, args: argparse.Namespace) -> bool:
+    increase = new - old
+    min_increase: float = args.min_increase
+    min_ratio: float = args.min_ratio
+    return increase >= min_increase and increase >= old * min_ratio
+
+
+def _format_change(old: float, new: float) -> str:
+    change = f"{new - old:+.2f}s"
+    if old:
+        change += f", {(new - old) / old:+.1%}"
+    return change
+
+
+def _print_increased(title: str, increased: "list[tuple[str, float, float]]") -> None:
+    if not increased:
+        return
+    print(f"\n{title} with increased durations:")  # noqa: T201
+    for name, old, new in sorted(increased, key=lambda row: row[1] - row[2]):
+        print(f"  {old:.2f}s -> {new:.2f}s ({_format_change(old, new)}) {name}")  # noqa: T201
+
+
+def _print_tests(title: str, tests: "list[tuple[str, float]]") -> None:
+    if not tests:
+        return
+    print(f"\n{title}:")  # noqa: T201
+    for name, duration in sorted(tests, key=lambda row: -row[1]):
+        print(f"  {duration:.2f}s {name}")  # noqa: T201
@@ -0,0 +1,585 @@
+"""
+Reading and writing of the durations file.
+
+The durations file is a flat mapping of test node ids to their durations. Everything else pytest-split
+keeps about the tests, such as durations recorded under a ``--durations-key``, is stored under the reserved
+``METADATA_KEY`` entry of the same mapping.
+
+In the optional compact layout, the durations of the parametrizations of a test function are stored once per
+function under the ``families`` section of the metadata, see ``compact``.
+"""
+
+import json
+import math
+from typing import TYPE_CHECKING, Any
+
+from pytest_split import backends
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from typing import IO
+
+METADATA_KEY = "__pytest_split__"
+
+# How much the duration measured in a run counts, relative to the stored duration, by the outcome of the test.
+# Tests which were skipped or errored before their call phase finished keep their stored duration.
+OUTCOME_WEIGHTS = {
+    "passed": 1.0,
+    "failed": 0.5,
+    "xfailed": 0.5,
+    "skipped": 0.0,
+    "error": 0.0,
+}
+
+# How much the latest run counts in the moving estimate of the variance of a test's duration
+VARIANCE_WEIGHT = 0.2
+
+# The variance of a test is only kept while its standard deviation is at least this share of its duration,
+# and at least this many seconds
+MIN_SPREAD_RATIO = 0.1
+MIN_SPREAD = 0.01
+
+# Parametrized test functions with fewer parametrizations than this stay in the flat mapping in the compact layout
+MIN_FAMILY_SIZE = 5
+
+# The parametrizations of a family count as uniform while none of them deviates from the mean by more than this
+# share of it, and this many seconds
+FAMILY_TOLERANCE_RATIO = 0.1
+FAMILY_TOLERANCE = 0.01
+
+# How many decimals of the deviations of the parametrizations from the mean of their family are stored
+DEVIATION_DIGITS = 4
+
+# Sections of the metadata whose entries are keyed by node ids, or by the paths or functions they start with
+_NODEID_SECTIONS = ("last_seen", "file_costs", "reruns", "variances", "families")
+
+
+def load(
+    location: "str | backends.DurationsBackend",
+) -> "tuple[dict[str, float], dict[str, Any]]":
+    """
+    Load the durations file.
+
+    :param location: Path of the durations file or the backend in which the durations are stored.
+    :return: Tuple of the durations and the metadata, both empty if the file doesn't exist.
+    """
+    raw = _get_backend(location).load()
+
+    # This code provides backwards compatibility after we switched
+    # from saving durations in a list-of-lists to a dict format
+    # Remove this when bumping to v1
+    if isinstance(raw, list):
+        raw = dict(raw)
+
+    return split_metadata(raw)
+
+
+def dump(
+    location: "str | backends.DurationsBackend",
+    durations: "dict[str, float]",
+    metadata: "dict[str, Any]",
+) -> None:
+    _get_backend(location).save(join_metadata(durations, metadata))
+
+
+def iter_durations(
+    f: "IO[str]", chunk_size: int = 1 << 16
+) -> "Iterator[tuple[str, float]]":
+    """
+    Stream the durations of a durations file without reading all of it into memory, the metadata is skipped
+    except for the families of the compact layout, which are expanded.
+
+    :param f: The opened durations file, in either the current or the legacy list-of-lists format.
+    :param chunk_size: How many characters are read at a time.
+    """
+    reader = _JsonReader(f, chunk_size)
+    if reader.expect("{[") == "[":
+        # legacy list-of-lists format
+        if reader.peek() == "]":
+            return
+        while True:
+            name, duration = reader.value()
+            yield name, duration
+            if reader.expect(",]") == "]":
+                return
+
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        value = reader.value()
+        if name != METADATA_KEY:
+            yield name, value
+        elif isinstance(value, dict) and value.get("families"):
+            yield from expand_families(value["families"]).items()
+        if reader.expect(",}") == "}":
+            return
+
+
+_DELIMITERS = {",", ":", "]", "}", " ", "\t", "\n", "\r"}
+
+
+class _JsonReader:
+    """
+    Reads the JSON values of a file one at a time.
+    """
+
+    def __init__(self, f: "IO[str]", chunk_size: int) -> None:
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character, an empty string at the end of the file.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._read():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Invalid durations file: expected one of {chars!r}, got {char!r}"
+            )
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # The value continues beyond the buffer, reading as much again as is buffered decodes a value
+                # spanning many chunks, like a large metadata section, a logarithmic number of times
+                if not self._read(max(len(self.buffer) - self.pos, self.chunk_size)):
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if self.buffer[end : end + 1] not in _DELIMITERS and self._read():
+                continue
+            self.pos = end
+            return value
+
+    def _read(self, size: "int | None" = None) -> bool:
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+
+def split_metadata(raw: "dict[str, Any]") -> "tuple[dict[str, float], dict[str, Any]]":
+    """
+    Separate the durations from the metadata stored alongside them.
+    """
+    durations = dict(raw)
+    metadata = durations.pop(METADATA_KEY, {})
+    return durations, metadata
+
+
+def join_metadata(
+    durations: "dict[str, float]", metadata: "dict[str, Any]"
+) -> "dict[str, Any]":
+    if not metadata:
+        return dict(durations)
+    return {**durations, METADATA_KEY: metadata}
+
+
+def compact(
+    durations: "dict[str, float]", metadata: "dict[str, Any]"
+) -> "dict[str, float]":
+    """
+    Returns the durations to store in the compact layout, moving the parametrized test functions to the
+    ``families`` section of the metadata.
+
+    A family is stored as the mean duration of its parametrizations and either their ids, when the durations are
+    uniform (see ``FAMILY_TOLERANCE_RATIO``), or how much each of them deviates from the mean.
+
+    :param durations: Global durations, in the flat layout.
+    :param metadata: Metadata of the durations file, updated in place.
+    """
+    by_function: dict[str, dict[str, float]] = {}
+    for name, duration in durations.items():
+        function, bracket, params = name.partition("[")
+        if bracket and params.endswith("]"):
+            by_function.setdefault(function, {})[params[:-1]] = duration
+
+    flat = dict(durations)
+    families: dict[str, dict[str, Any]] = {}
+    for function, params_durations in by_function.items():
+        if len(params_durations) < MIN_FAMILY_SIZE:
+            continue
+        mean = sum(params_durations.values()) / len(params_durations)
+        deviations = {
+            param: round(duration - mean, DEVIATION_DIGITS)
+            for param, duration in params_durations.items()
+        }
+        tolerance = max(FAMILY_TOLERANCE_RATIO * mean, FAMILY_TOLERANCE)
+        if all(abs(deviation) <= tolerance for deviation in deviations.values()):
+            families[function] = {"duration": mean, "params": list(deviations)}
+        else:
+            families[function] = {"duration": mean, "params": deviations}
+        for param in deviations:
+            del flat[f"{function}[{param}]"]
+
+    if families:
+        metadata["families"] = families
+    else:
+        metadata.pop("families", None)
+    return flat
+
+
+def expand(
+    durations: "dict[str, float]", metadata: "dict[str, Any]"
+) -> "dict[str, float]":
+    """
+    Returns the durations of a file in the flat layout, removing the families of the compact layout from its
+    metadata.
+    """
+    families = metadata.pop("families", None)
+    if not families:
+        return durations
+    return {**expand_families(families), **durations}
+
+
+def expand_families(
+    families: "dict[str, dict[str, Any]]", names: "Iterable[str] | None" = None
+) -> "dict[str, float]":
+    """
+    Returns the durations of the parametrizations stored in the families of the compact layout.
+
+    :param families: The ``families`` section of the metadata.
+    :param names: Node ids to look up, only their families are expanded. All families are expanded if not given.
+    """
+    if names is None:
+        expanded: dict[str, float] = {}
+        for function, family in families.items():
+            expanded.update(_expand_family(function, family))
+        return expanded
+
+    wanted = [name for name in names if name.partition("[")[0] in families]
+    expanded = {}
+    for function in {name.partition("[")[0] for name in wanted}:
+        expanded.update(_expand_family(function, families[function]))
+    return {name: expanded[name] for name in wanted if name in expanded}
+
+
+def _expand_family(function: str, family: "dict[str, Any]") -> "dict[str, float]":
+    mean = family["duration"]
+    params = family["params"]
+    if isinstance(params, list):
+        return {f"{function}[{param}]": mean for param in params}
+    return {
+        f"{function}[{param}]": max(mean + deviation, 0.0)
+        for param, deviation in params.items()
+    }
+
+
+def split_prefix(
+    durations: "dict[str, float]",
+    metadata: "dict[str, Any]",
+    prefix: str,
+    prefixes: "Iterable[str]" = (),
+) -> "tuple[tuple[dict[str, float], dict[str, Any]], tuple[dict[str, float], dict[str, Any]]]":
+    """
+    Separate the tests whose node ids start with ``prefix``, e.g. those of one root directory of a plan.
+
+    :param prefixes: The prefixes of all root directories sharing the store. A test belongs to the longest of them
+        which its node id starts with, so that e.g. the root directory ``.``, whose prefix is empty, doesn't take the
+        tests of the others.
+    :return: Tuple of the durations and metadata of the tests with the prefix, which is removed from their node ids,
+        and of the other tests. The sections of the metadata which aren't about single tests, such as the number of
+        recording runs, are in the former.
+    """
+    longer = [
+        other
+        for other in prefixes
+        if len(other) > len(prefix) and other.startswith(prefix)
+    ]
+    own, other = _split_prefix(durations, prefix, longer)
+    own_metadata: dict[str, Any] = {}
+    other_metadata: dict[str, Any] = {}
+    for section, value in metadata.items():
+        if section in _NODEID_SECTIONS:
+            own_metadata[section], other_metadata[section] = _split_prefix(
+                value, prefix, longer
+            )
+        elif section == "keys":
+            parts = {
+                key: _split_prefix(keyed, prefix, longer)
+                for key, keyed in value.items()
+            }
+            own_metadata[section] = {key: part[0] for key, part in parts.items()}
+            other_metadata[section] = {key: part[1] for key, part in parts.items()}
+        else:
+            own_metadata[section] = value
+    return (own, own_metadata), (other, other_metadata)
+
+
+def join_prefix(
+    durations: "dict[str, float]",
+    metadata: "dict[str, Any]",
+    other: "dict[str, float]",
+    other_metadata: "dict[str, Any]",
+    prefix: str,
+) -> "tuple[dict[str, float], dict[str, Any]]":
+    """
+    Undo ``split_prefix``, adding the prefix to the node ids of the tests which had it.
+    """
+    joined = {**other, **_add_prefix(durations, prefix)}
+    joined_metadata = {
+        section: value
+        for section, value in metadata.items()
+        if section not in _NODEID_SECTIONS and section != "keys"
+    }
+    for section in _NODEID_SECTIONS:
+        value = {
+            **other_metadata.get(section, {}),
+            **_add_prefix(metadata.get(section, {}), prefix),
+        }
+        if value:
+            joined_metadata[section] = value
+    keys = other_metadata.get("keys", {}).keys() | metadata.get("keys", {}).keys()
+    if keys:
+        joined_metadata["keys"] = {
+            key: {
+                **other_metadata.get("keys", {}).get(key, {}),
+                **_add_prefix(metadata.get("keys", {}).get(key, {}), prefix),
+            }
+            for key in sorted(keys)
+        }
+    return joined, joined_metadata
+
+
+def _split_prefix(
+    mapping: "dict[str, Any]", prefix: str, longer: "list[str]"
+) -> "tuple[dict[str, Any], dict[str, Any]]":
+    own: dict[str, Any] = {}
+    other: dict[str, Any] = {}
+    for name, value in mapping.items():
+        if name.startswith(prefix) and not any(map(name.startswith, longer)):
+            own[name[len(prefix) :]] = value
+        else:
+            other[name] = value
+    return own, other
+
+
+def _add_prefix(mapping: "dict[str, Any]", prefix: str) -> "dict[str, Any]":
+    return {prefix + name: value for name, value in mapping.items()}
+
+
+def keyed_durations(
+    durations: "dict[str, float]", metadata: "dict[str, Any]", key: str
+) -> "dict[str, float]":
+    """
+    Returns the durations recorded under ``key``.
+
+    Tests which have no duration under ``key`` fall back to their global duration, scaled by how much
+    slower or faster the tests recorded under both are in the ``key`` environment.
+    """
+    own = metadata.get("keys", {}).get(key, {})
+    scale = _get_scale(durations, own)
+    return {
+        **{name: duration * scale for name, duration in durations.items()},
+        **own,
+    }
+
+
+def weigh_by_outcome(
+    measured: "dict[str, float]",
+    previous: "dict[str, float]",
+    outcomes: "dict[str, str]",
+) -> "tuple[dict[str, float], dict[str, int]]":
+    """
+    Returns the durations to record for the tests of a run, by the ``OUTCOME_WEIGHTS`` of their outcomes.
+
+    A test which failed may have stopped early, so its duration is moved only part of the way from the stored
+    duration towards the measured one. A test whose measured duration doesn't count keeps its stored duration,
+    or isn't recorded at all if it doesn't have one.
+
+    :param measured: Durations measured in the run.
+    :param previous: Stored durations.
+    :param outcomes: Outcome of each test, tests which are missing count as passed.
+    :return: Tuple of the durations to record and how many of them were updated, kept and ignored.
+    """
+    recorded: dict[str, float] = {}
+    counts = {"updated": 0, "kept": 0, "ignored": 0}
+    for name, duration in measured.items():
+        weight = OUTCOME_WEIGHTS[outcomes.get(name, "passed")]
+        stored = previous.get(name)
+        if weight:
+            if stored is None or weight == 1:
+                recorded[name] = duration
+            else:
+                recorded[name] = stored + weight * (duration - stored)
+            counts["updated"] += 1
+        elif stored is not None:
+            recorded[name] = stored
+            counts["kept"] += 1
+        else:
+            counts["ignored"] += 1
+    return recorded, counts
+
+
+def record_attempts(
+    metadata: "dict[str, Any]",
+    attempts: "dict[str, int]",
+    failed: "Iterable[str]",
+) -> None:
+    """
+    Update the rerun statistics of the tests which ran in this session.
+
+    Only tests which have been rerun or have failed at some point are tracked, by how many recording runs
+    they were part of, how many reruns they needed in total and in how many runs they failed in the end.
+
+    :param metadata: Metadata of the durations file, updated in place.
+    :param attempts: How many times each test ran in this session, including reruns.
+    :param failed: Node ids of the tests which failed in this session.
+    """
+    failed_names = set(failed)
+    reruns: dict[str, dict[str, int]] = metadata.get("reruns", {})
+    for name, count in attempts.items():
+        stats = reruns.get(name)
+        if stats is None:
+            if count == 1 and name not in failed_names:
+                continue
+            stats = {"runs": 0, "reruns": 0, "failures": 0}
+        stats["runs"] += 1
+        stats["reruns"] += count - 1
+        stats["failures"] += name in failed_names
+        reruns[name] = stats
+    if reruns:
+        metadata["reruns"] = reruns
+
+
+def record_variances(
+    metadata: "dict[str, Any]",
+    previous: "dict[str, float]",
+    measured: "dict[str, float]",
+    outcomes: "dict[str, str]",
+) -> None:
+    """
+    Update the moving estimate of the variance of the durations of the tests which passed in this session.
+
+    The variance is estimated from how much the measured duration differs from the stored one, the latest runs
+    counting most. Only the tests whose durations vary notably are kept, see ``MIN_SPREAD_RATIO``.
+
+    :param metadata: Metadata of the durations file, updated in place.
+    :param previous: Stored durations, before recording this session.
+    :param measured: Durations measured in this session.
+    :param outcomes: Outcome of each test, tests which are missing count as passed.
+    """
+    variances: dict[str, float] = metadata.get("variances", {})
+    for name, duration in measured.items():
+        stored = previous.get(name)
+        if stored is None or outcomes.get(name, "passed") != "passed":
+            continue
+        # The stored duration is a measurement too, the square of the difference of two is twice the variance
+        sample = (duration - stored) ** 2 / 2
+        variance = sample
+        if name in variances:
+            variance = (1 - VARIANCE_WEIGHT) * variances[
+                name
+            ] + VARIANCE_WEIGHT * sample
+        if math.sqrt(variance) >= max(MIN_SPREAD_RATIO * stored, MIN_SPREAD):
+            variances[name] = variance
+        else:
+            variances.pop(name, None)
+    if variances:
+        metadata["variances"] = variances
+    else:
+        metadata.pop("variances", None)
+
+
+def expected_costs(
+    durations: "dict[str, float]", metadata: "dict[str, Any]"
+) -> "dict[str, float]":
+    """
+    Returns the durations multiplied by the expected number of attempts of each test.
+    """
+    reruns = metadata.get("reruns")
+    if not reruns:
+        return durations
+    return {
+        name: duration * (1 + reruns[name]["reruns"] / reruns[name]["runs"])
+        if name in reruns
+        else duration
+        for name, duration in durations.items()
+    }
+
+
+def prune(
+    durations: "dict[str, float]",
+    metadata: "dict[str, Any]",
+    seen: "Iterable[str]",
+    after: int,
+) -> "list[str]":
+    """
+    Record a run and remove the durations of tests which haven't been seen in the last ``after`` runs.
+
+    Each stored test remembers the number of the last recording run it was seen in. Tests which have been
+    stored before pruning was first used count as seen in the current run. The rerun statistics and variances
+    of the removed tests and the collection costs of files without any remaining tests are removed as well.
+
+    :param durations: Global durations, pruned in place.
+    :param metadata: Metadata of the durations file, updated in place.
+    :param seen: Node ids of the tests which exist in the current run.
+    :param after: After how many runs without being seen a test is removed.
+    :return: Node ids of the removed tests.
+    """
+    run = metadata.get("run", 0) + 1
+    metadata["run"] = run
+    keyed = metadata.get("keys", {}).values()
+    stored = durations.keys() | {name for own in keyed for name in own}
+    seen_names = set(seen)
+
+    previously_seen = metadata.get("last_seen", {})
+    last_seen = {
+        name: run if name in seen_names else previously_seen.get(name, run)
+        for name in stored
+    }
+    pruned = sorted(name for name in stored if run - last_seen[name] >= after)
+    for name in pruned:
+        del last_seen[name]
+        durations.pop(name, None)
+        metadata.get("reruns", {}).pop(name, None)
+        metadata.get("variances", {}).pop(name, None)
+        for own in keyed:
+            own.pop(name, None)
+    metadata["last_seen"] = last_seen
+
+    if "file_costs" in metadata:
+        files = {name.split("::", 1)[0] for name in last_seen}
+        metadata["file_costs"] = {
+            fpath: cost
+            for fpath, cost in metadata["file_costs"].items()
+            if fpath in files
+        }
+    return pruned
+
+
+def _get_scale(durations: "dict[str, float]", own: "dict[str, float]") -> float:
+    # Sorted so that every shard sums in the same order and gets bit-identical estimates
+    common = sorted(own.keys() & durations.keys())
+    global_sum = sum(durations[name] for name in common)
+    own_sum = sum(own[name] for name in common)
+    if global_sum <= 0 or own_sum <= 0:
+        return 1.0
+    return own_sum / global_sum
+
+
+def _get_backend(
+    location: "str | backends.DurationsBackend",
+) -> backends.DurationsBackend:
+    if isinstance(location, backends.DurationsBackend):
+        return location
+    return backends.FileBackend(location)
@@ -0,0 +1,106 @@
+"""
+Stopping all groups of a split once a test fails in one of them.
+
+The first failure is published to a marker shared by the groups, which is either a local path or an ``http://`` /
+``https://`` URL of a service which stores a JSON document with ``PUT`` and returns it with ``GET``, like the one in
+``pytest_split.server``. Only the first failure is kept: a file is created only if it doesn't exist yet and the
+service is asked to store the document with ``If-None-Match: *``. Every group checks the marker between tests.
+"""
+
+import http.client
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Any
+from urllib.parse import urlsplit
+
+from pytest_split.backends import POOL, RemoteError
+
+# How often the marker is checked at most, in seconds
+CHECK_INTERVAL = 1.0
+
+# Errors of a missing or broken marker, which are reported without failing the tests
+MARKER_ERRORS = (OSError, ValueError, http.client.HTTPException, RemoteError)
+
+
+class Marker(ABC):
+    """Abstract base class for the places in which the first failure is published."""
+
+    @abstractmethod
+    def publish(self, failure: "dict[str, Any]") -> None:
+        """
+        Publish the failure, unless a failure has already been published.
+        """
+
+    @abstractmethod
+    def read(self) -> "dict[str, Any] | None":
+        """
+        Returns the published failure, or None if no test has failed yet.
+        """
+
+
+class FileMarker(Marker):
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def publish(self, failure: "dict[str, Any]") -> None:
+        # Link a complete file into place, so that other groups never read a partially written one
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".pytest-split-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(failure, f)
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+
+    def read(self) -> "dict[str, Any] | None":
+        try:
+            with open(self.path) as f:
+                failure: dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return None
+        return failure
+
+
+class HttpMarker(Marker):
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def publish(self, failure: "dict[str, Any]") -> None:
+        status, _, _ = POOL.request(
+            "PUT",
+            self.url,
+            body=json.dumps(failure).encode(),
+            headers={"Content-Type": "application/json", "If-None-Match": "*"},
+        )
+        if status not in (
+            http.client.OK,
+            http.client.CREATED,
+            http.client.NO_CONTENT,
+            http.client.PRECONDITION_FAILED,
+        ):
+            raise RemoteError(f"PUT {self.url} failed with status {status}")
+
+    def read(self) -> "dict[str, Any] | None":
+        status, _, body = POOL.request("GET", self.url)
+        if status == http.client.NOT_FOUND:
+            return None
+        if status != http.client.OK:
+            raise RemoteError(f"GET {self.url} failed with status {status}")
+        failure: dict[str, Any] = json.loads(body)
+        return failure
+
+
+def get_marker(location: str) -> Marker:
+    """
+    Returns the marker for a '--split-fail-fast' value.
+
+    :param location: Local path or URL of the marker.
+    """
+    if urlsplit(location).scheme in ("http", "https"):
+        return HttpMarker(location)
+    return FileMarker(location)
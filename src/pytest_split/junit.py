@@ -0,0 +1,106 @@
+"""
+Reading test durations from JUnit XML reports, e.g. written by pytest's ``--junitxml``.
+
+Pytest writes the node id of a test as a ``classname`` with the path of the test file in dotted form, followed by
+the classes, and the test ``name``. The file is found again by looking for the longest dotted prefix of the
+``classname`` which is a file under the root directory, unless the report has the ``file`` attribute.
+"""
+
+import os
+import xml.etree.ElementTree as ET
+from typing import IO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# Outcome of a test case by the tag of its child element, test cases without any of them passed
+OUTCOMES = {"failure": "failed", "error": "error", "skipped": "skipped"}
+
+
+def iter_testcases(
+    f: "IO[bytes]", rootdir: str = "."
+) -> "Iterator[tuple[str, float, str]]":
+    """
+    Read the test cases of a report one by one, without loading the whole report.
+
+    :param f: The report.
+    :param rootdir: Directory relative to which pytest reported the tests.
+    :return: Node id, duration and outcome of each test case which has a duration.
+    """
+    parents: list[ET.Element] = []
+    # The reports are written by our own test runs
+    for event, elem in ET.iterparse(f, events=("start", "end")):  # noqa: S314
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag != "testcase":
+            continue
+
+        duration = elem.get("time")
+        if duration is not None:
+            nodeid = get_nodeid(
+                elem.get("classname", ""),
+                elem.get("name", ""),
+                elem.get("file"),
+                rootdir,
+            )
+            yield nodeid, float(duration), _get_outcome(elem)
+
+        # Drop the test cases which have been read
+        if parents:
+            parents[-1].remove(elem)
+
+
+def get_nodeid(
+    classname: str, name: str, file: "str | None" = None, rootdir: str = "."
+) -> str:
+    """
+    Returns the pytest node id of a test case.
+
+    :param classname: The ``classname`` attribute of the test case, e.g. ``tests.test_foo.TestFoo``.
+    :param name: The ``name`` attribute of the test case, e.g. ``test_foo[1]``.
+    :param file: The ``file`` attribute of the test case, if the report has one.
+    :param rootdir: Directory relative to which pytest reported the tests.
+    """
+    parts = classname.split(".") if classname else []
+    fpath, size = _find_file(parts, file, rootdir)
+    return "::".join([fpath, *parts[size:], name])
+
+
+def _find_file(
+    parts: "list[str]", file: "str | None", rootdir: str
+) -> "tuple[str, int]":
+    """
+    Returns the path of the test file and how many parts of the classname it takes.
+    """
+    if file:
+        fpath = file.replace("\\", "/")
+        size = len(fpath.removesuffix(".py").split("/"))
+        if ".".join(parts[:size]) == fpath.removesuffix(".py").replace("/", "."):
+            return fpath, size
+
+    for size in range(len(parts), 0, -1):
+        base = "/".join(parts[:size])
+        candidates = [f"{base}.py"]
+        if size > 1:
+            # A file with another extension, e.g. a notebook
+            candidates.append(f"{'/'.join(parts[: size - 1])}.{parts[size - 1]}")
+        for candidate in candidates:
+            if os.path.isfile(os.path.join(rootdir, candidate)):
+                return candidate, size
+
+    # The file doesn't exist here, assume the classes are named like pytest collects them by default
+    size = next(
+        (i for i in range(1, len(parts)) if parts[i].startswith("Test")), len(parts)
+    )
+    return "/".join(parts[:size]) + ".py", size
+
+
+def _get_outcome(testcase: ET.Element) -> str:
+    for child in testcase:
+        if child.tag == "skipped" and child.get("type") == "pytest.xfail":
+            return "xfailed"
+        if child.tag in OUTCOMES:
+            return OUTCOMES[child.tag]
+    return "passed"
@@ -0,0 +1,116 @@
+"""
+Ordering of the selected tests which avoids repeated setup of higher-scoped fixtures.
+
+Tests which share a parametrized session-, package-, module- or class-scoped fixture with the same parameter are
+put next to each other, starting with the highest scope. Otherwise the tests keep their relative order. The cells
+of a notebook stay together and in order.
+"""
+
+import posixpath
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from _pytest import nodes
+
+SCOPES = ("session", "package", "module", "class")
+
+
+def order_by_fixtures(items: "list[nodes.Item]") -> "tuple[list[nodes.Item], int, int]":
+    """
+    Order the items so that tests which share higher-scoped fixtures run after each other.
+
+    The new order is only used if it needs fewer setups of higher-scoped fixtures than the original one.
+
+    :return: Tuple of the ordered items and the number of setups of higher-scoped fixtures before and after.
+    """
+    before = count_setups(items)
+    # Modules and classes are kept in the order in which they first appear
+    first_seen: dict[str, int] = {}
+    for index, item in enumerate(items):
+        first_seen.setdefault(_get_scope_node(item, "module"), index)
+        first_seen.setdefault(_get_scope_node(item, "class"), index)
+
+    keys = [_get_sort_key(item, first_seen) for item in items]
+    order = sorted(range(len(items)), key=lambda i: (keys[i], i))
+    ordered = [items[i] for i in order]
+    after = count_setups(ordered)
+    if after >= before:
+        return list(items), before, before
+    return ordered, before, after
+
+
+def count_setups(items: "list[nodes.Item]") -> int:
+    """
+    Estimate how many times higher-scoped fixtures are set up when running the items in the given order.
+
+    A fixture is set up again whenever a test needs it with another parameter or in another scope node,
+    e.g. in another module for a module-scoped fixture.
+    """
+    active: dict[str, tuple[str, object]] = {}
+    setups = 0
+    for item in items:
+        for scope, name, param_index in _get_fixtures(item):
+            key = (_get_scope_node(item, scope), param_index)
+            if active.get(name) != key:
+                active[name] = key
+                setups += 1
+    return setups
+
+
+def _get_sort_key(
+    item: "nodes.Item", first_seen: "dict[str, int]"
+) -> "tuple[object, ...]":
+    params: dict[str, list[tuple[str, int]]] = {scope: [] for scope in SCOPES}
+    fpath = _get_scope_node(item, "module")
+    if not fpath.endswith(".ipynb"):
+        for scope, name, param_index in _get_fixtures(item):
+            if param_index is not None:
+                params[scope].append((name, param_index))
+
+    return (
+        _get_params_key(params["session"]),
+        _get_params_key(params["package"]),
+        first_seen[fpath],
+        _get_params_key(params["module"]),
+        first_seen[_get_scope_node(item, "class")],
+        _get_params_key(params["class"]),
+    )
+
+
+def _get_params_key(
+    params: "list[tuple[str, int]]",
+) -> "tuple[bool, list[tuple[str, int]]]":
+    # Tests without parameters in a scope go after the parametrized ones instead of before them
+    return not params, sorted(params)
+
+
+def _get_fixtures(item: "nodes.Item") -> "list[tuple[str, str, int | None]]":
+    """
+    Returns the scope, name and parameter index of the higher-scoped fixtures used by the item.
+    """
+    info = getattr(item, "_fixtureinfo", None)
+    if info is None:
+        return []
+    callspec = getattr(item, "callspec", None)
+    indices = callspec.indices if callspec is not None else {}
+
+    fixtures = []
+    for name in info.names_closure:
+        fixturedefs = info.name2fixturedefs.get(name)
+        if not fixturedefs:
+            continue
+        scope = str(fixturedefs[-1].scope)
+        if scope in SCOPES:
+            fixtures.append((scope, name, indices.get(name)))
+    return fixtures
+
+
+def _get_scope_node(item: "nodes.Item", scope: str) -> str:
+    fpath = item.nodeid.split("::", 1)[0]
+    if scope == "session":
+        return ""
+    if scope == "package":
+        return posixpath.dirname(fpath)
+    if scope == "class" and getattr(item, "cls", None) is not None:
+        return item.nodeid.rsplit("::", 1)[0]
+    return fpath
@@ -0,0 +1,230 @@
+"""
+Splitting the tests of several pytest root directories of a monorepo together.
+
+A plan assigns the tests of all root directories to the groups at once, so that the groups are balanced across the
+root directories instead of per root directory. ``pytest-split plan`` collects the tests of each root directory and
+writes the plan, ``pytest-split run-plan`` runs pytest with ``--split-plan`` once per root directory which has tests
+in a group.
+
+The root directories are stored relative to the directory of the plan. All of them share one durations store, in
+which the node ids of a root directory are prefixed with its path, e.g. ``packages/a/tests/test_x.py::test_1``.
+"""
+
+import json
+import os
+import posixpath
+import subprocess
+import sys
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+
+from pytest_split import algorithms
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from _pytest import nodes
+    from _pytest.config import Config
+
+# Start of the line with the root directory of pytest which ``collect`` makes pytest print
+ROOTDIR_LINE = "pytest-split rootdir: "
+
+
+class PlanItem(NamedTuple):
+    """
+    A test of a root directory, with its node id prefixed by the root directory, in place of a pytest item.
+    """
+
+    nodeid: str
+
+
+def collect(rootdir: str, args: "Sequence[str]" = ()) -> "list[str]":
+    """
+    Returns the node ids of the tests of a root directory, by running ``pytest --collect-only`` in it.
+
+    :param rootdir: The root directory.
+    :param args: Further arguments of pytest, e.g. to select the tests to collect.
+    :raises ValueError: If the directory isn't the root directory of pytest, as its node ids would be relative to
+        another directory.
+    """
+    result = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "pytest",
+            "--collect-only",
+            "-q",
+            "-p",
+            "pytest_split.plan",
+            *args,
+        ],
+        cwd=rootdir,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    # 5 means that no tests were collected
+    if result.returncode not in (0, 5):
+        raise RuntimeError(
+            f"Collecting the tests of {rootdir} failed:\n{result.stdout}{result.stderr}"
+        )
+    # The node ids are listed before the summary, separated by an empty line
+    nodeids, _, _ = result.stdout.partition("\n\n")
+    lines = nodeids.splitlines()
+    for line in lines:
+        rootpath = line.removeprefix(ROOTDIR_LINE)
+        if rootpath != line and os.path.realpath(rootpath) != os.path.realpath(rootdir):
+            raise ValueError(
+                f"{rootdir} is not the root directory of pytest, which is {rootpath}, "
+                "add a pytest configuration file to it"
+            )
+    return [
+        line for line in lines if "::" in line and not line.startswith(ROOTDIR_LINE)
+    ]
+
+
+def pytest_report_collectionfinish(config: "Config") -> str:
+    """
+    Reports the root directory of pytest, when ``collect`` loads this module as a plugin.
+    """
+    return f"{ROOTDIR_LINE}{config.rootpath}"
+
+
+def make(
+    collected: "dict[str, list[str]]",
+    durations: "dict[str, float]",
+    splits: int,
+    algorithm: str = "least_duration",
+) -> "dict[str, Any]":
+    """
+    Split the tests of several root directories into groups.
+
+    :param collected: Node ids of the tests of each root directory.
+    :param durations: Our cached test runtimes, with the node ids prefixed by their root directory.
+    :param splits: How many groups we're splitting in.
+    :param algorithm: Name of the splitting algorithm.
+    :return: The plan, which lists the root directories and the node ids of each group.
+    """
+    tests = {
+        get_prefix(rootdir) + nodeid: (rootdir, nodeid)
+        for rootdir, nodeids in collected.items()
+        for nodeid in nodeids
+    }
+    items = [PlanItem(name) for name in tests]
+    groups = algorithms.Algorithms[algorithm].value(
+        splits, cast("list[nodes.Item]", items), durations
+    )
+
+    plan_groups = []
+    for group in groups:
+        roots: dict[str, list[str]] = {}
+        for item in group.selected:
+            rootdir, nodeid = tests[item.nodeid]
+            roots.setdefault(rootdir, []).append(nodeid)
+        plan_groups.append(
+            {
+                "duration": group.duration,
+                "roots": [
+                    {"rootdir": rootdir, "nodeids": roots[rootdir]}
+                    for rootdir in collected
+                    if rootdir in roots
+                ],
+            }
+        )
+    return {"splits": splits, "rootdirs": list(collected), "groups": plan_groups}
+
+
+def load(path: str) -> "dict[str, Any]":
+    with open(path) as f:
+        plan: dict[str, Any] = json.load(f)
+    return plan
+
+
+def dump(path: str, plan: "dict[str, Any]") -> None:
+    with open(path, "w") as f:
+        json.dump(plan, f, indent=4)
+
+
+def get_rootdir(
+    plan: "dict[str, Any]", path: str, rootpath: "str | os.PathLike[str]"
+) -> "str | None":
+    """
+    Returns the root directory of the plan which is ``rootpath``, None if the plan doesn't have it.
+
+    :param plan: The plan.
+    :param path: Path of the plan, its root directories are relative to its directory.
+    :param rootpath: Root directory of the pytest run.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    for rootdir in plan["rootdirs"]:
+        if os.path.realpath(os.path.join(base, rootdir)) == os.path.realpath(rootpath):
+            return str(rootdir)
+    return None
+
+
+def get_prefix(rootdir: str) -> str:
+    """
+    Returns the prefix of the node ids of the tests of a root directory in the durations store.
+    """
+    rootdir = posixpath.normpath(rootdir)
+    return "" if rootdir == "." else f"{rootdir}/"
+
+
+def get_prefixes(plan: "dict[str, Any]") -> "list[str]":
+    """
+    Returns the prefixes of the node ids of the tests of all root directories of the plan.
+    """
+    return [get_prefix(rootdir) for rootdir in plan["rootdirs"]]
+
+
+def get_nodeids(
+    plan: "dict[str, Any]", groups: "list[int]", rootdir: str
+) -> "list[str]":
+    """
+    Returns the node ids of the tests of a root directory in the given groups of the plan.
+    """
+    return [
+        nodeid
+        for group in groups
+        for root in plan["groups"][group - 1]["roots"]
+        if root["rootdir"] == rootdir
+        for nodeid in root["nodeids"]
+    ]
+
+
+def run(path: str, groups: "list[int]", args: "Sequence[str]" = ()) -> int:
+    """
+    Run pytest with ``--split-plan`` once in each root directory which has tests in the given groups.
+
+    :param path: Path of the plan.
+    :param groups: The groups to run.
+    :param args: Further arguments of pytest.
+    :return: The first non-zero exit code of pytest, 0 if all runs passed.
+    :raises ValueError: If the plan doesn't have one of the groups.
+    """
+    plan = load(path)
+    if any(group < 1 or group > plan["splits"] for group in groups):
+        raise ValueError(f"The groups must be >= 1 and <= {plan['splits']}")
+    path = os.path.abspath(path)
+    base = os.path.dirname(path)
+    exit_code = 0
+    for rootdir in plan["rootdirs"]:
+        count = len(get_nodeids(plan, groups, rootdir))
+        if not count:
+            continue
+        print(f"[pytest-split] Running {count} tests in {rootdir}", flush=True)  # noqa: T201
+        result = subprocess.run(  # noqa: S603
+            [
+                sys.executable,
+                "-m",
+                "pytest",
+                # A separate value would count as a path when pytest determines the root directory
+                f"--split-plan={path}",
+                "--group",
+                ",".join(map(str, groups)),
+                *args,
+            ],
+            cwd=os.path.join(base, rootdir),
+            check=False,
+        )
+        exit_code = exit_code or result.returncode
+    return exit_code
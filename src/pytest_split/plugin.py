@@ -1,15 +1,34 @@
+import argparse
 import json
 import os
-from typing import TYPE_CHECKING
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any, cast
 
 import pytest
 from _pytest.config import create_terminal_writer, hookimpl
 from _pytest.reports import TestReport
 
-from pytest_split import algorithms
+from pytest_split import (
+    algorithms,
+    backends,
+    budget,
+    calibration,
+    durations,
+    fail_fast,
+    ordering,
+    plan,
+    precompile,
+    rerun,
+    runners,
+    trace,
+)
 from pytest_split.ipynb_compatibility import ensure_ipynb_compatibility
 
 if TYPE_CHECKING:
+    from collections.abc import Generator
+
     from _pytest import nodes
     from _pytest.config import Config
     from _pytest.config.argparsing import Parser
@@ -19,6 +38,24 @@ if TYPE_CHECKING:
 # Ugly hack for freezegun compatibility: https://github.com/spulec/freezegun/issues/286
 STORE_DURATIONS_SETUP_AND_TEARDOWN_THRESHOLD = 60 * 10  # seconds
 
+# How many speed factors of recording runs are kept in the durations file
+MAX_STORED_SPEEDS = 100
+
+# How many files with deselected tests are listed in time budget mode
+BUDGET_REPORT_FILES = 10
+
+# Tests which overrun their estimate by less than this are not reported as stragglers
+OVERRUN_MIN_SECONDS = 0.1
+
+# Options which only take effect when running a group, by their destination
+SPLIT_ONLY_OPTIONS = {
+    "split_fail_fast": "--split-fail-fast",
+    "split_progress": "--split-progress",
+    "split_order_fixtures": "--split-order-fixtures",
+    "split_overruns_path": "--split-overruns-path",
+    "split_runner_record": "--split-runner-record",
+}
+
 
 def pytest_addoption(parser: "Parser") -> None:
     """
@@ -39,10 +76,20 @@ def pytest_addoption(parser: "Parser") -> None:
         dest="durations_path",
         help=(
             "Path to the file in which durations are (to be) stored, "
-            "default is .test_durations in the current working directory"
+            "default is .test_durations in the current working directory. "
+            "An http(s) URL stores the durations in a remote service instead."
         ),
         default=os.path.join(os.getcwd(), ".test_durations"),
     )
+    group.addoption(
+        "--durations-key",
+        dest="durations_key",
+        help=(
+            "Store and split with durations recorded under this key, e.g. 'py312-cext'. "
+            "Tests without durations under the key use their global duration, "
+            "scaled to the environment of the key."
+        ),
+    )
     group.addoption(
         "--splits",
         dest="splits",
@@ -52,8 +99,11 @@ def pytest_addoption(parser: "Parser") -> None:
     group.addoption(
         "--group",
         dest="group",
-        type=int,
-        help="The group of tests that should be executed (first one is 1)",
+        type=_parse_groups,
+        help=(
+            "The group of tests that should be executed (first one is 1). "
+            "Several groups can be executed in one process with a comma separated list, e.g. 1,5,9"
+        ),
     )
     group.addoption(
         "--splitting-algorithm",
@@ -63,6 +113,193 @@ def pytest_addoption(parser: "Parser") -> None:
         default="duration_based_chunks",
         choices=algorithms.Algorithms.names(),
     )
+    group.addoption(
+        "--split-time-budget",
+        dest="split_time_budget",
+        type=float,
+        help=(
+            "Instead of splitting, run the most valuable tests which fit in this many seconds. "
+            "Tests which failed in the last run, tests of changed files and tests of modules which aren't "
+            "covered by other selected tests are preferred."
+        ),
+    )
+    group.addoption(
+        "--split-changed-files",
+        dest="split_changed_files",
+        help=(
+            "Path to a file listing the changed files, one per line and relative to the root directory, "
+            "e.g. the output of 'git diff --name-only'. Used by '--split-time-budget'."
+        ),
+    )
+    group.addoption(
+        "--split-failed",
+        dest="split_failed",
+        action="store_true",
+        help=(
+            "Only run the tests which failed in the last run, split into as few of the '--splits' groups as it "
+            "takes for each to run for about '--split-target-duration'. The remaining groups run nothing."
+        ),
+    )
+    group.addoption(
+        "--split-failed-from",
+        dest="split_failed_from",
+        action="append",
+        help=(
+            "With '--split-failed', path of a file with the failed tests of a group, either its "
+            "'.pytest_cache/v/cache/lastfailed' or one node id per line. Can be given several times, "
+            "default is the lastfailed data of this directory."
+        ),
+    )
+    group.addoption(
+        "--split-target-duration",
+        dest="split_target_duration",
+        type=float,
+        default=rerun.TARGET_DURATION,
+        help=f"With '--split-failed', how many seconds each group should run for, default is {rerun.TARGET_DURATION:g}",
+    )
+    group.addoption(
+        "--group-capabilities",
+        dest="group_capabilities",
+        action="append",
+        type=_parse_group_capabilities,
+        help=(
+            "Capabilities of a group, e.g. '2=db,redis', can be repeated for several groups. "
+            "Tests marked with 'requires_capability' are only assigned to groups which have all the "
+            "capabilities they require. Requires '--splitting-algorithm least_duration'."
+        ),
+    )
+    group.addoption(
+        "--split-file-costs",
+        dest="split_file_costs",
+        action="store_true",
+        help=(
+            "With '--store-durations', also store how long collecting (importing) each test file takes. "
+            "When splitting, add that cost once to every group which runs tests of the file."
+        ),
+    )
+    group.addoption(
+        "--split-variances",
+        dest="split_variances",
+        action="store_true",
+        help=(
+            "With '--store-durations', also store how much the duration of each test varies between runs, "
+            "which the 'least_tail_duration' algorithm uses to spread the tests with a high variance."
+        ),
+    )
+    group.addoption(
+        "--split-compact-durations",
+        dest="split_compact_durations",
+        action="store_true",
+        help=(
+            "With '--store-durations', store the durations of the parametrizations of a test function once per "
+            "function, as their mean duration and how much each of them deviates from it. "
+            "This makes the durations file of suites with many parametrizations much smaller. "
+            "A durations file in this layout stays in it when storing without the option."
+        ),
+    )
+    group.addoption(
+        "--split-calibrate",
+        dest="split_calibrate",
+        action="store_true",
+        help=(
+            "Measure the speed of the machine with a short benchmark at session start. "
+            "With '--store-durations', store durations normalised to a reference machine, "
+            "when splitting, scale the estimates back to the speed of this machine."
+        ),
+    )
+    group.addoption(
+        "--split-order-fixtures",
+        dest="split_order_fixtures",
+        action="store_true",
+        help=(
+            "Reorder the selected tests so that tests which share a parametrized session-, package-, "
+            "module- or class-scoped fixture run after each other, to set up those fixtures less often."
+        ),
+    )
+    group.addoption(
+        "--split-fail-fast",
+        dest="split_fail_fast",
+        help=(
+            "Local path or http(s) URL of a marker shared by all groups of a split. "
+            "The first failing test is published to it, and every group stops once it finds a failure there. "
+            "Use a separate location per pipeline run."
+        ),
+    )
+    group.addoption(
+        "--split-progress",
+        dest="split_progress",
+        action="store_true",
+        help=(
+            "Report the estimated time remaining as tests finish, "
+            "and the tests which take longer than '--split-overrun-factor' times their stored duration."
+        ),
+    )
+    group.addoption(
+        "--split-overrun-factor",
+        dest="split_overrun_factor",
+        type=float,
+        default=2.0,
+        help="How many times its stored duration a test may take before it's reported as a straggler, default is 2",
+    )
+    group.addoption(
+        "--split-overruns-path",
+        dest="split_overruns_path",
+        help=(
+            "Path to a JSON file to which the stragglers of the run are written. "
+            "When splitting, the durations of the stragglers in the file take precedence over the stored durations."
+        ),
+    )
+    group.addoption(
+        "--split-runner-history",
+        dest="split_runner_history",
+        help=(
+            "Path to a JSON file with the history of how fast the runners ran their groups, "
+            "see '--split-runner-record'. When splitting, groups which last ran on "
+            "slower runners get less work. Requires '--splitting-algorithm least_duration'."
+        ),
+    )
+    group.addoption(
+        "--split-runner-record",
+        dest="split_runner_record",
+        help=(
+            "Path to a JSON file to write at the end of the run, recording how long the tests took compared to "
+            "their estimated durations under the id of the runner in '--split-runner-env'. "
+            "'pytest-split merge-runner-history' merges the records of the groups into '--split-runner-history'."
+        ),
+    )
+    group.addoption(
+        "--split-runner-env",
+        dest="split_runner_env",
+        default=runners.DEFAULT_ENV,
+        help=f"Environment variable with the id of the runner, default is {runners.DEFAULT_ENV}",
+    )
+    group.addoption(
+        "--split-plan",
+        dest="split_plan",
+        help=(
+            "Path of a plan written by 'pytest-split plan', which splits the tests of several root directories "
+            "together. Runs the tests of '--group' which the plan assigns to the root directory of this run, "
+            "and stores durations with the node ids prefixed by the root directory."
+        ),
+    )
+    group.addoption(
+        "--split-precompile",
+        dest="split_precompile",
+        action="store_true",
+        help=(
+            "Before collection, compile the test files and conftests which the group is expected to run "
+            "to bytecode in a process pool, instead of one after another while collecting them."
+        ),
+    )
+    group.addoption(
+        "--split-trace",
+        dest="split_trace",
+        help=(
+            "Path of a JSON file to which a timeline of the run is written in the Chrome trace event format, "
+            "with a span per test phase and planning phase of pytest-split. "
+            "Merge the timelines of the groups with 'pytest-split merge-traces'."
+        ),
+    )
     group.addoption(
         "--clean-durations",
         dest="clean_durations",
@@ -72,6 +309,16 @@ def pytest_addoption(parser: "Parser") -> None:
             "while running the suite with '--store-durations'."
         ),
     )
+    group.addoption(
+        "--prune-durations-after",
+        dest="prune_durations_after",
+        type=int,
+        help=(
+            "Removes the test duration info for tests which have not been collected "
+            "in the last N runs with '--store-durations'. "
+            "Unlike '--clean-durations' this is safe to use when storing durations of a subset of the suite."
+        ),
+    )
 
 
 @pytest.hookimpl(tryfirst=True)
@@ -79,9 +326,24 @@ def pytest_cmdline_main(config: "Config") -> "int | ExitCode | None":
     """
     Validate options.
     """
+    prune_durations_after = config.getoption("prune_durations_after")
+    if prune_durations_after is not None and prune_durations_after < 1:
+        raise pytest.UsageError("argument `--prune-durations-after` must be >= 1")
+
+    if config.getoption("split_overrun_factor") < 1:
+        raise pytest.UsageError("argument `--split-overrun-factor` must be >= 1")
+
     group = config.getoption("group")
     splits = config.getoption("splits")
 
+    _validate_time_budget(config)
+    _validate_split_failed(config)
+    _validate_split_only_options(config)
+
+    if config.getoption("split_plan"):
+        _validate_split_plan(config)
+        return None
+
     if splits is None and group is None:
         return None
 
@@ -94,17 +356,157 @@ def pytest_cmdline_main(config: "Config") -> "int | ExitCode | None":
     if splits < 1:
         raise pytest.UsageError("argument `--splits` must be >= 1")
 
-    if group < 1 or group > splits:
+    if any(g < 1 or g > splits for g in group):
         raise pytest.UsageError(f"argument `--group` must be >= 1 and <= {splits}")
 
+    _validate_group_capabilities(config, splits)
+    if config.getoption("split_runner_history") and (
+        config.getoption("splitting_algorithm") != "least_duration"
+    ):
+        raise pytest.UsageError(
+            "argument `--split-runner-history` requires `--splitting-algorithm least_duration`"
+        )
     return None
 
 
+def _validate_time_budget(config: "Config") -> None:
+    time_budget = config.getoption("split_time_budget")
+    if time_budget is not None and time_budget <= 0:
+        raise pytest.UsageError("argument `--split-time-budget` must be > 0")
+    if time_budget is not None and (
+        config.getoption("splits") is not None or config.getoption("group") is not None
+    ):
+        raise pytest.UsageError(
+            "argument `--split-time-budget` can't be combined with `--splits` and `--group`"
+        )
+
+
+def _validate_split_only_options(config: "Config") -> None:
+    if (
+        config.getoption("splits") is not None
+        or config.getoption("group") is not None
+        or config.getoption("split_time_budget") is not None
+        or config.getoption("split_plan")
+    ):
+        return
+    for dest, name in SPLIT_ONLY_OPTIONS.items():
+        if config.getoption(dest):
+            raise pytest.UsageError(
+                f"argument `{name}` requires `--splits` and `--group`"
+            )
+
+
+def _validate_split_failed(config: "Config") -> None:
+    if config.getoption("split_target_duration") <= 0:
+        raise pytest.UsageError("argument `--split-target-duration` must be > 0")
+
+    if not config.getoption("split_failed"):
+        return
+    if config.getoption("splits") is None or config.getoption("group") is None:
+        raise pytest.UsageError(
+            "argument `--split-failed` requires `--splits` and `--group`"
+        )
+    if config.getoption("group_capabilities"):
+        raise pytest.UsageError(
+            "argument `--split-failed` can't be combined with `--group-capabilities`"
+        )
+
+
+def _validate_split_plan(config: "Config") -> None:
+    if config.getoption("splits") is not None:
+        raise pytest.UsageError(
+            "argument `--split-plan` can't be combined with `--splits`, the plan has its own"
+        )
+    group = config.getoption("group")
+    if group is None:
+        raise pytest.UsageError("argument `--split-plan` requires `--group`")
+    if config.getoption("prune_durations_after") is not None:
+        raise pytest.UsageError(
+            "argument `--split-plan` can't be combined with `--prune-durations-after`"
+        )
+    if config.getoption("group_capabilities"):
+        raise pytest.UsageError(
+            "argument `--split-plan` can't be combined with `--group-capabilities`, "
+            "the plan already assigns the tests to the groups"
+        )
+
+    path = config.getoption("split_plan")
+    try:
+        split_plan = plan.load(path)
+    except (OSError, ValueError) as e:
+        raise pytest.UsageError(f"Could not read the plan {path}: {e}") from e
+    splits = split_plan["splits"]
+    if any(g < 1 or g > splits for g in group):
+        raise pytest.UsageError(f"argument `--group` must be >= 1 and <= {splits}")
+    if plan.get_rootdir(split_plan, path, config.rootpath) is None:
+        raise pytest.UsageError(
+            f"The root directory {config.rootpath} is not part of the plan {path}"
+        )
+
+
+def _validate_group_capabilities(config: "Config", splits: int) -> None:
+    group_capabilities = config.getoption("group_capabilities")
+    if not group_capabilities:
+        return
+
+    if config.getoption("splitting_algorithm") != "least_duration":
+        raise pytest.UsageError(
+            "argument `--group-capabilities` requires `--splitting-algorithm least_duration`"
+        )
+
+    if any(g < 1 or g > splits for g, _ in group_capabilities):
+        raise pytest.UsageError(
+            f"argument `--group-capabilities` groups must be >= 1 and <= {splits}"
+        )
+
+
+def _parse_groups(value: str) -> "list[int]":
+    groups: list[int] = []
+    for part in str(value).split(","):
+        try:
+            g = int(part)
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"invalid group: {part!r}, expected an integer or a comma separated list of integers"
+            ) from None
+        if g not in groups:
+            groups.append(g)
+    return groups
+
+
+def _parse_group_capabilities(value: str) -> "tuple[int, list[str]]":
+    group, sep, capabilities = str(value).partition("=")
+    try:
+        g = int(group)
+    except ValueError:
+        sep = ""
+    if not sep:
+        raise argparse.ArgumentTypeError(
+            f"invalid group capabilities: {value!r}, expected e.g. '2=db,redis'"
+        )
+    return g, [c.strip() for c in capabilities.split(",") if c.strip()]
+
+
 def pytest_configure(config: "Config") -> None:
     """
     Enable the plugins we need.
     """
-    if config.option.splits and config.option.group:
+    config.addinivalue_line(
+        "markers",
+        "requires_capability(*names): only run the test in the groups which have "
+        "the given '--group-capabilities'",
+    )
+    # With pytest-xdist, only the controller sees the reports of all workers
+    if config.option.split_trace and not hasattr(config, "workerinput"):
+        config.pluginmanager.register(
+            PytestSplitTracePlugin(config), "pytestsplittraceplugin"
+        )
+
+    if (
+        (config.option.splits and config.option.group)
+        or config.option.split_time_budget
+        or config.option.split_plan
+    ):
         config.pluginmanager.register(PytestSplitPlugin(config), "pytestsplitplugin")
 
     if config.option.store_durations:
@@ -122,25 +524,79 @@ class Base:
         """
         self.config = config
         self.writer = create_terminal_writer(self.config)
-
+        self.backend = backends.get_backend(
+            config.option.durations_path, _get_cache_dir(config)
+        )
         try:
-            with open(config.option.durations_path) as f:
-                self.cached_durations = json.loads(f.read())
-        except FileNotFoundError:
-            self.cached_durations = {}
-
-        # This code provides backwards compatibility after we switched
-        # from saving durations in a list-of-lists to a dict format
-        # Remove this when bumping to v1
-        if isinstance(self.cached_durations, list):
-            self.cached_durations = dict(self.cached_durations)
+            self.cached_durations, self.metadata = durations.load(self.backend)
+        except backends.RemoteError as e:
+            raise pytest.UsageError(
+                f"Could not load the durations from {config.option.durations_path}: {e}"
+            ) from e
+        if (
+            isinstance(self.backend, backends.HttpBackend)
+            and self.backend.offline_reason
+        ):
+            self.writer.line(
+                self.writer.markup(
+                    f"[pytest-split] Could not reach {config.option.durations_path} "
+                    f"({self.backend.offline_reason}), using the durations cached from the last run"
+                )
+            )
+        self.speed = (
+            calibration.measure_speed() if config.option.split_calibrate else None
+        )
 
 
 class PytestSplitPlugin(Base):
     def __init__(self, config: "Config"):
+        start = time.time()
         super().__init__(config)
+        self.trace_plugin: PytestSplitTracePlugin | None = (
+            config.pluginmanager.get_plugin("pytestsplittraceplugin")
+        )
+        self._trace("load durations", start)
+
+        self.plan: dict[str, Any] = {}
+        self.plan_rootdir = ""
+        if config.option.split_plan:
+            self.plan, self.plan_rootdir = _load_plan(config)
+            (self.cached_durations, self.metadata), _ = durations.split_prefix(
+                self.cached_durations,
+                self.metadata,
+                plan.get_prefix(self.plan_rootdir),
+                plan.get_prefixes(self.plan),
+            )
+
+        # Families of the compact layout, expanded for the collected tests only
+        self.families: dict[str, dict[str, Any]] = self.metadata.get("families", {})
+        self.file_costs: dict[str, float] = self.metadata.get("file_costs", {})
+        self.variances: dict[str, float] = self.metadata.get("variances", {})
+
+        self.overruns: dict[str, dict[str, float]] = {}
+        # Expected durations of the tests by their stored durations, without those of the stragglers
+        self.stored_durations: dict[str, float] = {}
+        if config.option.split_overruns_path:
+            self.overruns = _load_overruns(config.option.split_overruns_path)
+
+        self.fail_fast = (
+            fail_fast.get_marker(config.option.split_fail_fast)
+            if config.option.split_fail_fast
+            else None
+        )
+        self.failure_published = False
+        self.fail_fast_unreadable = False
+        # When the fail-fast marker was checked last, None to check it after the next test
+        self.fail_fast_checked: float | None = None
 
-        if not self.cached_durations:
+        # Estimated and so far measured durations of the selected tests, tracked when reporting progress
+        self.estimated_durations: dict[str, float] = {}
+        self.actual_durations: dict[str, float] = {}
+        self.finished: list[str] = []
+        self.remaining_duration = 0.0
+        self.start = 0.0
+
+        if not self.cached_durations and not self.families:
             message = self.writer.markup(
                 "\n[pytest-split] No test durations found. Pytest-split will "
                 "split tests evenly when no durations are found. "
@@ -149,6 +605,68 @@ class PytestSplitPlugin(Base):
             )
             self.writer.line(message)
 
+        # With pytest-xdist, the controller compiles the files for all workers
+        if config.option.split_precompile and not hasattr(config, "workerinput"):
+            start = time.time()
+            self._precompile(config)
+            self._trace("precompile", start)
+
+    def _precompile(self, config: "Config") -> None:
+        """
+        Compile the test files and conftests which the group is expected to run, by the stored durations or the plan.
+        """
+        rewrite_asserts = config.getoption("assertmode") == "rewrite"
+        reason = None
+        if not precompile.SUPPORTED:
+            reason = f"pytest {pytest.__version__} is too old, it requires pytest 6.1 or newer"
+        elif sys.dont_write_bytecode:
+            reason = "writing bytecode is turned off"
+        elif rewrite_asserts and config.getini("enable_assertion_pass_hook"):
+            reason = "the assertion pass hook changes how pytest compiles test files"
+        if reason:
+            self.writer.line(
+                self.writer.markup(f"[pytest-split] Not precompiling, {reason}")
+            )
+            return
+
+        if config.option.split_plan:
+            nodeids = plan.get_nodeids(
+                self.plan, config.option.group, self.plan_rootdir
+            )
+        else:
+            nodeids = self._get_expected_nodeids(config)
+        paths = precompile.get_files(nodeids, str(config.rootpath))
+        result = precompile.precompile(paths, rewrite_asserts=rewrite_asserts)
+
+        message = (
+            f"[pytest-split] Precompiled {result.compiled} of {len(paths)} test files and conftests "
+            f"in {result.elapsed:.2f}s, saving about {max(result.serial - result.elapsed, 0):.2f}s "
+            f"of compiling during collection"
+        )
+        if result.fresh or result.failed:
+            message += f" ({result.fresh} up to date, {result.failed} failed)"
+        self.writer.line(self.writer.markup(message))
+
+    def _get_expected_nodeids(self, config: "Config") -> "list[str]":
+        """
+        Returns the stored tests which the group is expected to run, splitting them as if they were collected.
+        """
+        nodeids = [*self.cached_durations, *self.families]
+        if not config.option.splits:
+            return nodeids
+        algo = algorithms.Algorithms[config.option.splitting_algorithm].value
+        items = [plan.PlanItem(nodeid) for nodeid in nodeids]
+        groups = algo(
+            config.option.splits,
+            cast("list[nodes.Item]", items),
+            self.cached_durations,
+        )
+        return [
+            item.nodeid
+            for group_idx in config.option.group
+            for item in groups[group_idx - 1].selected
+        ]
+
     @hookimpl(trylast=True)
     def pytest_collection_modifyitems(
         self, config: "Config", items: "list[nodes.Item]"
@@ -156,27 +674,537 @@ class PytestSplitPlugin(Base):
         """
         Collect and select the tests we want to run, and deselect the rest.
         """
-        splits: int = config.option.splits
-        group_idx: int = config.option.group
+        start = time.time()
+        self._prepare_durations(config, items)
+        if config.option.split_time_budget:
+            group = self._select_within_budget(config, items)
+            self._trace("select within time budget", start)
+        elif config.option.split_plan:
+            group = self._select_planned(config, items)
+            self._trace("select planned tests", start)
+        else:
+            group = self._split(config, items)
+            self._trace("split", start)
 
-        algo = algorithms.Algorithms[config.option.splitting_algorithm].value
-        groups = algo(splits, items, self.cached_durations)
-        group = groups[group_idx - 1]
+        if config.option.split_order_fixtures:
+            start = time.time()
+            group = self._order_by_fixtures(group)
+            self._trace("order by fixtures", start)
 
-        ensure_ipynb_compatibility(group, items)
+        if (
+            config.option.split_progress
+            or config.option.split_overruns_path
+            or config.option.split_runner_record
+        ):
+            estimated_durations = dict(
+                algorithms.get_items_with_durations(items, self.cached_durations)
+            )
+            self.estimated_durations = {
+                item.nodeid: self._local(estimated_durations[item])
+                for item in group.selected
+            }
+            self.remaining_duration = sum(self.estimated_durations.values())
 
         items[:] = group.selected
         config.hook.pytest_deselected(items=group.deselected)
 
+    def _prepare_durations(self, config: "Config", items: "list[nodes.Item]") -> None:
+        """
+        Turn the stored durations into the expected durations of the collected tests.
+
+        They stay normalised to the reference machine with '--split-calibrate', so that groups running on machines
+        of different speed compute the same split. Only the estimates shown on this machine are scaled.
+        """
+        cached_durations = self.cached_durations
+        if self.families:
+            cached_durations = {
+                **durations.expand_families(
+                    self.families, (item.nodeid for item in items)
+                ),
+                **cached_durations,
+            }
+        if config.option.durations_key:
+            cached_durations = durations.keyed_durations(
+                cached_durations, self.metadata, config.option.durations_key
+            )
+        cached_durations = durations.expected_costs(cached_durations, self.metadata)
+        # A straggler keeps its measured duration until storing the durations updated its stored one
+        self.overruns = {
+            nodeid: overrun
+            for nodeid, overrun in self.overruns.items()
+            if nodeid not in cached_durations
+            or overrun.get("stored") == cached_durations[nodeid]
+        }
+        self.stored_durations = cached_durations
+        if self.overruns:
+            cached_durations = {
+                **cached_durations,
+                **{
+                    nodeid: overrun["actual"]
+                    for nodeid, overrun in self.overruns.items()
+                },
+            }
+        self.cached_durations = cached_durations
+
+    def _local(self, duration: float) -> float:
+        """
+        Convert a stored duration to the expected duration on this machine, see ``pytest_split.calibration``.
+        """
+        return duration / self.speed if self.speed else duration
+
+    def _stored(self, duration: float) -> float:
+        """
+        Convert a duration measured on this machine to a stored duration.
+        """
+        return duration * self.speed if self.speed else duration
+
+    def _trace(self, name: str, start: float) -> None:
+        if self.trace_plugin is not None:
+            self.trace_plugin.tracer.span(name, "pytest-split", start, time.time())
+
+    def _split(
+        self, config: "Config", items: "list[nodes.Item]"
+    ) -> "algorithms.TestGroup":
+        """
+        Split the tests into groups and return the selected groups, merged into one.
+        """
+        splits: int = config.option.splits
+        group_indexes: list[int] = config.option.group
+
         self.writer.line(
             self.writer.markup(
                 f"\n\n[pytest-split] Splitting tests with algorithm: {config.option.splitting_algorithm}"
             )
         )
+
+        candidates = items
+        if config.option.split_failed:
+            candidates, splits = self._get_failed_items(config, items)
+
+        algo = algorithms.Algorithms[config.option.splitting_algorithm].value
+        kwargs: dict[str, Any] = {
+            "file_costs": self.file_costs if config.option.split_file_costs else None
+        }
+        if isinstance(algo, algorithms.LeastTailDurationAlgorithm):
+            kwargs["variances"] = self.variances
+        if config.option.group_capabilities:
+            kwargs["eligible_groups"] = _get_eligible_groups(
+                splits, candidates, config.option.group_capabilities
+            )
+        if config.option.split_runner_history:
+            kwargs["group_weights"] = self._get_group_weights(config, splits)
+        groups = algo(max(splits, 1), candidates, self.cached_durations, **kwargs)
+        # Groups beyond the ones needed to rerun the failed tests run nothing
+        selected_groups = [
+            groups[group_idx - 1]
+            if group_idx <= splits
+            else algorithms.TestGroup(selected=[], deselected=[], duration=0)
+            for group_idx in group_indexes
+        ]
+
+        for group in selected_groups:
+            ensure_ipynb_compatibility(group, candidates)
+        group = _merge_groups(selected_groups, items)
+        if candidates is not items:
+            selected = set(group.selected)
+            group = algorithms.TestGroup(
+                selected=group.selected,
+                deselected=[item for item in items if item not in selected],
+                duration=group.duration,
+            )
+
+        self._write_split_summary(config, splits, selected_groups, group)
+        return group
+
+    def _get_group_weights(self, config: "Config", splits: int) -> "list[float]":
+        """
+        Returns the expected slowness of the runners of the groups, see ``pytest_split.runners``.
+        """
+        history = runners.load(config.option.split_runner_history)
+        weights = runners.get_group_weights(history, splits)
+        if any(weight != weights[0] for weight in weights):
+            self.writer.line(
+                self.writer.markup(
+                    "[pytest-split] Weighting the groups by the slowness of their runners: "
+                    + ", ".join(f"{weight:.2f}" for weight in weights)
+                )
+            )
+        return weights
+
+    def _get_failed_items(
+        self, config: "Config", items: "list[nodes.Item]"
+    ) -> "tuple[list[nodes.Item], int]":
+        """
+        Returns the tests which failed in the last run and how many groups to split them into.
+        """
+        if config.option.split_failed_from:
+            failed = rerun.load_failed(config.option.split_failed_from)
+        else:
+            cache = getattr(config, "cache", None)
+            failed = (
+                list(cache.get("cache/lastfailed", {})) if cache is not None else []
+            )
+
+        failed_ids = set(failed)
+        candidates = [item for item in items if item.nodeid in failed_ids]
+        splits = rerun.count_groups(
+            [item.nodeid for item in candidates],
+            self.cached_durations,
+            config.option.split_target_duration,
+            max_groups=config.option.splits,
+        )
+        self.writer.line(
+            self.writer.markup(
+                f"[pytest-split] Rerunning {len(candidates)} failed tests in {splits} of "
+                f"{config.option.splits} groups"
+            )
+        )
+        return candidates, splits
+
+    def _write_split_summary(
+        self,
+        config: "Config",
+        splits: int,
+        selected_groups: "list[algorithms.TestGroup]",
+        group: "algorithms.TestGroup",
+    ) -> None:
+        group_indexes: list[int] = config.option.group
+        if len(group_indexes) == 1 and group_indexes[0] > splits:
+            self.writer.line(
+                self.writer.markup(
+                    f"[pytest-split] No failed tests to rerun in group {group_indexes[0]}\n"
+                )
+            )
+            return
+        if len(group_indexes) == 1:
+            self.writer.line(
+                self.writer.markup(
+                    f"[pytest-split] Running group {group_indexes[0]}/{splits} (estimated duration: {self._local(group.duration):.2f}s)\n"
+                )
+            )
+            return
+
+        self.writer.line(
+            self.writer.markup(
+                f"[pytest-split] Running groups {','.join(map(str, group_indexes))}/{splits} "
+                f"(estimated duration: {self._local(group.duration):.2f}s)"
+            )
+        )
+        for group_idx, selected_group in zip(
+            group_indexes, selected_groups, strict=True
+        ):
+            self.writer.line(
+                self.writer.markup(
+                    f"[pytest-split]   group {group_idx}: estimated duration {self._local(selected_group.duration):.2f}s"
+                )
+            )
+        self.writer.line()
+
+    def _order_by_fixtures(
+        self, group: "algorithms.TestGroup"
+    ) -> "algorithms.TestGroup":
+        """
+        Reorder the selected tests to reuse higher-scoped fixtures.
+        """
+        selected, before, after = ordering.order_by_fixtures(group.selected)
+        if after < before:
+            message = (
+                f"[pytest-split] Reordered tests to share fixtures, "
+                f"saving {before - after} of {before} setups of higher-scoped fixtures"
+            )
+        else:
+            message = "[pytest-split] Kept the order of tests, reordering would not save any fixture setups"
+        self.writer.line(self.writer.markup(message))
+        return algorithms.TestGroup(
+            selected=selected, deselected=group.deselected, duration=group.duration
+        )
+
+    def _select_planned(
+        self, config: "Config", items: "list[nodes.Item]"
+    ) -> "algorithms.TestGroup":
+        """
+        Select the tests which the plan assigns to the root directory of this run in the selected groups.
+        """
+        group_indexes: list[int] = config.option.group
+        nodeids = set(plan.get_nodeids(self.plan, group_indexes, self.plan_rootdir))
+        selected = [item for item in items if item.nodeid in nodeids]
+        deselected = [item for item in items if item.nodeid not in nodeids]
+        duration = sum(algorithms.get_durations(selected, self.cached_durations))
+
+        self.writer.line(
+            self.writer.markup(
+                f"\n\n[pytest-split] Running {len(selected)} tests of {self.plan_rootdir} in group "
+                f"{','.join(map(str, group_indexes))}/{self.plan['splits']} of the plan "
+                f"(estimated duration: {self._local(duration):.2f}s)"
+            )
+        )
+        if len(selected) < len(nodeids):
+            self.writer.line(
+                self.writer.markup(
+                    f"[pytest-split] {len(nodeids) - len(selected)} planned tests were not collected"
+                )
+            )
+        self.writer.line()
+        return algorithms.TestGroup(
+            selected=selected, deselected=deselected, duration=duration
+        )
+
+    def _select_within_budget(
+        self, config: "Config", items: "list[nodes.Item]"
+    ) -> "algorithms.TestGroup":
+        """
+        Select the most valuable tests which fit in the time budget.
+        """
+        time_budget: float = config.option.split_time_budget
+        cache = getattr(config, "cache", None)
+        failed = cache.get("cache/lastfailed", {}) if cache is not None else {}
+        changed_files: list[str] = []
+        if config.option.split_changed_files:
+            with open(config.option.split_changed_files) as f:
+                changed_files = f.read().splitlines()
+
+        group = budget.select_within_budget(
+            items,
+            self.cached_durations,
+            self._stored(time_budget),
+            failed=failed,
+            changed_files=changed_files,
+        )
+
         self.writer.line(
             self.writer.markup(
-                f"[pytest-split] Running group {group_idx}/{splits} (estimated duration: {group.duration:.2f}s)\n"
+                f"\n\n[pytest-split] Running {len(group.selected)} of {len(items)} tests "
+                f"within the time budget of {time_budget:.2f}s (estimated duration: {self._local(group.duration):.2f}s)"
+            )
+        )
+        if group.deselected:
+            self._write_deselected_by_file(group.deselected)
+        self.writer.line()
+        return group
+
+    def _write_deselected_by_file(self, deselected: "list[nodes.Item]") -> None:
+        by_file: dict[str, list[float]] = {}
+        for item, duration in algorithms.get_items_with_durations(
+            deselected, self.cached_durations
+        ):
+            fpath = algorithms.get_file(item.nodeid)
+            by_file.setdefault(fpath, []).append(self._local(duration))
+
+        self.writer.line(
+            f"[pytest-split] Deselected {len(deselected)} tests "
+            f"(estimated duration: {sum(map(sum, by_file.values())):.2f}s):"
+        )
+        files = sorted(by_file.items(), key=lambda row: (-sum(row[1]), row[0]))
+        for fpath, file_durations in files[:BUDGET_REPORT_FILES]:
+            self.writer.line(
+                f"[pytest-split]   {fpath}: {len(file_durations)} tests ({sum(file_durations):.2f}s)"
+            )
+        if len(files) > BUDGET_REPORT_FILES:
+            self.writer.line(
+                f"[pytest-split]   and {len(files) - BUDGET_REPORT_FILES} more files"
+            )
+
+    def pytest_runtest_logreport(self, report: "TestReport") -> None:
+        """
+        Track the progress of the selected tests against their estimated durations.
+
+        The first failure is published to the fail-fast marker.
+        """
+        if report.failed and self.fail_fast is not None:
+            self._publish_failure(report)
+
+        estimated = self.estimated_durations.get(report.nodeid)
+        if estimated is None:
+            return
+
+        if not self.start:
+            self.start = time.perf_counter()
+        actual = self.actual_durations.get(report.nodeid, 0) + report.duration
+        self.actual_durations[report.nodeid] = actual
+        if report.when != "teardown":
+            return
+
+        self.finished.append(report.nodeid)
+        self.remaining_duration -= estimated
+
+        if (
+            report.nodeid in self.stored_durations
+            and actual > estimated * self.config.option.split_overrun_factor
+            and actual - estimated >= OVERRUN_MIN_SECONDS
+        ):
+            # Stored like the durations, so that all groups split with the same durations
+            self.overruns[report.nodeid] = {
+                "estimated": self._stored(estimated),
+                "actual": self._stored(actual),
+                "stored": self.stored_durations[report.nodeid],
+            }
+            self._write_progress(
+                f"[pytest-split] Straggler: {report.nodeid} took {actual:.2f}s, "
+                f"{actual / estimated:.1f}x its estimated duration of {estimated:.2f}s"
+            )
+
+        self._write_progress(
+            f"[pytest-split] {len(self.finished)}/{len(self.estimated_durations)} tests finished "
+            f"in {time.perf_counter() - self.start:.2f}s, "
+            f"estimated {max(self.remaining_duration, 0):.2f}s remaining"
+        )
+
+    def _publish_failure(self, report: "TestReport") -> None:
+        if self.failure_published or self.fail_fast is None:
+            return
+        self.failure_published = True
+        self.fail_fast_checked = None
+
+        splits = self.config.option.splits
+        groups = self.config.option.group
+        failure = {
+            "nodeid": report.nodeid,
+            "group": f"group {','.join(map(str, groups))}/{splits}"
+            if splits and groups
+            else "another run",
+        }
+        try:
+            self.fail_fast.publish(failure)
+        except fail_fast.MARKER_ERRORS as e:
+            self._write_line(f"[pytest-split] Could not publish the failure: {e}")
+
+    @hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(
+        self, item: "nodes.Item"
+    ) -> "Generator[None, None, None]":
+        """
+        Stop the session after the test if a test failed in any group, according to the fail-fast marker.
+        """
+        yield
+        if self.fail_fast is None or item.session.shouldstop:
+            return
+        now = time.monotonic()
+        if (
+            self.fail_fast_checked is not None
+            and now - self.fail_fast_checked < fail_fast.CHECK_INTERVAL
+        ):
+            return
+        self.fail_fast_checked = now
+
+        try:
+            failure = self.fail_fast.read()
+        except fail_fast.MARKER_ERRORS as e:
+            # Reported once, the marker is checked again after every interval
+            if not self.fail_fast_unreadable:
+                self.fail_fast_unreadable = True
+                self._write_line(f"[pytest-split] Could not check for failures: {e}")
+            return
+        if failure is not None:
+            item.session.shouldstop = f"pytest-split: {failure.get('nodeid')} failed in {failure.get('group')}"
+
+    def _write_progress(self, line: str) -> None:
+        if self.config.option.split_progress:
+            self._write_line(line)
+
+    def _write_line(self, line: str) -> None:
+        terminal_reporter = self.config.pluginmanager.get_plugin("terminalreporter")
+        if terminal_reporter is not None:
+            terminal_reporter.write_line(line)
+
+    def pytest_sessionfinish(self) -> None:
+        """
+        Write the stragglers of the run to '--split-overruns-path' and record the speed of the runner.
+        """
+        # With pytest-xdist, only the controller sees the reports of all workers
+        if (
+            self.config.option.split_runner_record
+            and self.config.option.splits
+            and not hasattr(self.config, "workerinput")
+        ):
+            self._record_runner()
+
+        overruns_path = self.config.option.split_overruns_path
+        if not overruns_path:
+            return
+
+        with open(overruns_path, "w") as f:
+            json.dump(self.overruns, f, sort_keys=True, indent=4)
+
+        stragglers = [nodeid for nodeid in self.finished if nodeid in self.overruns]
+        self.writer.line(
+            f"\n[pytest-split] Wrote {len(stragglers)} stragglers to {overruns_path}"
+        )
+
+    def _record_runner(self) -> None:
+        """
+        Record how long the tests took on this runner compared to their estimated durations.
+        """
+        env = self.config.option.split_runner_env
+        runner = os.environ.get(env)
+        if not runner:
+            self.writer.line(
+                f"\n[pytest-split] Not recording the speed of the runner, ${env} is not set"
             )
+            return
+        estimated = sum(self.estimated_durations[nodeid] for nodeid in self.finished)
+        actual = sum(self.actual_durations[nodeid] for nodeid in self.finished)
+        if estimated < runners.MIN_ESTIMATED_SECONDS:
+            self.writer.line(
+                f"\n[pytest-split] Not recording the speed of runner {runner}, "
+                f"the tests were estimated to take only {estimated:.2f}s"
+            )
+            return
+
+        path = self.config.option.split_runner_record
+        # Only the run of this group, the history which the groups split with is left unchanged
+        record: dict[str, Any] = {}
+        runners.record(
+            record,
+            runner,
+            self.config.option.splits,
+            self.config.option.group,
+            estimated,
+            actual,
+        )
+        runners.dump(path, record)
+        self.writer.line(
+            f"\n[pytest-split] Recorded runner {runner}: the tests took {actual:.2f}s, "
+            f"{actual / estimated:.2f}x their estimated duration of {estimated:.2f}s"
+        )
+
+
+class PytestSplitTracePlugin:
+    def __init__(self, config: "Config") -> None:
+        self.config = config
+        self.writer = create_terminal_writer(self.config)
+        splits = config.option.splits
+        groups = config.option.group
+        if splits and groups:
+            self.tracer = trace.Tracer(
+                groups[0], f"group {','.join(map(str, groups))}/{splits}"
+            )
+        else:
+            self.tracer = trace.Tracer(1, "pytest")
+        self.start = time.time()
+
+    def pytest_runtest_logreport(self, report: "TestReport") -> None:
+        """
+        Add a span for the phase of the test.
+        """
+        if not report.start:
+            return
+        self.tracer.span(
+            report.nodeid,
+            report.when or "",
+            report.start,
+            report.stop,
+            thread=_get_worker(report),
+            args={"phase": report.when, "outcome": report.outcome},
+        )
+
+    def pytest_sessionfinish(self) -> None:
+        """
+        Write the trace of the session.
+        """
+        self.tracer.span("session", "pytest", self.start, time.time())
+        trace.dump(self.config.option.split_trace, self.tracer.to_json())
+        self.writer.line(
+            f"\n[pytest-split] Wrote trace to {self.config.option.split_trace}"
         )
 
 
@@ -185,11 +1213,181 @@ class PytestSplitCachePlugin(Base):
     The cache plugin writes durations to our durations file.
     """
 
+    def __init__(self, config: "Config"):
+        super().__init__(config)
+        # A file in the compact layout stays compact, like with 'import-junit'
+        self.compact = config.option.split_compact_durations or bool(
+            self.metadata.get("families")
+        )
+        self.cached_durations = durations.expand(self.cached_durations, self.metadata)
+        # Durations and metadata of the other root directories of a plan, which share the durations store
+        self.plan_prefix = ""
+        self.other_roots: tuple[dict[str, float], dict[str, Any]] = ({}, {})
+        if config.option.split_plan:
+            split_plan, plan_rootdir = _load_plan(config)
+            self.plan_prefix = plan.get_prefix(plan_rootdir)
+            (self.cached_durations, self.metadata), self.other_roots = (
+                durations.split_prefix(
+                    self.cached_durations,
+                    self.metadata,
+                    self.plan_prefix,
+                    plan.get_prefixes(split_plan),
+                )
+            )
+        self.collected_nodeids: set[str] = set()
+        self.file_costs: dict[str, float] = {}
+
+    @hookimpl(hookwrapper=True)
+    def pytest_make_collect_report(
+        self, collector: "nodes.Collector"
+    ) -> "Generator[None, None, None]":
+        """
+        Measure how long collecting each test file takes, which includes importing it.
+        """
+        if not self.config.option.split_file_costs or not isinstance(
+            collector, pytest.File
+        ):
+            yield
+            return
+
+        start = time.perf_counter()
+        yield
+        self.file_costs[collector.nodeid] = time.perf_counter() - start
+
+    @hookimpl(tryfirst=True)
+    def pytest_collection_modifyitems(self, items: "list[nodes.Item]") -> None:
+        """
+        Remember every collected test before any of them get deselected.
+        """
+        self.collected_nodeids.update(item.nodeid for item in items)
+
     def pytest_sessionfinish(self) -> None:
         """
         Method is called by Pytest after the test-suite has run.
         https://github.com/pytest-dev/pytest/blob/main/src/_pytest/main.py#L308
         """
+        test_durations = self._get_test_durations()
+        outcomes = self._get_outcomes()
+        attempts = self._get_attempts(test_durations)
+        durations.record_attempts(
+            self.metadata,
+            attempts,
+            [
+                name
+                for name, outcome in outcomes.items()
+                if outcome in ("failed", "error")
+            ],
+        )
+        # Store the duration of a single attempt, splitting multiplies it by the expected number of attempts
+        test_durations = {
+            name: duration / attempts[name] for name, duration in test_durations.items()
+        }
+        if self.speed:
+            test_durations = self._normalise(test_durations)
+        if self.config.option.split_variances:
+            durations.record_variances(
+                self.metadata, self.cached_durations, test_durations, outcomes
+            )
+        counts = self._update_cached_durations(test_durations, outcomes)
+
+        pruned: list[str] = []
+        if self.config.option.prune_durations_after is not None:
+            pruned = durations.prune(
+                self.cached_durations,
+                self.metadata,
+                self.collected_nodeids | test_durations.keys(),
+                self.config.option.prune_durations_after,
+            )
+
+        stored, metadata = self.cached_durations, self.metadata
+        if self.config.option.split_plan:
+            stored, metadata = durations.join_prefix(
+                stored, metadata, *self.other_roots, self.plan_prefix
+            )
+        if self.compact:
+            stored = durations.compact(stored, metadata)
+        try:
+            durations.dump(self.backend, stored, metadata)
+        except (backends.RemoteError, OSError) as e:
+            self.writer.line(
+                self.writer.markup(
+                    f"\n\n[pytest-split] Could not store the test durations in "
+                    f"{self.config.option.durations_path}: {e}"
+                )
+            )
+            return
+
+        message = self.writer.markup(
+            f"\n\n[pytest-split] Stored test durations in {self.config.option.durations_path}"
+        )
+        self.writer.line(message)
+        self.writer.line(
+            f"[pytest-split] Updated {counts['updated']} durations, "
+            f"kept {counts['kept']} and ignored {counts['ignored']} of skipped or errored tests"
+        )
+        if self.speed:
+            self.writer.line(
+                f"[pytest-split] Durations normalised with the speed factor {self.speed:.2f} of this machine"
+            )
+        if pruned:
+            self.writer.line(
+                f"[pytest-split] Removed durations of {len(pruned)} tests not collected in the last "
+                f"{self.config.option.prune_durations_after} runs"
+            )
+
+    def _normalise(self, test_durations: "dict[str, float]") -> "dict[str, float]":
+        """
+        Convert durations measured on this machine to the reference machine, see ``pytest_split.calibration``.
+        """
+        assert self.speed
+        self.file_costs = {
+            fpath: cost * self.speed for fpath, cost in self.file_costs.items()
+        }
+        speeds = [*self.metadata.get("speeds", []), round(self.speed, 4)]
+        self.metadata["speeds"] = speeds[-MAX_STORED_SPEEDS:]
+        return {
+            name: duration * self.speed for name, duration in test_durations.items()
+        }
+
+    def _get_attempts(self, test_durations: "dict[str, float]") -> "dict[str, int]":
+        """
+        Count how many times each test ran, reruns by e.g. pytest-rerunfailures included.
+        """
+        terminal_reporter = self.config.pluginmanager.get_plugin("terminalreporter")
+        attempts = dict.fromkeys(test_durations, 1)
+        for test_report in terminal_reporter.stats.get("rerun", []):  # type: ignore[union-attr]
+            if isinstance(test_report, TestReport):
+                attempts[test_report.nodeid] = attempts.get(test_report.nodeid, 1) + 1
+        return attempts
+
+    def _get_outcomes(self) -> "dict[str, str]":
+        """
+        Returns the final outcome of each test, one of the keys of ``durations.OUTCOME_WEIGHTS``.
+
+        A test whose setup passed but which has no report of its call phase was interrupted.
+        """
+        terminal_reporter = self.config.pluginmanager.get_plugin("terminalreporter")
+        outcomes: dict[str, str] = {}
+        for category, test_reports in terminal_reporter.stats.items():  # type: ignore[union-attr]
+            if category == "rerun":
+                continue
+            for test_report in test_reports:
+                if not isinstance(test_report, TestReport):
+                    continue
+                if test_report.when == "call":
+                    outcomes[test_report.nodeid] = _get_call_outcome(test_report)
+                elif test_report.when == "setup" and test_report.passed:
+                    outcomes.setdefault(test_report.nodeid, "error")
+                elif test_report.when == "setup":
+                    outcomes[test_report.nodeid] = (
+                        "skipped" if test_report.skipped else "error"
+                    )
+        return outcomes
+
+    def _get_test_durations(self) -> "dict[str, float]":
+        """
+        Sum up the durations of each test from the reports of this run.
+        """
         terminal_reporter = self.config.pluginmanager.get_plugin("terminalreporter")
         test_durations: dict[str, float] = {}
 
@@ -211,17 +1409,139 @@ class PytestSplitCachePlugin(Base):
                     if test_report.nodeid not in test_durations:
                         test_durations[test_report.nodeid] = 0
                     test_durations[test_report.nodeid] += test_report.duration
+        return test_durations
 
+    def _update_cached_durations(
+        self, test_durations: "dict[str, float]", outcomes: "dict[str, str]"
+    ) -> "dict[str, int]":
+        """
+        Record the durations of this run, weighted by the outcome of each test.
+
+        :return: How many durations were updated, kept and ignored.
+        """
+        recorded, counts = durations.weigh_by_outcome(
+            test_durations, self.cached_durations, outcomes
+        )
         if self.config.option.clean_durations:
-            self.cached_durations = dict(test_durations)
+            self.cached_durations = recorded
         else:
-            for k, v in test_durations.items():
+            for k, v in recorded.items():
                 self.cached_durations[k] = v
 
-        with open(self.config.option.durations_path, "w") as f:
-            json.dump(self.cached_durations, f, sort_keys=True, indent=4)
+        durations_key = self.config.option.durations_key
+        if durations_key:
+            keys = self.metadata.setdefault("keys", {})
+            recorded, _ = durations.weigh_by_outcome(
+                test_durations, keys.get(durations_key, {}), outcomes
+            )
+            if self.config.option.clean_durations:
+                keys[durations_key] = recorded
+            else:
+                keys.setdefault(durations_key, {}).update(recorded)
 
-        message = self.writer.markup(
-            f"\n\n[pytest-split] Stored test durations in {self.config.option.durations_path}"
-        )
-        self.writer.line(message)
+        if self.config.option.clean_durations:
+            for section in ("reruns", "variances"):
+                if section in self.metadata:
+                    self.metadata[section] = {
+                        name: value
+                        for name, value in self.metadata[section].items()
+                        if name in test_durations
+                    }
+
+        if self.config.option.split_file_costs:
+            if self.config.option.clean_durations:
+                self.metadata["file_costs"] = dict(self.file_costs)
+            else:
+                self.metadata.setdefault("file_costs", {}).update(self.file_costs)
+        return counts
+
+
+def _load_plan(config: "Config") -> "tuple[dict[str, Any], str]":
+    """
+    Load the plan and find the root directory of this run in it, both validated in ``pytest_cmdline_main``.
+    """
+    split_plan = plan.load(config.option.split_plan)
+    rootdir = plan.get_rootdir(split_plan, config.option.split_plan, config.rootpath)
+    assert rootdir is not None
+    return split_plan, rootdir
+
+
+def _get_worker(report: "TestReport") -> str:
+    """
+    Returns the id of the pytest-xdist worker which ran the test, e.g. 'gw0'.
+    """
+    gateway = getattr(getattr(report, "node", None), "gateway", None)
+    return str(getattr(gateway, "id", trace.MAIN_THREAD))
+
+
+def _get_call_outcome(report: "TestReport") -> str:
+    if report.skipped:
+        return "xfailed" if hasattr(report, "wasxfail") else "skipped"
+    return "failed" if report.failed else "passed"
+
+
+def _get_cache_dir(config: "Config") -> str:
+    """
+    Returns the directory in which remote durations are cached, pytest's cache directory if it's enabled.
+    """
+    cache = getattr(config, "cache", None)
+    if cache is None:
+        return tempfile.gettempdir()
+    return str(cache.mkdir("pytest-split"))
+
+
+def _get_eligible_groups(
+    splits: int,
+    items: "list[nodes.Item]",
+    group_capabilities: "list[tuple[int, list[str]]]",
+) -> "dict[str, list[int]]":
+    """
+    Returns the indexes of the groups which can run each test that requires capabilities.
+    """
+    capabilities: list[set[str]] = [set() for _ in range(splits)]
+    for g, names in group_capabilities:
+        capabilities[g - 1].update(names)
+
+    eligible_groups: dict[str, list[int]] = {}
+    for item in items:
+        required = {
+            name
+            for marker in item.iter_markers("requires_capability")
+            for name in marker.args
+        }
+        if not required:
+            continue
+        eligible = [i for i in range(splits) if required <= capabilities[i]]
+        if not eligible:
+            raise pytest.UsageError(
+                f"No group has the capabilities {', '.join(sorted(required))} "
+                f"required by {item.nodeid}"
+            )
+        eligible_groups[item.nodeid] = eligible
+    return eligible_groups
+
+
+def _load_overruns(path: str) -> "dict[str, dict[str, float]]":
+    try:
+        with open(path) as f:
+            overruns: dict[str, dict[str, float]] = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return overruns
+
+
+def _merge_groups(
+    groups: "list[algorithms.TestGroup]", items: "list[nodes.Item]"
+) -> "algorithms.TestGroup":
+    """
+    Returns the union of the groups, with the selected items in collection order.
+    """
+    if len(groups) == 1:
+        return groups[0]
+
+    selected = {item for group in groups for item in group.selected}
+    return algorithms.TestGroup(
+        selected=[item for item in items if item in selected],
+        deselected=[item for item in items if item not in selected],
+        duration=sum(group.duration for group in groups),
+    )
@@ -0,0 +1,174 @@
+"""
+Compiling the test files of a group to bytecode in parallel before collection.
+
+Importing a test file during collection compiles it unless an up-to-date ``.pyc`` exists, which in a fresh CI
+container is never the case. Test files and conftests are compiled with their asserts rewritten by pytest and cached
+under pytest's own ``.pyc`` name, so that is what is written for them unless assertion rewriting is turned off.
+"""
+
+import ast
+import functools
+import importlib.util
+import marshal
+import os
+import posixpath
+import py_compile
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from _pytest.assertion import rewrite
+from _pytest.config import Config
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Header of a .pyc file: magic number, flags, mtime and size of the source
+_HEADER = struct.Struct("<4sLLL")
+
+# Whether pytest has the internals of its assertion rewriting which compiling like it needs, and the root path of
+# the config, older versions than pytest 6.1 don't have all of them
+SUPPORTED = all(
+    hasattr(rewrite, name) for name in ("rewrite_asserts", "get_cache_dir", "PYC_TAIL")
+) and hasattr(Config, "rootpath")
+
+
+class Result(NamedTuple):
+    compiled: int
+    fresh: int
+    failed: int
+    # How long compiling took, and how long compiling one file after another would have taken
+    elapsed: float
+    serial: float
+
+
+def get_files(nodeids: "Iterable[str]", rootdir: str) -> "list[str]":
+    """
+    Returns the paths of the Python test files of the tests and of the conftests in the directories above them.
+
+    :param nodeids: Node ids of the tests, or anything else starting with the path of a test file.
+    :param rootdir: Root directory of the node ids.
+    """
+    test_files = {nodeid.split("::", 1)[0] for nodeid in nodeids}
+    files: set[str] = set()
+    for test_file in test_files:
+        if not test_file.endswith(".py"):
+            continue
+        files.add(test_file)
+        directory = posixpath.dirname(test_file)
+        while True:
+            files.add(posixpath.join(directory, "conftest.py"))
+            if not directory:
+                break
+            directory = posixpath.dirname(directory)
+    paths = (os.path.join(rootdir, *fpath.split("/")) for fpath in sorted(files))
+    return [path for path in paths if os.path.isfile(path)]
+
+
+def precompile(
+    paths: "list[str]", *, rewrite_asserts: bool = True, workers: "int | None" = None
+) -> Result:
+    """
+    Compile the files in a process pool, skipping those whose bytecode is up to date.
+
+    :param paths: Paths of the files.
+    :param rewrite_asserts: Whether to rewrite the asserts like pytest does, as it does for test files and conftests.
+    :param workers: How many processes to use, the number of CPUs by default.
+    """
+    start = time.perf_counter()
+    stale = [
+        path for path in paths if not _is_fresh(path, rewrite_asserts=rewrite_asserts)
+    ]
+    timings: list[float | None] = []
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            timings = list(
+                executor.map(
+                    functools.partial(_compile, rewrite_asserts=rewrite_asserts),
+                    stale,
+                    chunksize=max(
+                        len(stale) // (4 * (workers or os.cpu_count() or 1)), 1
+                    ),
+                )
+            )
+    compiled = [timing for timing in timings if timing is not None]
+    return Result(
+        compiled=len(compiled),
+        fresh=len(paths) - len(stale),
+        failed=len(timings) - len(compiled),
+        elapsed=time.perf_counter() - start,
+        serial=sum(compiled),
+    )
+
+
+def _compile(path: str, *, rewrite_asserts: bool) -> "float | None":
+    """
+    Compile a file and return how long that took, None if it couldn't be compiled.
+    """
+    start = time.perf_counter()
+    try:
+        if rewrite_asserts:
+            _write_rewritten_pyc(path)
+        else:
+            py_compile.compile(path, doraise=True)
+    except (OSError, SyntaxError, ValueError, py_compile.PyCompileError):
+        return None
+    return time.perf_counter() - start
+
+
+def _write_rewritten_pyc(path: str) -> None:
+    """
+    Write the ``.pyc`` which pytest writes when it imports a test file, see ``_pytest.assertion.rewrite``.
+    """
+    fn = Path(path)
+    source_stat = os.stat(fn)
+    source = fn.read_bytes()
+    tree = ast.parse(source, filename=path)
+    rewrite.rewrite_asserts(tree, source, path)
+    co = compile(tree, path, "exec", dont_inherit=True)
+
+    pyc = _get_pyc(path, rewrite_asserts=True)
+    os.makedirs(os.path.dirname(pyc), exist_ok=True)
+    # Written to a separate file first, so pytest never reads a partly written one
+    proc_pyc = f"{pyc}.{os.getpid()}"
+    with open(proc_pyc, "wb") as f:
+        f.write(
+            _HEADER.pack(
+                importlib.util.MAGIC_NUMBER,
+                0,
+                int(source_stat.st_mtime) & 0xFFFFFFFF,
+                source_stat.st_size & 0xFFFFFFFF,
+            )
+        )
+        f.write(marshal.dumps(co))
+    os.replace(proc_pyc, pyc)
+
+
+def _is_fresh(path: str, *, rewrite_asserts: bool) -> bool:
+    """
+    Whether the ``.pyc`` of a file matches its source, like Python and pytest check it.
+    """
+    try:
+        source_stat = os.stat(path)
+        with open(_get_pyc(path, rewrite_asserts=rewrite_asserts), "rb") as f:
+            header = f.read(_HEADER.size)
+    except OSError:
+        return False
+    if len(header) != _HEADER.size:
+        return False
+    magic, flags, mtime, size = _HEADER.unpack(header)
+    return bool(
+        magic == importlib.util.MAGIC_NUMBER
+        and flags == 0
+        and mtime == int(source_stat.st_mtime) & 0xFFFFFFFF
+        and size == source_stat.st_size & 0xFFFFFFFF
+    )
+
+
+def _get_pyc(path: str, *, rewrite_asserts: bool) -> str:
+    if not rewrite_asserts:
+        return importlib.util.cache_from_source(path)
+    fn = Path(path)
+    return str(rewrite.get_cache_dir(fn) / (fn.name[:-3] + rewrite.PYC_TAIL))
@@ -0,0 +1,69 @@
+"""
+Rerunning only the tests which failed, spread across fewer groups.
+
+After a failed run of a split suite, every group only knows its own failures. The failed node ids of all groups
+are gathered from their ``lastfailed`` files in pytest's cache (``.pytest_cache/v/cache/lastfailed``), or from
+text files with one node id per line, and split into as many groups as it takes for each of them to run for
+about the target duration.
+"""
+
+import json
+import math
+from typing import TYPE_CHECKING
+
+from pytest_split import algorithms
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# How long each group of a rerun should take, in seconds
+TARGET_DURATION = 300.0
+
+
+def load_failed(paths: "Iterable[str]") -> "list[str]":
+    """
+    Returns the failed node ids in the given files, in the order in which they first appear.
+
+    :param paths: Paths of ``lastfailed`` files or of text files with one node id per line.
+    """
+    failed: dict[str, None] = {}
+    for path in paths:
+        with open(path) as f:
+            content = f.read()
+        try:
+            lastfailed = json.loads(content)
+        except ValueError:
+            lastfailed = None
+        if isinstance(lastfailed, dict):
+            nodeids = [nodeid for nodeid, value in lastfailed.items() if value]
+        else:
+            nodeids = [line.strip() for line in content.splitlines() if line.strip()]
+        failed.update(dict.fromkeys(nodeids))
+    return list(failed)
+
+
+def count_groups(
+    failed: "list[str]",
+    durations: "dict[str, float]",
+    target_duration: float = TARGET_DURATION,
+    max_groups: "int | None" = None,
+) -> int:
+    """
+    Returns how many groups the failed tests should be split into.
+
+    :param failed: Node ids of the failed tests.
+    :param durations: Our cached test runtimes, tests without one take the average duration of the failed tests.
+    :param target_duration: How long each group should take.
+    :param max_groups: The most groups to use, e.g. the number of groups of the failed run.
+    :return: The number of groups, 0 if no test failed.
+    """
+    if not failed:
+        return 0
+    known = {name: durations[name] for name in failed if name in durations}
+    avg_duration_per_test = algorithms.get_avg_duration_per_test(known)
+    total = sum(known.get(name, avg_duration_per_test) for name in failed)
+
+    groups = min(max(math.ceil(total / target_duration), 1), len(failed))
+    if max_groups is not None:
+        groups = min(groups, max_groups)
+    return groups
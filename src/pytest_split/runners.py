@@ -0,0 +1,119 @@
+"""
+Learned speed of the runners which run the groups of a split.
+
+Even runners of the same kind aren't equally fast. Each run records, under the id of its runner, how long its tests
+took compared to their estimated durations, and which groups it ran. When splitting, the groups which last ran on a
+runner that has been slower than estimated get less work, assuming that they land on the same runner again, as they
+do e.g. with self-hosted runners assigned by the index of a CI job matrix.
+
+All groups of a pipeline split with the same history, which they only read. Each group writes the record of its run
+to a file of its own, and ``pytest-split merge-runner-history`` merges the records into the history between pipelines,
+like the durations stored by the groups.
+
+The history and the records are JSON files: ``{"runners": {runner: [ratios]}, "groups": {"group/splits": runner}}``.
+"""
+
+import json
+import os
+import statistics
+from typing import Any
+
+# Environment variable with the id of the runner, unless another one is configured
+DEFAULT_ENV = "PYTEST_SPLIT_RUNNER"
+
+# How many ratios of actual to estimated durations are kept per runner
+MAX_RUNS = 10
+
+# Runs whose tests are estimated to take less than this many seconds are too short to measure the runner
+MIN_ESTIMATED_SECONDS = 1.0
+
+# Bounds of the slowness of a runner, so that one disturbed run can't make a group run (almost) nothing
+MIN_SLOWNESS = 0.5
+MAX_SLOWNESS = 2.0
+
+
+def load(path: str) -> "dict[str, Any]":
+    try:
+        with open(path) as f:
+            history: dict[str, Any] = json.load(f)
+    except FileNotFoundError:
+        return {"runners": {}, "groups": {}}
+    return history
+
+
+def dump(path: str, history: "dict[str, Any]") -> None:
+    # Written to a separate file first, so groups finishing at the same time never read a partly written one
+    tmp_path = f"{path}.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(history, f, sort_keys=True, indent=4)
+    os.replace(tmp_path, path)
+
+
+def record(  # noqa: PLR0913
+    history: "dict[str, Any]",
+    runner: str,
+    splits: int,
+    groups: "list[int]",
+    estimated: float,
+    actual: float,
+) -> None:
+    """
+    Record that a runner ran groups, and how long their tests took compared to their estimated durations.
+
+    :param history: The history, updated in place.
+    :param runner: Id of the runner.
+    :param splits: How many groups the tests were split in.
+    :param groups: The groups which the runner ran.
+    :param estimated: Estimated duration of the tests which ran.
+    :param actual: Actual duration of the tests which ran.
+    """
+    ratios = [
+        *history.setdefault("runners", {}).get(runner, []),
+        round(actual / estimated, 4),
+    ]
+    history["runners"][runner] = ratios[-MAX_RUNS:]
+    for group in groups:
+        history.setdefault("groups", {})[f"{group}/{splits}"] = runner
+
+
+def merge(history: "dict[str, Any]", records: "list[dict[str, Any]]") -> None:
+    """
+    Merge the records written by the groups of a pipeline into the history.
+
+    :param history: The history, updated in place.
+    :param records: The records, each a history of the run of one group.
+    """
+    for record in records:
+        for runner, ratios in record.get("runners", {}).items():
+            merged = [*history.setdefault("runners", {}).get(runner, []), *ratios]
+            history["runners"][runner] = merged[-MAX_RUNS:]
+        history.setdefault("groups", {}).update(record.get("groups", {}))
+
+
+def get_slowness(history: "dict[str, Any]", runner: str) -> "float | None":
+    """
+    Returns how many times their estimated durations tests take on a runner, None if it has no history.
+    """
+    ratios = history.get("runners", {}).get(runner)
+    if not ratios:
+        return None
+    return min(max(float(statistics.median(ratios)), MIN_SLOWNESS), MAX_SLOWNESS)
+
+
+def get_group_weights(history: "dict[str, Any]", splits: int) -> "list[float]":
+    """
+    Returns the expected slowness of the runner of each group.
+
+    Groups whose runner isn't known get the mean slowness of the others, so that only the differences between the
+    runners matter, not how well the durations are estimated in general.
+    """
+    groups = history.get("groups", {})
+    slowness = [
+        get_slowness(history, groups[f"{group}/{splits}"])
+        if f"{group}/{splits}" in groups
+        else None
+        for group in range(1, splits + 1)
+    ]
+    known = [s for s in slowness if s is not None]
+    default = statistics.fmean(known) if known else 1.0
+    return [default if s is None else s for s in slowness]
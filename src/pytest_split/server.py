@@ -0,0 +1,146 @@
+"""
+Minimal durations service for use with an http(s) '--durations-path'.
+
+Every URL path is a separate JSON document, kept in memory. Run it with
+``python -m pytest_split.server --port 8000`` and point pytest-split to e.g.
+``--durations-path http://localhost:8000/my-project``.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+class DurationsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: "tuple[str, int]") -> None:
+        super().__init__(address, DurationsRequestHandler)
+        self.documents: dict[str, Any] = {}
+        self.lock = threading.Lock()
+        # (method, path) of every handled request, in order
+        self.requests: list[tuple[str, str]] = []
+        # How many connections have been opened to the server
+        self.connections = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+
+class DurationsRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: DurationsServer
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.requests.append(("GET", self.path))
+            document = self.server.documents.get(self.path)
+        if document is None:
+            self._respond(HTTPStatus.NOT_FOUND)
+            return
+
+        body = _encode(document)
+        etag = _etag(body)
+        if self.headers.get("If-None-Match") == etag:
+            self._respond(HTTPStatus.NOT_MODIFIED, etag=etag)
+        else:
+            self._respond(HTTPStatus.OK, body, etag=etag)
+
+    def do_PATCH(self) -> None:
+        changes = self._read_json()
+        if not isinstance(changes, dict):
+            self._respond(HTTPStatus.BAD_REQUEST)
+            return
+
+        with self.server.lock:
+            self.server.requests.append(("PATCH", self.path))
+            document = self.server.documents.setdefault(self.path, {})
+            if not isinstance(document, dict):
+                self._respond(HTTPStatus.CONFLICT)
+                return
+            _merge(document, changes)
+            etag = _etag(_encode(document))
+        self._respond(HTTPStatus.NO_CONTENT, etag=etag)
+
+    def do_PUT(self) -> None:
+        document = self._read_json()
+        with self.server.lock:
+            self.server.requests.append(("PUT", self.path))
+            if (
+                self.headers.get("If-None-Match") == "*"
+                and self.path in self.server.documents
+            ):
+                self._respond(HTTPStatus.PRECONDITION_FAILED)
+                return
+            self.server.documents[self.path] = document
+        self._respond(HTTPStatus.NO_CONTENT, etag=_etag(_encode(document)))
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _respond(
+        self, status: HTTPStatus, body: bytes = b"", etag: "str | None" = None
+    ) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        if status not in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+def _merge(document: "dict[str, Any]", changes: "dict[str, Any]") -> None:
+    """
+    Merge the changes into the document like a JSON merge patch (RFC 7386).
+    """
+    for name, value in changes.items():
+        if value is None:
+            document.pop(name, None)
+        elif isinstance(value, dict):
+            target = document.get(name)
+            if not isinstance(target, dict):
+                target = document[name] = {}
+            _merge(target, value)
+        else:
+            document[name] = value
+
+
+def _encode(document: Any) -> bytes:
+    return json.dumps(document, sort_keys=True).encode()
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve pytest-split durations.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    server = DurationsServer((args.host, args.port))
+    print(f"Serving durations on {server.url}")  # noqa: T201
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Timelines of test runs in the Chrome trace event format, which Perfetto and ``chrome://tracing`` open.
+
+Each group is a process of the trace and each pytest-xdist worker a thread of it, the tests without xdist run in
+the ``main`` thread. There is a span per test phase and per planning phase of pytest-split. Timestamps are wall
+clock times, so the traces of the groups can be merged into one timeline in which the groups line up.
+"""
+
+import json
+from typing import Any
+
+# Thread of the tests run without xdist and of the planning phases
+MAIN_THREAD = "main"
+
+
+class Tracer:
+    """
+    Collects the spans of one group.
+
+    :param pid: Process id of the group in the trace.
+    :param name: Name of the group.
+    """
+
+    def __init__(self, pid: int, name: str) -> None:
+        self.pid = pid
+        self.name = name
+        self.events: list[dict[str, Any]] = []
+        self.threads: dict[str, int] = {}
+
+    def span(  # noqa: PLR0913
+        self,
+        name: str,
+        category: str,
+        start: float,
+        stop: float,
+        thread: str = MAIN_THREAD,
+        args: "dict[str, Any] | None" = None,
+    ) -> None:
+        """
+        Add a span, with the start and stop as seconds since the epoch.
+        """
+        event: dict[str, Any] = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round(start * 1_000_000),
+            "dur": max(round((stop - start) * 1_000_000), 0),
+            "pid": self.pid,
+            "tid": self.threads.setdefault(thread, len(self.threads)),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def to_json(self) -> "dict[str, Any]":
+        return {
+            "traceEvents": [*self._get_metadata_events(), *self.events],
+            "displayTimeUnit": "ms",
+        }
+
+    def _get_metadata_events(self) -> "list[dict[str, Any]]":
+        events: list[dict[str, Any]] = [
+            _metadata("process_name", self.pid, {"name": self.name}),
+            _metadata("process_sort_index", self.pid, {"sort_index": self.pid}),
+        ]
+        for thread, tid in self.threads.items():
+            events.append(_metadata("thread_name", self.pid, {"name": thread}, tid))
+            events.append(
+                _metadata("thread_sort_index", self.pid, {"sort_index": tid}, tid)
+            )
+        return events
+
+
+def merge(traces: "list[dict[str, Any]]") -> "dict[str, Any]":
+    """
+    Merge traces into one, giving every process of them its own process id.
+    """
+    events: list[dict[str, Any]] = []
+    pids: dict[tuple[int, Any], int] = {}
+    for index, trace in enumerate(traces):
+        for event in trace.get("traceEvents", []):
+            pid = pids.setdefault((index, event.get("pid")), len(pids) + 1)
+            events.append({**event, "pid": pid})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def dump(path: str, trace: "dict[str, Any]") -> None:
+    with open(path, "w") as f:
+        json.dump(trace, f)
+
+
+def _metadata(
+    name: str, pid: int, args: "dict[str, Any]", tid: int = 0
+) -> "dict[str, Any]":
+    return {"name": name, "ph": "M", "pid": pid, "tid": tid, "args": args}
@@ -0,0 +1,184 @@
+"""
+Array-backed implementations of the splitting algorithms.
+
+These work on parallel arrays of durations and item indexes instead of building a tuple per test item,
+which matters for suites with hundreds of thousands of (parametrized) items. NumPy is used when it is
+installed, otherwise the standard library ``array`` module is used. The results are identical to the pure
+Python implementations in ``pytest_split.algorithms``.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, islice
+from typing import TYPE_CHECKING, Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+HAS_NUMPY = np is not None
+
+
+def least_duration_assignment(
+    splits: int, durations: "Sequence[float]", names: "Sequence[str]"
+) -> "tuple[list[int], list[int], list[float]]":
+    """
+    Assign items to groups with the longest-processing-time-first rule.
+
+    Items are processed by descending duration, ties broken by ``names`` and then by the original index,
+    which is the order produced by the two stable sorts of ``LeastDurationAlgorithm``.
+
+    :param splits: How many groups we're splitting in.
+    :param durations: Duration of each item, in collection order.
+    :param names: Sort key of each item used to break ties between equal durations.
+    :return: Tuple of processing order, group index of each item and the summed duration of each group.
+    """
+    n = len(durations)
+    if HAS_NUMPY:
+        d = np.asarray(durations, dtype=np.float64)
+        name_order = np.argsort(np.asarray(names), kind="stable")
+        name_rank = np.empty(n, dtype=np.int64)
+        name_rank[name_order] = np.arange(n)
+        order: list[int] = np.lexsort((name_rank, -d)).tolist()
+        values: Sequence[float] = d.tolist()
+    else:
+        values = array("d", durations)
+        name_order_list = sorted(range(n), key=names.__getitem__)
+        order = sorted(name_order_list, key=values.__getitem__, reverse=True)
+
+    assignment = [0] * n
+    group_durations: list[float] = [0] * splits
+    # heap of the form (summed_durations, group_index), replaced in place instead of pop + push
+    heap: list[tuple[float, int]] = [(0, i) for i in range(splits)]
+    for i in order:
+        summed_durations, group_idx = heap[0]
+        summed_durations += values[i]
+        assignment[i] = group_idx
+        group_durations[group_idx] = summed_durations
+        heapq.heapreplace(heap, (summed_durations, group_idx))
+    return order, assignment, group_durations
+
+
+def partition_by_assignment(
+    splits: int, items: "Sequence[Any]", order: "list[int]", assignment: "list[int]"
+) -> "list[tuple[list[Any], list[Any]]]":
+    """
+    Build the selected and deselected lists of each group from a group assignment.
+
+    Selected items keep their original order, deselected items are listed in processing order.
+
+    :return: List of (selected, deselected) tuples, one per group.
+    """
+    if HAS_NUMPY:
+        items_arr = np.fromiter(items, dtype=object, count=len(items))
+        assigned = np.asarray(assignment)
+        order_arr = np.asarray(order, dtype=np.int64)
+        ordered_items = items_arr[order_arr]
+        ordered_assignment = assigned[order_arr]
+        return [
+            (
+                items_arr[assigned == g].tolist(),
+                ordered_items[ordered_assignment != g].tolist(),
+            )
+            for g in range(splits)
+        ]
+
+    partitions: list[tuple[list[Any], list[Any]]] = [([], []) for _ in range(splits)]
+    for item, group_idx in zip(items, assignment, strict=True):
+        partitions[group_idx][0].append(item)
+    for g in range(splits):
+        deselected = partitions[g][1]
+        deselected.extend(items[i] for i in order if assignment[i] != g)
+    return partitions
+
+
+def duration_based_chunks_boundaries(
+    splits: int, durations: "Sequence[float]", time_per_group: float
+) -> "tuple[list[int], list[float]]":
+    """
+    Find the chunk boundaries of ``DurationBasedChunksAlgorithm``.
+
+    A group is closed once its summed duration reaches ``time_per_group``. The candidate boundary is looked
+    up with a binary search over the cumulative durations, after which the group sum is re-accumulated from
+    the start of the group so that float rounding matches the item-by-item implementation exactly.
+
+    :return: Tuple of ``splits + 1`` boundary indices and the summed duration of each group.
+    """
+    n = len(durations)
+    d: Any
+    prefix: Any
+    if HAS_NUMPY:
+        d = np.asarray(durations, dtype=np.float64)
+        prefix = np.cumsum(d)
+    else:
+        d = array("d", durations)
+        prefix = array("d", accumulate(d))
+
+    boundaries = [0]
+    group_durations: list[float] = [0] * splits
+    start = 0
+    for group_idx in range(splits):
+        if start >= n:
+            boundaries.append(n)
+            continue
+        if group_idx == splits - 1:
+            end = n
+            group_durations[group_idx] = _sum_range(d, start, n)
+        else:
+            end, group_durations[group_idx] = _find_chunk_end(
+                d, prefix, start, time_per_group
+            )
+        boundaries.append(end)
+        start = end
+    return boundaries, group_durations
+
+
+def _find_chunk_end(
+    d: Any, prefix: Any, start: int, time_per_group: float
+) -> "tuple[int, float]":
+    """
+    Returns the exclusive end index of the chunk starting at ``start`` and its summed duration.
+    """
+    n = len(d)
+    offset = prefix[start - 1] if start else 0.0
+    if HAS_NUMPY:
+        guess = int(np.searchsorted(prefix, offset + time_per_group, side="left"))
+    else:
+        guess = bisect_left(prefix, offset + time_per_group)
+
+    # The guess is off by at most a few items due to rounding,
+    # widen the window until the exactly accumulated sum reaches the threshold
+    window = 4
+    while True:
+        stop = min(n, guess + window)
+        if HAS_NUMPY:
+            sums = np.cumsum(d[start:stop])
+            reached = np.flatnonzero(sums >= time_per_group)
+            if reached.size:
+                last = int(reached[0])
+                return start + last + 1, float(sums[last])
+            if stop == n:
+                return n, float(sums[-1])
+        else:
+            summed = 0.0
+            for last, summed in enumerate(accumulate(islice(d, start, stop))):
+                if summed >= time_per_group:
+                    return start + last + 1, summed
+            if stop == n:
+                return n, summed
+        window *= 2
+
+
+def _sum_range(d: Any, start: int, stop: int) -> float:
+    if HAS_NUMPY:
+        return float(np.cumsum(d[start:stop])[-1])
+    summed = 0.0
+    for summed in accumulate(islice(d, start, stop)):  # noqa: B007
+        pass
+    return summed
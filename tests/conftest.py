@@ -0,0 +1,16 @@
+import threading
+
+import pytest
+from pytest_split import backends
+from pytest_split.server import DurationsServer
+
+
+@pytest.fixture()
+def server():
+    server = DurationsServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    backends.POOL.close()
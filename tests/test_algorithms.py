@@ -134,6 +134,208 @@ class TestAlgorithms:
                         selected_each[i] = set(group.selected)
                     assert selected_each[i] == set(group.selected)
 
+    @pytest.mark.parametrize("algo_name", Algorithms.names())
+    def test__split_tests_keeps_files_with_costs_together(self, algo_name):
+        durations = {"f1::a": 1, "f1::b": 1, "f2::c": 1, "f2::d": 1}
+        items = [item(x) for x in durations]
+        algo = Algorithms[algo_name].value
+        first, second = algo(
+            splits=2, items=items, durations=durations, file_costs={"f1": 10, "f2": 10}
+        )
+
+        assert first.selected == [item("f1::a"), item("f1::b")]
+        assert first.duration == 12  # noqa: PLR2004
+        assert second.selected == [item("f2::c"), item("f2::d")]
+        assert second.duration == 12  # noqa: PLR2004
+
+    @pytest.mark.parametrize("algo_name", Algorithms.names())
+    def test__split_tests_with_expensive_file_spanning_groups(self, algo_name):
+        durations = {f"test_a.py::test_{num}": 0.1 for num in range(6)}
+        items = [item(x) for x in durations]
+        algo = Algorithms[algo_name].value
+
+        groups = algo(
+            splits=2, items=items, durations=durations, file_costs={"test_a.py": 2.0}
+        )
+
+        assert len(groups) == 2  # noqa: PLR2004
+        assert sorted(x for group in groups for x in group.selected) == sorted(items)
+
+    def test__split_tests_with_file_costs_splits_large_files(self):
+        durations = {"f1::a": 5, "f1::b": 5, "f1::c": 1, "f2::d": 1}
+        items = [item(x) for x in durations]
+        algo = Algorithms["least_duration"].value
+        first, second = algo(
+            splits=2, items=items, durations=durations, file_costs={"f1": 1, "f2": 1}
+        )
+
+        assert first.selected == [item("f1::a"), item("f1::c")]
+        assert first.duration == 7  # noqa: PLR2004
+        assert second.selected == [item("f1::b"), item("f2::d")]
+        assert second.duration == 8  # noqa: PLR2004
+
+    def test__split_tests_assigns_tests_only_to_eligible_groups(self):
+        durations = {"db1": 3, "db2": 3, "a": 2, "b": 2, "c": 2}
+        items = [item(x) for x in durations]
+        algo = Algorithms["least_duration"].value
+        first, second, third = algo(
+            splits=3,
+            items=items,
+            durations=durations,
+            eligible_groups={"db1": [0], "db2": [0, 1]},
+        )
+
+        assert first.selected == [item("db1"), item("c")]
+        assert first.duration == 5  # noqa: PLR2004
+        assert second.selected == [item("db2")]
+        assert third.selected == [item("a"), item("b")]
+
+    def test__split_tests_with_eligible_groups_and_file_costs(self):
+        durations = {"f1::a": 1, "f1::b": 1, "f2::c": 1}
+        items = [item(x) for x in durations]
+        algo = Algorithms["least_duration"].value
+        first, second = algo(
+            splits=2,
+            items=items,
+            durations=durations,
+            file_costs={"f1": 5, "f2": 1},
+            eligible_groups={"f1::a": [0], "f1::b": [0]},
+        )
+
+        assert first.selected == [item("f1::a"), item("f1::b")]
+        assert first.duration == 7  # noqa: PLR2004
+        assert second.selected == [item("f2::c")]
+        assert second.duration == 2  # noqa: PLR2004
+
+    def test__least_tail_duration_spreads_high_variance_tests(self):
+        durations = {"a": 4.0, "b": 1.0, "c": 8.0, "d": 2.0}
+        items = [item(x) for x in durations]
+        algo = Algorithms["least_tail_duration"].value
+
+        # least_duration puts both tests with a high variance into the second group
+        first, second = Algorithms["least_duration"].value(
+            splits=2, items=items, durations=durations
+        )
+        assert second.selected == [item("a"), item("b"), item("d")]
+
+        first, second = algo(
+            splits=2,
+            items=items,
+            durations=durations,
+            variances={"a": 36.0, "d": 16.0},
+        )
+        assert first.selected == [item("a"), item("b")]
+        assert first.duration == 5  # noqa: PLR2004
+        assert second.selected == [item("c"), item("d")]
+        assert second.duration == 10  # noqa: PLR2004
+
+    def test__least_tail_duration_keeps_balanced_means_when_tail_is_shorter(self):
+        durations = {"a": 8.0, "b": 4.0, "c": 4.0}
+        items = [item(x) for x in durations]
+        algo = Algorithms["least_tail_duration"].value
+
+        first, second = algo(
+            splits=2, items=items, durations=durations, variances={"b": 9.0, "c": 9.0}
+        )
+
+        assert first.selected == [item("a")]
+        assert second.selected == [item("b"), item("c")]
+
+    @pytest.mark.parametrize("variances", [None, {}, {"other": 100.0}])
+    def test__least_tail_duration_without_variances_is_least_duration(self, variances):
+        durations = {"a": 4.0, "b": 1.0, "c": 8.0, "d": 2.0}
+        items = [item(x) for x in durations]
+
+        groups = Algorithms["least_tail_duration"].value(
+            splits=2, items=items, durations=durations, variances=variances
+        )
+
+        assert groups == Algorithms["least_duration"].value(
+            splits=2, items=items, durations=durations
+        )
+
+    def test__least_duration_gives_less_work_to_slower_groups(self):
+        durations = {x: 1 for x in "abcdefghi"}
+        items = [item(x) for x in durations]
+        algo = Algorithms["least_duration"].value
+
+        groups = algo(
+            splits=3, items=items, durations=durations, group_weights=[2.0, 1.0, 1.0]
+        )
+
+        # the first group takes 4s on its runner, like the second one
+        assert [group.duration for group in groups] == [2, 4, 3]
+
+    def test__least_duration_with_equal_group_weights_is_unweighted(self):
+        durations = {"a": 4.0, "b": 1.0, "c": 8.0, "d": 2.0, "e": 3.0}
+        items = [item(x) for x in durations]
+        algo = Algorithms["least_duration"].value
+
+        weighted = algo(
+            splits=2, items=items, durations=durations, group_weights=[1.3, 1.3]
+        )
+        groups = algo(splits=2, items=items, durations=durations)
+
+        assert [(group.selected, group.duration) for group in weighted] == [
+            (group.selected, group.duration) for group in groups
+        ]
+
+    def test__deterministic_same_groups_regardless_of_order(self):
+        tests = ["a", "b", "c", "d", "e", "f", "g"]
+        durations = {"a": 3, "b": 1, "c": 2, "d": 2, "e": 1}
+        items = [item(t) for t in tests]
+        algo = Algorithms["deterministic"].value
+        for n in (2, 3):
+            expected = [set(group.selected) for group in algo(n, items, durations)]
+            for order in itertools.permutations(items):
+                groups = algo(splits=n, items=list(order), durations=durations)
+                assert [set(group.selected) for group in groups] == expected
+                # each group keeps the order in which the tests were collected
+                for group in groups:
+                    assert group.selected == [x for x in order if x in group.selected]
+
+    def test__deterministic_same_durations_regardless_of_order(self):
+        durations = {"a": 0.1, "b": 0.2, "c": 0.3}
+        items = [item(t) for t in ("a", "b", "c", "d", "e")]
+        algo = Algorithms["deterministic"].value
+        expected = [group.duration for group in algo(2, items, durations)]
+        for order in itertools.permutations(items):
+            groups = algo(splits=2, items=list(order), durations=durations)
+            # the tests without duration get the average, summed independently of the order
+            assert [group.duration for group in groups] == expected
+
+    def test__deterministic_places_tests_without_duration_by_node_id(self):
+        durations = {"a": 4.0, "b": 4.0}
+        algo = Algorithms["deterministic"].value
+        unknown = [item(f"test_{i}") for i in range(20)]
+
+        groups = algo(
+            splits=2, items=[item("a"), item("b"), *unknown], durations=durations
+        )
+        fewer = algo(
+            splits=2, items=[item("a"), item("b"), *unknown[:10]], durations=durations
+        )
+
+        assert all(group.selected for group in groups)
+        # other tests don't change the room of the groups, so the first tests keep their groups
+        for group, fewer_group in zip(groups, fewer, strict=True):
+            assert [x for x in group.selected if x in unknown[:10]] == [
+                x for x in fewer_group.selected if x in unknown
+            ]
+
+    def test__deterministic_skips_full_groups_for_tests_without_duration(self):
+        durations = {"a": 10.0, "b": 1.0, "c": 1.0}
+        unknown = [item(f"test_{i}") for i in range(3)]
+
+        first, *_ = Algorithms["deterministic"].value(
+            splits=3,
+            items=[item("a"), item("b"), item("c"), *unknown],
+            durations=durations,
+        )
+
+        # the first group already runs longer than the 8s which each group would run on average
+        assert first.selected == [item("a")]
+
     def test__algorithms_members_derived_correctly(self):
         for a in Algorithms.names():
             assert issubclass(Algorithms[a].value.__class__, AlgorithmBase)
@@ -0,0 +1,238 @@
+import json
+import socket
+
+import pytest
+from pytest_split import backends, durations
+
+pytest_plugins = ["pytester"]
+
+
+@pytest.fixture()
+def unreachable_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture()
+def backend(server, tmpdir):
+    return backends.HttpBackend(f"{server.url}/project", str(tmpdir))
+
+
+class TestGetBackend:
+    def test_path(self):
+        backend = backends.get_backend(".test_durations", "cache")
+
+        assert isinstance(backend, backends.FileBackend)
+
+    @pytest.mark.parametrize("scheme", ["http", "https"])
+    def test_url(self, scheme):
+        backend = backends.get_backend(f"{scheme}://example.com/durations", "cache")
+
+        assert isinstance(backend, backends.HttpBackend)
+
+
+class TestHttpBackend:
+    def test_missing_document_is_empty(self, backend):
+        assert backend.load() == {}
+
+    def test_roundtrip(self, backend, server):
+        backend.save({"a": 1.0, "b": 2.0})
+
+        assert server.documents["/project"] == {"a": 1.0, "b": 2.0}
+        assert backend.load() == {"a": 1.0, "b": 2.0}
+
+    def test_unchanged_document_is_read_from_cache(self, backend, server):
+        server.documents["/project"] = {"a": 1.0}
+        backend.load()
+        with open(backend.cache_path) as f:
+            cached = json.load(f)
+        cached["document"] = {"from_cache": 1.0}
+        with open(backend.cache_path, "w") as f:
+            json.dump(cached, f)
+
+        assert backend.load() == {"from_cache": 1.0}
+
+        server.documents["/project"] = {"a": 2.0}
+        assert backend.load() == {"a": 2.0}
+
+    def test_only_changed_entries_are_uploaded(self, backend, server):
+        server.documents["/project"] = {"a": 1.0, "b": 2.0, "c": 3.0}
+        backend.load()
+        # Another shard stores its durations in the meantime
+        server.documents["/project"]["d"] = 4.0
+
+        backend.save({"a": 1.0, "b": 5.0})
+
+        assert server.documents["/project"] == {"a": 1.0, "b": 5.0, "d": 4.0}
+
+    def test_concurrent_saves_merge_metadata_entries(self, server, tmpdir):
+        server.documents["/project"] = {
+            "t1": 1.0,
+            "t2": 1.0,
+            "__pytest_split__": {"keys": {"py312": {}}, "last_seen": {"t3": 1}},
+        }
+        first, second = (
+            backends.HttpBackend(f"{server.url}/project", str(tmpdir.mkdir(name)))
+            for name in ("first", "second")
+        )
+        documents = [first.load(), second.load()]
+
+        # Both groups store their own durations under the same key
+        documents[0]["__pytest_split__"]["keys"]["py312"]["t1"] = 2.0
+        documents[0]["__pytest_split__"]["last_seen"] = {"t1": 2}
+        documents[1]["__pytest_split__"]["keys"]["py312"]["t2"] = 2.0
+        first.save(documents[0])
+        second.save(documents[1])
+
+        assert server.documents["/project"] == {
+            "t1": 1.0,
+            "t2": 1.0,
+            "__pytest_split__": {
+                "keys": {"py312": {"t1": 2.0, "t2": 2.0}},
+                "last_seen": {"t1": 2},
+            },
+        }
+
+    def test_uploads_in_batches(self, backend, server, monkeypatch):
+        monkeypatch.setattr(backends, "UPLOAD_BATCH_SIZE", 2)
+
+        backend.save({name: 1.0 for name in "abcde"})
+
+        assert server.requests.count(("PATCH", "/project")) == 3  # noqa: PLR2004
+        assert server.documents["/project"] == {name: 1.0 for name in "abcde"}
+
+    def test_reuses_connections(self, backend, server):
+        for _ in range(3):
+            backend.load()
+            backend.save({"a": 1.0})
+
+        assert server.connections == 1
+
+    def test_reconnects_after_server_closed_connection(self, backend, server):
+        backend.load()
+        for connections in backends.POOL._idle.values():  # noqa: SLF001
+            for connection in connections:
+                connection.sock.shutdown(socket.SHUT_RDWR)
+
+        assert backend.load() == {}
+
+    def test_unreachable_service_uses_cache(self, server, tmpdir, unreachable_url):
+        server.documents["/project"] = {"a": 1.0}
+        backends.HttpBackend(f"{server.url}/project", str(tmpdir)).load()
+        # Keeps the cache of the reachable URL
+        backend = backends.HttpBackend(f"{server.url}/project", str(tmpdir))
+        backend.url = f"{unreachable_url}/project"
+
+        assert backend.load() == {"a": 1.0}
+        assert backend.offline_reason
+
+    def test_unreachable_service_without_cache(self, tmpdir, unreachable_url):
+        backend = backends.HttpBackend(f"{unreachable_url}/project", str(tmpdir))
+
+        with pytest.raises(backends.RemoteError, match="GET"):
+            backend.load()
+
+    def test_saved_document_is_cached(self, backend, server, unreachable_url):
+        assert backend.load() == {}
+        backend.save({"a": 1.0})
+        backend.url = f"{unreachable_url}/project"
+
+        assert backend.load() == {"a": 1.0}
+        assert backend.offline_reason
+
+    def test_save_to_unreachable_service(self, tmpdir, unreachable_url):
+        backend = backends.HttpBackend(f"{unreachable_url}/project", str(tmpdir))
+
+        with pytest.raises(backends.RemoteError, match="PATCH"):
+            backend.save({"a": 1.0})
+
+    def test_error_status(self, backend, server):
+        server.documents["/project"] = [["a", 1.0]]
+
+        with pytest.raises(backends.RemoteError, match="PATCH"):
+            backend.save({"a": 1.0})
+
+
+class TestPlugin:
+    def test_unreachable_service_is_usage_error(self, testdir, unreachable_url):
+        testdir.makepyfile("def test_1(): pass\n")
+
+        result = testdir.runpytest(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--durations-path",
+            f"{unreachable_url}/project",
+        )
+
+        assert result.ret == pytest.ExitCode.USAGE_ERROR
+        result.stderr.re_match_lines([r".*Could not load the durations from http://"])
+
+    def test_store_with_unreachable_service(self, testdir, server):
+        testdir.makepyfile("def test_1(): pass\n")
+        url = f"{server.url}/project"
+        testdir.runpytest("--store-durations", "--durations-path", url)
+        server.shutdown()
+        server.server_close()
+        backends.POOL.close()
+
+        result = testdir.runpytest("--store-durations", "--durations-path", url)
+
+        assert result.ret == pytest.ExitCode.OK
+        result.stdout.re_match_lines(
+            [
+                r"\[pytest-split\] Could not reach http://.*, using the durations cached from the last run",
+                r"\[pytest-split\] Could not store the test durations in http://.*: PATCH .* failed: .*",
+            ]
+        )
+
+    def test_store_with_failing_patch(self, testdir, server):
+        testdir.makepyfile("def test_1(): pass\n")
+        server.documents["/project"] = [["a", 1.0]]
+
+        result = testdir.runpytest(
+            "--store-durations", "--durations-path", f"{server.url}/project"
+        )
+
+        assert result.ret == pytest.ExitCode.OK
+        result.stdout.re_match_lines(
+            [
+                (
+                    r"\[pytest-split\] Could not store the test durations in http://.*: "
+                    r"PATCH .* failed with status 409"
+                )
+            ]
+        )
+
+    def test_store_and_split_with_remote_durations(self, testdir, server):
+        testdir.makepyfile("".join(f"def test_{num}(): pass\n" for num in range(1, 5)))
+        url = f"{server.url}/project"
+
+        testdir.runpytest("--store-durations", "--durations-path", url)
+
+        document = server.documents["/project"]
+        assert sorted(document) == [
+            f"test_store_and_split_with_remote_durations.py::test_{num}"
+            for num in range(1, 5)
+        ]
+
+        document.update(dict.fromkeys(document, 1.0))
+        result = testdir.runpytest(
+            "--splits", "2", "--group", "1", "--durations-path", url
+        )
+
+        result.assert_outcomes(passed=2)
+        assert server.requests[-1] == ("GET", "/project")
+
+    def test_loaded_durations_are_split(self, server, tmpdir):
+        server.documents["/project"] = {
+            "a": 1.0,
+            durations.METADATA_KEY: {"run": 1},
+        }
+
+        assert durations.load(
+            backends.HttpBackend(f"{server.url}/project", str(tmpdir))
+        ) == ({"a": 1.0}, {"run": 1})
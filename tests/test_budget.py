@@ -0,0 +1,59 @@
+from collections import namedtuple
+from typing import Any
+
+from pytest_split.budget import select_within_budget
+
+item = namedtuple("item", "nodeid")  # noqa: PYI024
+
+
+def _select(
+    durations: "dict[str, float]", budget: float, **kwargs: Any
+) -> "tuple[list[str], list[str], float]":
+    items: Any = [item(x) for x in durations]
+    group = select_within_budget(items, durations, budget, **kwargs)
+    return (
+        [i.nodeid for i in group.selected],
+        [i.nodeid for i in group.deselected],
+        group.duration,
+    )
+
+
+class TestSelectWithinBudget:
+    def test_fits_budget(self):
+        selected, deselected, duration = _select(
+            {"f1::a": 1, "f2::b": 2, "f3::c": 3, "f4::d": 10}, 6
+        )
+
+        assert selected == ["f1::a", "f2::b", "f3::c"]
+        assert deselected == ["f4::d"]
+        assert duration == 6  # noqa: PLR2004
+
+    def test_prefers_failed_tests(self):
+        selected, _, _ = _select(
+            {"f1::a": 1, "f2::b": 1, "f3::c": 3}, 3, failed=["f3::c"]
+        )
+
+        assert selected == ["f3::c"]
+
+    def test_prefers_tests_of_changed_files_and_modules(self):
+        durations = {"tests/test_foo.py::a": 2.0, "tests/test_bar.py::b": 1.0}
+
+        selected, _, _ = _select(durations, 2, changed_files=["src/foo.py"])
+        assert selected == ["tests/test_foo.py::a"]
+
+        selected, _, _ = _select(durations, 2, changed_files=["tests/test_foo.py\n"])
+        assert selected == ["tests/test_foo.py::a"]
+
+    def test_prefers_covering_more_modules(self):
+        selected, _, _ = _select({"f1::a": 1, "f1::b": 1, "f2::c": 1.2}, 2.2)
+
+        assert selected == ["f1::a", "f2::c"]
+
+    def test_selects_notebook_cells_together(self):
+        durations = {"nb.ipynb::Cell 0": 1.0, "nb.ipynb::Cell 1": 1.0, "f1::a": 1.0}
+
+        selected, _, _ = _select(durations, 1.5)
+        assert selected == ["f1::a"]
+
+        selected, _, _ = _select(durations, 2, failed=["nb.ipynb::Cell 1"])
+        assert selected == ["nb.ipynb::Cell 0", "nb.ipynb::Cell 1"]
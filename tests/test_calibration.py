@@ -0,0 +1,23 @@
+from pytest_split import calibration
+
+
+class TestMeasureSpeed:
+    def test_is_relative_to_reference(self, monkeypatch):
+        calibration.measure_speed.cache_clear()
+        monkeypatch.setattr(calibration, "_time_benchmark", lambda: 0.04)
+        monkeypatch.setattr(calibration, "REFERENCE_SECONDS", 0.02)
+
+        assert calibration.measure_speed() == 0.5  # noqa: PLR2004
+        calibration.measure_speed.cache_clear()
+
+    def test_is_measured_once(self, monkeypatch):
+        calibration.measure_speed.cache_clear()
+        timings = iter(range(1, 100))
+        monkeypatch.setattr(calibration, "_time_benchmark", lambda: next(timings))
+
+        assert calibration.measure_speed() == calibration.measure_speed()
+        assert next(timings) == calibration.BENCHMARK_ROUNDS + 1
+        calibration.measure_speed.cache_clear()
+
+    def test_benchmark_runs(self):
+        assert calibration._time_benchmark() > 0  # noqa: SLF001
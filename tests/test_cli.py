@@ -5,7 +5,10 @@ from io import StringIO
 from unittest.mock import patch
 
 import pytest
-from pytest_split import cli
+from pytest_split import cli, trace
+from pytest_split.durations import split_metadata
+
+pytest_plugins = ["pytester"]
 
 
 @pytest.fixture()
@@ -30,3 +33,349 @@ def test_slowest_tests(durations_file):
 
         output = sys.stdout.getvalue()  # type: ignore[attr-defined]
         assert output == ("10.00 test_10\n9.00 test_9\n8.00 test_8\n")
+
+
+def test_slowest_tests_ignores_metadata(tmpdir):
+    durations_path = str(tmpdir.join(".durations"))
+    with open(durations_path, "w") as f:
+        json.dump({"test_1": 1.0, "__pytest_split__": {"keys": {}}}, f)
+
+    with (
+        open(durations_path) as durations_file,
+        patch("pytest_split.cli.argparse.ArgumentParser", autospec=True) as arg_parser,
+        patch("sys.stdout", new_callable=StringIO),
+    ):
+        arg_parser().parse_args.return_value = argparse.Namespace(
+            durations_path=durations_file, count=3
+        )
+        cli.list_slowest_tests()
+
+        output = sys.stdout.getvalue()  # type: ignore[attr-defined]
+        assert output == "1.00 test_1\n"
+
+
+@pytest.fixture()
+def snapshots(tmpdir):
+    old = {
+        "tests/a/test_x.py::test_1": 1.0,
+        "tests/a/test_x.py::test_2": 10.0,
+        "tests/b/test_y.py::test_3": 5.0,
+        "tests/test_z.py::test_gone": 3.0,
+    }
+    new = {
+        "tests/a/test_x.py::test_1": 1.1,
+        "tests/a/test_x.py::test_2": 14.0,
+        "tests/b/test_y.py::test_3": 5.0,
+        "tests/b/test_y.py::test_new": 2.0,
+        "__pytest_split__": {"run": 1},
+    }
+    paths = []
+    for name, durations in (("old", old), ("new", new)):
+        path = str(tmpdir.join(name))
+        with open(path, "w") as f:
+            json.dump(durations, f)
+        paths.append(path)
+    return paths
+
+
+class TestDiff:
+    def test_reports_regressions(self, snapshots, capsys):
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(["diff", *snapshots])
+
+        assert exc_info.value.code == 1
+        assert capsys.readouterr().out == (
+            "Total duration: 19.00s -> 22.10s (+3.10s, +16.3%)\n"
+            "\n"
+            "Tests with increased durations:\n"
+            "  10.00s -> 14.00s (+4.00s, +40.0%) tests/a/test_x.py::test_2\n"
+            "\n"
+            "Files with increased durations:\n"
+            "  11.00s -> 15.10s (+4.10s, +37.3%) tests/a/test_x.py\n"
+            "  5.00s -> 7.00s (+2.00s, +40.0%) tests/b/test_y.py\n"
+            "\n"
+            "Packages with increased durations:\n"
+            "  11.00s -> 15.10s (+4.10s, +37.3%) tests/a\n"
+            "  5.00s -> 7.00s (+2.00s, +40.0%) tests/b\n"
+            "\n"
+            "New heavy tests:\n"
+            "  2.00s tests/b/test_y.py::test_new\n"
+            "\n"
+            "Removed heavy tests:\n"
+            "  3.00s tests/test_z.py::test_gone\n"
+        )
+
+    def test_passes_within_thresholds(self, snapshots, capsys):
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(["diff", *snapshots, "--min-increase", "5"])
+
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out == (
+            "Total duration: 19.00s -> 22.10s (+3.10s, +16.3%)\n"
+        )
+
+    def test_relative_threshold(self, snapshots, capsys):
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(["diff", *snapshots, "--min-ratio", "0.38"])
+
+        assert exc_info.value.code == 1
+        out = capsys.readouterr().out
+        assert "tests/a/test_x.py::test_2" in out
+        assert "tests/a\n" not in out
+
+
+class TestImportJunit:
+    def test_imports_node_ids_of_pytest(self, testdir, capsys):
+        testdir.makepyfile(
+            test_foo="""
+            import pytest
+
+            class TestFoo:
+                @pytest.mark.parametrize("value", ["a.b", "c::d"])
+                def test_a(self, value):
+                    pass
+
+            def test_b():
+                assert False
+
+            @pytest.mark.skip
+            def test_c():
+                pass
+            """
+        )
+        testdir.mkpydir("pkg").join("test_bar.py").write("def test_d(): pass\n")
+        testdir.runpytest("--junitxml", "report.xml")
+        testdir.runpytest("--store-durations", "--durations-path", "stored.json")
+        durations_path = str(testdir.tmpdir.join("imported.json"))
+        with open(durations_path, "w") as f:
+            json.dump({"test_foo.py::test_c": 5.0, "test_old.py::test_e": 1.0}, f)
+
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(
+                [
+                    "import-junit",
+                    str(testdir.tmpdir.join("report.xml")),
+                    "--durations-path",
+                    durations_path,
+                    "--rootdir",
+                    str(testdir.tmpdir),
+                ]
+            )
+
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out.endswith(
+            "Imported 4 durations from 1 reports, kept 1 and ignored 0 of skipped or errored tests\n"
+        )
+        with open(durations_path) as f:
+            imported = json.load(f)
+        with open(testdir.tmpdir.join("stored.json")) as f:
+            stored, _ = split_metadata(json.load(f))
+        # The skipped test keeps its duration, which storing durations doesn't have
+        assert sorted(imported) == sorted(
+            [*stored, "test_foo.py::test_c", "test_old.py::test_e"]
+        )
+        assert imported["test_foo.py::test_c"] == 5.0  # noqa: PLR2004
+
+    def test_cleans_and_stores_under_key(self, tmpdir, capsys):
+        report = tmpdir.join("report.xml")
+        report.write(
+            '<testsuite><testcase classname="test_foo" name="test_a" time="2.0" /></testsuite>'
+        )
+        durations_path = str(tmpdir.join(".durations"))
+        with open(durations_path, "w") as f:
+            json.dump({"test_foo.py::test_b": 1.0}, f)
+
+        with pytest.raises(SystemExit):
+            cli.main(
+                [
+                    "import-junit",
+                    str(report),
+                    "--durations-path",
+                    durations_path,
+                    "--rootdir",
+                    str(tmpdir),
+                    "--durations-key",
+                    "py311",
+                    "--clean-durations",
+                ]
+            )
+
+        capsys.readouterr()
+        with open(durations_path) as f:
+            assert json.load(f) == {
+                "test_foo.py::test_a": 2.0,
+                "__pytest_split__": {"keys": {"py311": {"test_foo.py::test_a": 2.0}}},
+            }
+
+
+class TestRerunGroups:
+    def test_prints_number_of_groups(self, tmpdir, capsys):
+        durations_path = str(tmpdir.join(".durations"))
+        with open(durations_path, "w") as f:
+            json.dump({"test_a": 200.0, "test_b": 200.0, "test_c": 200.0}, f)
+        failed = [tmpdir.join("lastfailed-1"), tmpdir.join("lastfailed-2")]
+        failed[0].write(json.dumps({"test_a": True}))
+        failed[1].write(json.dumps({"test_b": True, "test_c": True}))
+
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(
+                [
+                    "rerun-groups",
+                    *map(str, failed),
+                    "--durations-path",
+                    durations_path,
+                    "--max-groups",
+                    "4",
+                ]
+            )
+
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out == "2\n"
+
+
+class TestMergeTraces:
+    def test_writes_merged_trace(self, tmpdir, capsys):
+        paths = []
+        for group in (1, 2):
+            tracer = trace.Tracer(group, f"group {group}/2")
+            tracer.span("split", "pytest-split", 1.0, 2.0)
+            paths.append(str(tmpdir.join(f"trace-{group}.json")))
+            trace.dump(paths[-1], tracer.to_json())
+        output = str(tmpdir.join("trace.json"))
+
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(["merge-traces", *paths, "--output", output])
+
+        assert exc_info.value.code == 0
+        assert (
+            capsys.readouterr().out == f"Merged 2 traces with 10 events into {output}\n"
+        )
+        with open(output) as f:
+            merged = json.load(f)
+        assert sorted(
+            event["pid"] for event in merged["traceEvents"] if event["ph"] == "X"
+        ) == [1, 2]
+
+
+class TestMergeRunnerHistory:
+    def test_merges_records_into_history(self, tmpdir, capsys):
+        history = tmpdir.join("runners.json")
+        history.write(json.dumps({"runners": {"a": [1.0]}, "groups": {"1/2": "a"}}))
+        records = []
+        for runner, group in (("a", 1), ("b", 2)):
+            record = tmpdir.join(f"record-{group}.json")
+            record.write(
+                json.dumps(
+                    {"runners": {runner: [1.5]}, "groups": {f"{group}/2": runner}}
+                )
+            )
+            records.append(str(record))
+
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(["merge-runner-history", str(history), *records])
+
+        assert exc_info.value.code == 0
+        assert capsys.readouterr().out == (
+            f"Merged 2 records of 2 runners into {history}\n"
+        )
+        assert json.loads(history.read()) == {
+            "runners": {"a": [1.0, 1.5], "b": [1.5]},
+            "groups": {"1/2": "a", "2/2": "b"},
+        }
+
+
+class TestPlan:
+    @pytest.fixture()
+    def rootdirs(self, tmpdir):
+        for name in ("pkg_a", "pkg_b"):
+            root = tmpdir.mkdir(name)
+            root.join("pytest.ini").write("[pytest]\n")
+            root.join(f"test_{name}.py").write(
+                "def test_1(): pass\ndef test_2(): pass\n"
+            )
+        durations_path = tmpdir.join(".durations")
+        durations_path.write(
+            json.dumps(
+                {
+                    "pkg_a/test_pkg_a.py::test_1": 3.0,
+                    "pkg_a/test_pkg_a.py::test_2": 1.0,
+                    "pkg_b/test_pkg_b.py::test_1": 1.0,
+                    "pkg_b/test_pkg_b.py::test_2": 1.0,
+                }
+            )
+        )
+        return tmpdir
+
+    def test_plans_and_runs_groups_across_root_directories(self, rootdirs, capfd):
+        output = str(rootdirs.join("plan.json"))
+
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(
+                [
+                    "plan",
+                    str(rootdirs.join("pkg_a")),
+                    str(rootdirs.join("pkg_b")),
+                    "--splits",
+                    "2",
+                    "--durations-path",
+                    str(rootdirs.join(".durations")),
+                    "--output",
+                    output,
+                ]
+            )
+
+        assert exc_info.value.code == 0
+        assert capfd.readouterr().out == (
+            f"Planned 4 tests of 2 root directories in 2 groups into {output}, "
+            "the longest group taking 3.00s\n"
+        )
+        with open(output) as f:
+            groups = json.load(f)["groups"]
+        assert groups[0]["roots"] == [
+            {"rootdir": "pkg_a", "nodeids": ["test_pkg_a.py::test_1"]}
+        ]
+
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(
+                ["run-plan", output, "--group", "2", "--", "-p", "no:cacheprovider"]
+            )
+
+        assert exc_info.value.code == 0
+        out = capfd.readouterr().out
+        assert "[pytest-split] Running 1 tests in pkg_a" in out
+        assert "[pytest-split] Running 2 tests in pkg_b" in out
+        assert "1 passed, 1 deselected" in out
+        assert "2 passed in" in out
+
+    def test_plan_rejects_directory_which_is_not_rootdir(self, rootdirs, capsys):
+        rootdirs.join("pkg_a", "pytest.ini").remove()
+        rootdirs.join("pytest.ini").write("[pytest]\n")
+
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(
+                [
+                    "plan",
+                    str(rootdirs.join("pkg_a")),
+                    "--splits",
+                    "2",
+                    "--output",
+                    str(rootdirs.join("plan.json")),
+                ]
+            )
+
+        assert exc_info.value.code == 2  # noqa: PLR2004
+        assert capsys.readouterr().err == (
+            f"{rootdirs.join('pkg_a')} is not the root directory of pytest, which is {rootdirs}, "
+            "add a pytest configuration file to it\n"
+        )
+        assert not rootdirs.join("plan.json").exists()
+
+    def test_run_plan_rejects_unknown_group(self, rootdirs, capsys):
+        output = rootdirs.join("plan.json")
+        output.write(json.dumps({"splits": 2, "rootdirs": [], "groups": []}))
+
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(["run-plan", str(output), "--group", "3"])
+
+        assert exc_info.value.code == 2  # noqa: PLR2004
+        assert capsys.readouterr().err == "The groups must be >= 1 and <= 2\n"
@@ -0,0 +1,349 @@
+import io
+import json
+from typing import Any
+
+import pytest
+from pytest_split import durations
+
+
+@pytest.fixture()
+def durations_path(tmpdir):
+    return str(tmpdir.join(".durations"))
+
+
+class TestLoadAndDump:
+    def test_missing_file_is_empty(self, durations_path):
+        assert durations.load(durations_path) == ({}, {})
+
+    def test_legacy_list_format(self, durations_path):
+        with open(durations_path, "w") as f:
+            json.dump([["a", 1], ["b", 2]], f)
+
+        assert durations.load(durations_path) == ({"a": 1, "b": 2}, {})
+
+    def test_roundtrip_with_metadata(self, durations_path):
+        metadata = {"keys": {"py312": {"a": 2}}}
+        durations.dump(durations_path, {"a": 1}, metadata)
+
+        with open(durations_path) as f:
+            assert json.load(f) == {"a": 1, durations.METADATA_KEY: metadata}
+        assert durations.load(durations_path) == ({"a": 1}, metadata)
+
+    def test_dump_without_metadata_is_flat(self, durations_path):
+        durations.dump(durations_path, {"a": 1}, {})
+
+        with open(durations_path) as f:
+            assert json.load(f) == {"a": 1}
+
+
+class TestKeyedDurations:
+    def test_uses_own_durations_and_scales_the_rest(self):
+        metadata = {"keys": {"slow": {"a": 2, "b": 6}}}
+        result = durations.keyed_durations({"a": 1, "b": 3, "c": 1}, metadata, "slow")
+
+        assert result == {"a": 2, "b": 6, "c": 2}
+
+    def test_unknown_key_uses_global_durations(self):
+        result = durations.keyed_durations({"a": 1, "b": 3}, {}, "slow")
+
+        assert result == {"a": 1, "b": 3}
+
+    def test_no_common_tests_does_not_scale(self):
+        metadata = {"keys": {"slow": {"a": 5}}}
+        result = durations.keyed_durations({"b": 3}, metadata, "slow")
+
+        assert result == {"a": 5, "b": 3}
+
+
+class TestPrune:
+    def test_removes_tests_unseen_for_given_number_of_runs(self):
+        test_durations = {"a": 1.0, "b": 1.0}
+        metadata = {"keys": {"py312": {"a": 2, "b": 2}}}
+
+        assert durations.prune(test_durations, metadata, ["a"], 2) == []
+        assert metadata["last_seen"] == {"a": 1, "b": 1}
+
+        assert durations.prune(test_durations, metadata, ["a"], 2) == []
+        assert durations.prune(test_durations, metadata, ["a"], 2) == ["b"]
+        assert test_durations == {"a": 1}
+        assert metadata["keys"] == {"py312": {"a": 2}}
+        assert metadata["last_seen"] == {"a": 3}
+        assert metadata["run"] == 3  # noqa: PLR2004
+
+    def test_seen_again_resets_age(self):
+        test_durations = {"a": 1.0, "b": 1.0}
+        metadata: dict[str, Any] = {}
+
+        durations.prune(test_durations, metadata, ["a"], 2)
+        durations.prune(test_durations, metadata, ["b"], 2)
+        assert durations.prune(test_durations, metadata, ["b"], 2) == ["a"]
+        assert test_durations == {"b": 1}
+
+    def test_does_not_track_tests_without_durations(self):
+        metadata: dict[str, Any] = {}
+        durations.prune({"a": 1}, metadata, ["a", "not_stored"], 1)
+
+        assert metadata["last_seen"] == {"a": 1}
+
+
+class TestReruns:
+    def test_tracks_only_rerun_or_failed_tests(self):
+        metadata: dict[str, Any] = {}
+        durations.record_attempts(metadata, {"a": 3, "b": 1, "c": 1}, ["c"])
+
+        assert metadata["reruns"] == {
+            "a": {"runs": 1, "reruns": 2, "failures": 0},
+            "c": {"runs": 1, "reruns": 0, "failures": 1},
+        }
+
+    def test_keeps_counting_tracked_tests(self):
+        metadata: dict[str, Any] = {}
+        durations.record_attempts(metadata, {"a": 3}, [])
+        durations.record_attempts(metadata, {"a": 1}, [])
+
+        assert metadata["reruns"] == {"a": {"runs": 2, "reruns": 2, "failures": 0}}
+
+    def test_expected_costs(self):
+        metadata: dict[str, Any] = {}
+        durations.record_attempts(metadata, {"a": 3}, [])
+        durations.record_attempts(metadata, {"a": 1}, [])
+
+        assert durations.expected_costs({"a": 10.0, "b": 1.0}, metadata) == {
+            "a": 20.0,
+            "b": 1.0,
+        }
+
+    def test_prune_removes_rerun_statistics(self):
+        metadata: dict[str, Any] = {}
+        durations.record_attempts(metadata, {"a": 3}, [])
+
+        durations.prune({"a": 1.0}, metadata, ["a"], 1)
+        durations.prune({"a": 1.0}, metadata, [], 1)
+
+        assert metadata["reruns"] == {}
+
+
+class TestVariances:
+    def test_tracks_tests_whose_durations_vary(self):
+        metadata: dict[str, Any] = {}
+        durations.record_variances(
+            metadata,
+            {"a": 10.0, "b": 10.0, "c": 1.0},
+            {"a": 14.0, "b": 10.1, "c": 5.0, "d": 5.0},
+            {"c": "failed"},
+        )
+
+        assert metadata == {"variances": {"a": 8.0}}
+
+    def test_moving_estimate(self):
+        metadata: dict[str, Any] = {"variances": {"a": 8.0}}
+        durations.record_variances(metadata, {"a": 14.0}, {"a": 10.0}, {})
+        durations.record_variances(metadata, {"a": 10.0}, {"a": 10.0}, {})
+
+        assert metadata["variances"]["a"] == pytest.approx(6.4)
+
+    def test_forgets_tests_which_became_stable(self):
+        metadata: dict[str, Any] = {"variances": {"a": 1.0}}
+        durations.record_variances(metadata, {"a": 10.0}, {"a": 10.0}, {})
+
+        assert metadata == {}
+
+    def test_prune_removes_variances(self):
+        metadata: dict[str, Any] = {"variances": {"a": 1.0}}
+
+        durations.prune({"a": 1.0}, metadata, ["a"], 1)
+        durations.prune({"a": 1.0}, metadata, [], 1)
+
+        assert metadata["variances"] == {}
+
+
+class TestCompact:
+    def test_stores_uniform_family_once(self):
+        metadata: dict[str, Any] = {}
+        test_durations = {f"a.py::test_a[{i}]": 1.0 + i / 100 for i in range(5)}
+
+        compacted = durations.compact({**test_durations, "a.py::test_b": 2.0}, metadata)
+
+        assert compacted == {"a.py::test_b": 2.0}
+        assert metadata["families"] == {
+            "a.py::test_a": {
+                "duration": pytest.approx(1.02),
+                "params": ["0", "1", "2", "3", "4"],
+            }
+        }
+        assert durations.expand_families(metadata["families"]) == pytest.approx(
+            dict.fromkeys(test_durations, 1.02)
+        )
+
+    def test_stores_deviations_of_family(self):
+        metadata: dict[str, Any] = {}
+        test_durations = {
+            f"a.py::test_a[x-{i}]": duration
+            for i, duration in enumerate([1.0, 1.0, 1.0, 1.0, 6.0])
+        }
+
+        assert durations.compact(test_durations, metadata) == {}
+        assert metadata["families"]["a.py::test_a"] == {
+            "duration": 2.0,
+            "params": {"x-0": -1.0, "x-1": -1.0, "x-2": -1.0, "x-3": -1.0, "x-4": 4.0},
+        }
+        assert durations.expand({}, metadata) == test_durations
+        assert "families" not in metadata
+
+    def test_small_families_stay_flat(self):
+        metadata: dict[str, Any] = {"families": {"old": {}}}
+        test_durations = {"a.py::test_a[0]": 1.0, "a.py::test_a[1]": 1.0}
+
+        assert durations.compact(test_durations, metadata) == test_durations
+        assert metadata == {}
+
+    def test_expands_families_of_given_names_only(self):
+        families = {
+            "a.py::test_a": {"duration": 1.0, "params": ["0", "1"]},
+            "b.py::test_b": {"duration": 2.0, "params": {"0": 0.5}},
+        }
+
+        assert durations.expand_families(
+            families, ["a.py::test_a[1]", "a.py::test_a[2]", "c.py::test_c"]
+        ) == {"a.py::test_a[1]": 1.0}
+
+
+class TestSplitPrefix:
+    def test_separates_and_joins_tests_with_prefix(self):
+        test_durations = {"a/test_x.py::test_1": 1.0, "b/test_y.py::test_2": 2.0}
+        metadata = {
+            "run": 3,
+            "keys": {"py312": {"a/test_x.py::test_1": 1.5}},
+            "variances": {"b/test_y.py::test_2": 0.5},
+        }
+
+        own, other = durations.split_prefix(test_durations, metadata, "a/")
+
+        assert own == (
+            {"test_x.py::test_1": 1.0},
+            {
+                "run": 3,
+                "keys": {"py312": {"test_x.py::test_1": 1.5}},
+                "variances": {},
+            },
+        )
+        assert other == (
+            {"b/test_y.py::test_2": 2.0},
+            {"keys": {"py312": {}}, "variances": {"b/test_y.py::test_2": 0.5}},
+        )
+        assert durations.join_prefix(*own, *other, "a/") == (test_durations, metadata)
+
+    @pytest.mark.parametrize(
+        ("prefix", "own_name"), [("", "test_x.py::test_1"), ("a/", "test_y.py::test_2")]
+    )
+    def test_tests_belong_to_longest_prefix(self, prefix, own_name):
+        test_durations = {
+            "test_x.py::test_1": 1.0,
+            "a/test_y.py::test_2": 2.0,
+            "a/b/test_z.py::test_3": 3.0,
+        }
+
+        own, other = durations.split_prefix(
+            test_durations, {}, prefix, ["", "a/", "a/b/"]
+        )
+
+        assert list(own[0]) == [own_name]
+        assert len(other[0]) == 2  # noqa: PLR2004
+        assert durations.join_prefix(*own, *other, prefix) == (test_durations, {})
+
+
+class TestWeighByOutcome:
+    def test_weighs_by_outcome(self):
+        recorded, counts = durations.weigh_by_outcome(
+            {"passed": 1.0, "failed": 1.0, "skipped": 0.1, "error": 0.1, "new": 0.1},
+            {"passed": 3.0, "failed": 3.0, "skipped": 3.0, "error": 3.0},
+            {
+                "passed": "passed",
+                "failed": "failed",
+                "skipped": "skipped",
+                "error": "error",
+                "new": "skipped",
+            },
+        )
+
+        assert recorded == {
+            "passed": 1.0,
+            "failed": 2.0,
+            "skipped": 3.0,
+            "error": 3.0,
+        }
+        assert counts == {"updated": 2, "kept": 2, "ignored": 1}
+
+    def test_failed_without_stored_duration_is_recorded(self):
+        recorded, _ = durations.weigh_by_outcome({"a": 1.0}, {}, {"a": "failed"})
+
+        assert recorded == {"a": 1.0}
+
+
+class TestIterDurations:
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 16])
+    @pytest.mark.parametrize("indent", [None, 4])
+    def test_streams_durations_without_metadata(self, chunk_size, indent):
+        stored = {
+            "a.py::test_a": 1.25,
+            durations.METADATA_KEY: {"keys": {"py312": {"a.py::test_a": 2}}},
+            'b.py::test_b[x-"y"]': 3e-05,
+            "c.py::test_c": 2,
+        }
+        f = io.StringIO(json.dumps(stored, indent=indent))
+
+        assert list(durations.iter_durations(f, chunk_size)) == [
+            ("a.py::test_a", 1.25),
+            ('b.py::test_b[x-"y"]', 3e-05),
+            ("c.py::test_c", 2),
+        ]
+
+    def test_expands_families(self):
+        stored = {
+            "a.py::test_a": 1.0,
+            durations.METADATA_KEY: {
+                "families": {"b.py::test_b": {"duration": 2.0, "params": ["x", "y"]}}
+            },
+        }
+        f = io.StringIO(json.dumps(stored))
+
+        assert list(durations.iter_durations(f, 3)) == [
+            ("a.py::test_a", 1.0),
+            ("b.py::test_b[x]", 2.0),
+            ("b.py::test_b[y]", 2.0),
+        ]
+
+    def test_large_value_is_decoded_logarithmic_times(self, monkeypatch):
+        stored = {
+            durations.METADATA_KEY: {
+                "keys": {"py312": {f"a.py::test_{num}": 1.0 for num in range(10000)}}
+            },
+            "a.py::test_a": 1.0,
+        }
+        f = io.StringIO(json.dumps(stored))
+        decodes = []
+        raw_decode = json.JSONDecoder.raw_decode
+
+        def counting_raw_decode(self, s, idx=0):
+            decodes.append(idx)
+            return raw_decode(self, s, idx)
+
+        monkeypatch.setattr(json.JSONDecoder, "raw_decode", counting_raw_decode)
+
+        assert list(durations.iter_durations(f, 64)) == [("a.py::test_a", 1.0)]
+        assert len(decodes) < 50  # noqa: PLR2004
+
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("{}", []),
+            ("[]", []),
+            ('[["a", 1.5], ["b", 2]]', [("a", 1.5), ("b", 2)]),
+        ],
+    )
+    def test_empty_and_legacy_format(self, text, expected):
+        assert list(durations.iter_durations(io.StringIO(text), 1)) == expected
+
+    def test_invalid_file(self):
+        with pytest.raises(ValueError, match="Invalid durations file"):
+            list(durations.iter_durations(io.StringIO('{"a": 1 "b": 2}')))
@@ -0,0 +1,37 @@
+import pytest
+from pytest_split import fail_fast
+
+
+class TestGetMarker:
+    def test_path(self):
+        assert isinstance(fail_fast.get_marker("failed.json"), fail_fast.FileMarker)
+
+    @pytest.mark.parametrize("scheme", ["http", "https"])
+    def test_url(self, scheme):
+        marker = fail_fast.get_marker(f"{scheme}://example.com/failed")
+
+        assert isinstance(marker, fail_fast.HttpMarker)
+
+
+class TestFileMarker:
+    def test_keeps_first_failure(self, tmpdir):
+        marker = fail_fast.FileMarker(str(tmpdir.join("failed.json")))
+        assert marker.read() is None
+
+        marker.publish({"nodeid": "test_a"})
+        marker.publish({"nodeid": "test_b"})
+
+        assert marker.read() == {"nodeid": "test_a"}
+        assert tmpdir.listdir() == [tmpdir.join("failed.json")]
+
+
+class TestHttpMarker:
+    def test_keeps_first_failure(self, server):
+        marker = fail_fast.HttpMarker(f"{server.url}/failed")
+        assert marker.read() is None
+
+        marker.publish({"nodeid": "test_a"})
+        marker.publish({"nodeid": "test_b"})
+
+        assert marker.read() == {"nodeid": "test_a"}
+        assert server.documents["/failed"] == {"nodeid": "test_a"}
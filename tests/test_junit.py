@@ -0,0 +1,76 @@
+import io
+
+import pytest
+from pytest_split.junit import get_nodeid, iter_testcases
+
+REPORT = b"""<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="pytest" tests="5">
+    <testcase classname="tests.test_foo" name="test_a" time="1.5" />
+    <testcase classname="tests.test_foo.TestFoo" name="test_b[1-x.y]" time="2.0">
+      <failure message="assert False">assert False</failure>
+    </testcase>
+    <testcase classname="tests.test_foo" name="test_c" time="0.1">
+      <skipped type="pytest.skip" message="skipped">skipped</skipped>
+    </testcase>
+    <testcase classname="tests.test_foo" name="test_d" time="0.2">
+      <skipped type="pytest.xfail" message="xfail">xfail</skipped>
+    </testcase>
+    <testcase classname="tests.test_foo" name="test_e" time="0.3">
+      <error message="error in setup">error</error>
+    </testcase>
+    <testcase classname="tests.test_foo" name="test_no_time" />
+  </testsuite>
+</testsuites>
+"""
+
+
+class TestIterTestcases:
+    def test_reads_durations_and_outcomes(self):
+        assert list(iter_testcases(io.BytesIO(REPORT))) == [
+            ("tests/test_foo.py::test_a", 1.5, "passed"),
+            ("tests/test_foo.py::TestFoo::test_b[1-x.y]", 2.0, "failed"),
+            ("tests/test_foo.py::test_c", 0.1, "skipped"),
+            ("tests/test_foo.py::test_d", 0.2, "xfailed"),
+            ("tests/test_foo.py::test_e", 0.3, "error"),
+        ]
+
+
+class TestGetNodeid:
+    @pytest.mark.parametrize(
+        ("classname", "name", "nodeid"),
+        [
+            ("test_foo", "test_a", "test_foo.py::test_a"),
+            ("tests.unit.test_foo", "test_a", "tests/unit/test_foo.py::test_a"),
+            (
+                "tests.test_foo.TestFoo.TestNested",
+                "test_a",
+                "tests/test_foo.py::TestFoo::TestNested::test_a",
+            ),
+        ],
+    )
+    def test_guesses_missing_files(self, classname, name, nodeid, tmpdir):
+        assert get_nodeid(classname, name, rootdir=str(tmpdir)) == nodeid
+
+    def test_finds_files(self, tmpdir):
+        tmpdir.ensure("tests", "checks", "test_foo.py")
+        tmpdir.ensure("tests", "notebook.ipynb")
+
+        assert (
+            get_nodeid("tests.checks.test_foo.Checks", "test_a", rootdir=str(tmpdir))
+            == "tests/checks/test_foo.py::Checks::test_a"
+        )
+        assert (
+            get_nodeid("tests.notebook.ipynb", "Cell 0", rootdir=str(tmpdir))
+            == "tests/notebook.ipynb::Cell 0"
+        )
+
+    def test_uses_file_attribute(self, tmpdir):
+        nodeid = get_nodeid(
+            "tests.test_foo.Checks",
+            "test_a",
+            file="tests/test_foo.py",
+            rootdir=str(tmpdir),
+        )
+
+        assert nodeid == "tests/test_foo.py::Checks::test_a"
@@ -0,0 +1,109 @@
+from pytest_split.ordering import count_setups, order_by_fixtures
+
+pytest_plugins = ["pytester"]
+
+SOURCE = """
+import pytest
+
+@pytest.fixture(scope="module", params=[1, 2])
+def resource(request):
+    return request.param
+
+def test_a(resource):
+    pass
+
+def test_b(resource):
+    pass
+
+def test_c():
+    pass
+"""
+
+
+def _interleave(items):
+    # Alternate the parameters, which sets up the module-scoped fixture for every test
+    first = [item for item in items if item.name.endswith("[1]")]
+    second = [item for item in items if item.name.endswith("[2]")]
+    others = [item for item in items if "[" not in item.name]
+    return [item for pair in zip(first, second, strict=True) for item in pair] + others
+
+
+class TestOrderByFixtures:
+    def test_groups_tests_by_fixture_parameters(self, testdir):
+        items = _interleave(testdir.getitems(SOURCE))
+        assert [item.name for item in items] == [
+            "test_a[1]",
+            "test_a[2]",
+            "test_b[1]",
+            "test_b[2]",
+            "test_c",
+        ]
+
+        ordered, before, after = order_by_fixtures(items)
+
+        assert [item.name for item in ordered] == [
+            "test_a[1]",
+            "test_b[1]",
+            "test_a[2]",
+            "test_b[2]",
+            "test_c",
+        ]
+        assert before == 4  # noqa: PLR2004
+        assert after == 2  # noqa: PLR2004
+        assert count_setups(ordered) == after
+
+    def test_keeps_order_without_savings(self, testdir):
+        by_name = {item.name: item for item in testdir.getitems(SOURCE)}
+        items = [
+            by_name[name]
+            for name in ["test_a[1]", "test_b[1]", "test_c", "test_a[2]", "test_b[2]"]
+        ]
+
+        ordered, before, after = order_by_fixtures(items)
+
+        assert ordered == items
+        assert before == after == 2  # noqa: PLR2004
+
+    def test_keeps_modules_in_order(self, testdir):
+        testdir.makepyfile(
+            test_first=SOURCE,
+            test_second="def test_d(): pass\n",
+        )
+        items = _interleave(testdir.inline_genitems()[0])
+
+        ordered, _, after = order_by_fixtures(items)
+
+        assert [item.nodeid for item in ordered] == [
+            "test_first.py::test_a[1]",
+            "test_first.py::test_b[1]",
+            "test_first.py::test_a[2]",
+            "test_first.py::test_b[2]",
+            "test_first.py::test_c",
+            "test_second.py::test_d",
+        ]
+        assert after == 2  # noqa: PLR2004
+
+    def test_counts_class_scoped_fixtures_per_class(self, testdir):
+        items = testdir.getitems(
+            """
+            import pytest
+
+            @pytest.fixture(scope="class")
+            def resource():
+                pass
+
+            class TestA:
+                def test_a(self, resource):
+                    pass
+
+                def test_b(self, resource):
+                    pass
+
+            class TestB:
+                def test_c(self, resource):
+                    pass
+            """
+        )
+
+        assert count_setups(items) == 2  # noqa: PLR2004
+        assert count_setups([items[0], items[2], items[1]]) == 3  # noqa: PLR2004
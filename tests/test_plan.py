@@ -0,0 +1,96 @@
+import pytest
+from pytest_split import plan
+
+pytest_plugins = ["pytester"]
+
+
+class TestMake:
+    def test_balances_groups_across_root_directories(self):
+        collected = {
+            "pkg_a": ["test_a.py::test_1", "test_a.py::test_2"],
+            "pkg_b": ["test_b.py::test_3"],
+        }
+        durations = {
+            "pkg_a/test_a.py::test_1": 3.0,
+            "pkg_a/test_a.py::test_2": 1.0,
+            "pkg_b/test_b.py::test_3": 2.0,
+        }
+
+        assert plan.make(collected, durations, 2) == {
+            "splits": 2,
+            "rootdirs": ["pkg_a", "pkg_b"],
+            "groups": [
+                {
+                    "duration": 3.0,
+                    "roots": [{"rootdir": "pkg_a", "nodeids": ["test_a.py::test_1"]}],
+                },
+                {
+                    "duration": 3.0,
+                    "roots": [
+                        {"rootdir": "pkg_a", "nodeids": ["test_a.py::test_2"]},
+                        {"rootdir": "pkg_b", "nodeids": ["test_b.py::test_3"]},
+                    ],
+                },
+            ],
+        }
+
+    def test_node_ids_of_groups(self):
+        split_plan = plan.make(
+            {".": ["test_a.py::test_1"], "pkg": ["test_b.py::test_2"]}, {}, 2
+        )
+
+        assert plan.get_nodeids(split_plan, [1, 2], "pkg") == ["test_b.py::test_2"]
+        assert plan.get_nodeids(split_plan, [1], "other") == []
+
+
+@pytest.mark.parametrize(
+    ("rootdir", "prefix"), [(".", ""), ("pkg", "pkg/"), ("a/b/", "a/b/")]
+)
+def test_get_prefix(rootdir, prefix):
+    assert plan.get_prefix(rootdir) == prefix
+
+
+def test_get_rootdir(tmpdir):
+    path = str(tmpdir.join("plan.json"))
+    split_plan = {"splits": 1, "rootdirs": [".", "packages/a"], "groups": []}
+
+    assert plan.get_rootdir(split_plan, path, tmpdir.join("packages", "a")) == (
+        "packages/a"
+    )
+    assert plan.get_rootdir(split_plan, path, tmpdir) == "."
+    assert plan.get_rootdir(split_plan, path, tmpdir.join("packages")) is None
+
+
+def test_collect(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.parametrize("value", [1, 2])
+        def test_a(value): pass
+
+        def test_b(): pass
+        """
+    )
+
+    assert plan.collect(str(testdir.tmpdir)) == [
+        "test_collect.py::test_a[1]",
+        "test_collect.py::test_a[2]",
+        "test_collect.py::test_b",
+    ]
+
+
+def test_collect_fails_on_collection_errors(testdir):
+    testdir.makepyfile("import missing_module")
+
+    with pytest.raises(RuntimeError, match="Collecting the tests of"):
+        plan.collect(str(testdir.tmpdir))
+
+
+def test_collect_rejects_directory_which_is_not_rootdir(testdir):
+    testdir.makeini("[pytest]\n")
+    sub = testdir.mkdir("sub")
+    sub.join("test_a.py").write("def test_a(): pass\n")
+
+    with pytest.raises(ValueError, match="is not the root directory of pytest"):
+        plan.collect(str(sub))
@@ -1,10 +1,12 @@
 import itertools
 import json
 import os
-from typing import ClassVar
+import sys
+from typing import Any, ClassVar
 
 import pytest
 from _pytest.main import ExitCode  # type: ignore[attr-defined]
+from pytest_split import calibration, fail_fast, precompile
 from pytest_split.algorithms import Algorithms
 
 pytest_plugins = ["pytester"]
@@ -95,6 +97,253 @@ class TestStoreDurations:
             assert item not in durations
         assert len(durations) == EXAMPLE_SUITE_TEST_COUNT
 
+    def test_it_prunes_durations_not_seen_in_given_runs(
+        self, example_suite, durations_path
+    ):
+        old_durations = {"test_old1": 1, "test_old2": 2}
+        with open(durations_path, "w") as f:
+            json.dump(old_durations, f)
+
+        args = ["--store-durations", "--durations-path", durations_path]
+        example_suite.runpytest(*args, "--prune-durations-after", "2")
+        # Recording a subset of the suite doesn't prune the tests which were not run
+        example_suite.runpytest(*args, "--prune-durations-after", "2", "-k", "test_1")
+        with open(durations_path) as f:
+            durations = json.load(f)
+        assert "test_old1" in durations
+        assert len(durations) == EXAMPLE_SUITE_TEST_COUNT + len(old_durations) + 1
+
+        result = example_suite.runpytest(*args, "--prune-durations-after", "2")
+        with open(durations_path) as f:
+            durations = json.load(f)
+        assert "test_old1" not in durations
+        assert "test_old2" not in durations
+        assert len(durations) == EXAMPLE_SUITE_TEST_COUNT + 1
+        assert durations["__pytest_split__"]["run"] == 3  # noqa: PLR2004
+        result.stdout.fnmatch_lines(
+            ["*Removed durations of 2 tests not collected in the last 2 runs*"]
+        )
+
+    def test_it_stores_file_costs(self, example_suite, durations_path):
+        example_suite.runpytest("--store-durations", "--durations-path", durations_path)
+        with open(durations_path) as f:
+            assert "__pytest_split__" not in json.load(f)
+
+        example_suite.runpytest(
+            "--store-durations",
+            "--durations-path",
+            durations_path,
+            "--split-file-costs",
+        )
+        with open(durations_path) as f:
+            file_costs = json.load(f)["__pytest_split__"]["file_costs"]
+
+        test_file = f"{example_suite.tmpdir.basename}/test_it_stores_file_costs.py"
+        assert list(file_costs) == [test_file]
+        assert file_costs[test_file] > 0
+
+    def test_it_stores_normalised_durations(self, testdir, durations_path, monkeypatch):
+        monkeypatch.setattr(calibration, "measure_speed", lambda: 10.0)
+        testdir.makepyfile("import time\ndef test_slow(): time.sleep(0.05)\n")
+
+        result = testdir.runpytest(
+            "--store-durations",
+            "--durations-path",
+            durations_path,
+            "--split-calibrate",
+        )
+
+        with open(durations_path) as f:
+            durations = json.load(f)
+        assert durations["__pytest_split__"] == {"speeds": [10.0]}
+        assert durations["test_it_stores_normalised_durations.py::test_slow"] >= 0.5  # noqa: PLR2004
+        result.stdout.fnmatch_lines(
+            ["*Durations normalised with the speed factor 10.00 of this machine*"]
+        )
+
+    def test_it_stores_duration_of_single_attempt_and_reruns(
+        self, testdir, durations_path
+    ):
+        # Reruns the call phase of test_flaky twice like pytest-rerunfailures
+        testdir.makeconftest(
+            """
+            from _pytest.runner import runtestprotocol
+
+            def pytest_runtest_protocol(item, nextitem):
+                item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+                for attempt in range(3):
+                    reports = runtestprotocol(item, nextitem=nextitem, log=False)
+                    rerun = item.name == "test_flaky" and attempt < 2
+                    for report in reports:
+                        if rerun and report.when == "call":
+                            report.outcome = "rerun"
+                        item.ihook.pytest_runtest_logreport(report=report)
+                    if not rerun:
+                        break
+                return True
+
+            def pytest_report_teststatus(report):
+                if report.outcome == "rerun":
+                    return "rerun", "R", "RERUN"
+            """
+        )
+        testdir.makepyfile(
+            "import time\n"
+            "def test_flaky(): time.sleep(0.1)\n"
+            "def test_fail(): assert False\n"
+        )
+
+        testdir.runpytest("--store-durations", "--durations-path", durations_path)
+
+        with open(durations_path) as f:
+            durations = json.load(f)
+        flaky = "test_it_stores_duration_of_single_attempt_and_reruns.py::test_flaky"
+        fail = "test_it_stores_duration_of_single_attempt_and_reruns.py::test_fail"
+        assert 0.1 <= durations[flaky] < 0.2  # noqa: PLR2004
+        assert durations["__pytest_split__"]["reruns"] == {
+            flaky: {"runs": 1, "reruns": 2, "failures": 0},
+            fail: {"runs": 1, "reruns": 0, "failures": 1},
+        }
+
+    def test_it_stores_variances_of_durations(self, testdir, durations_path):
+        testdir.makepyfile("def test_1(): pass\ndef test_2(): pass\n")
+        prefix = f"{testdir.tmpdir.basename}/test_it_stores_variances_of_durations.py"
+        test_1 = f"{prefix}::test_1"
+        test_2 = f"{prefix}::test_2"
+        with open(durations_path, "w") as f:
+            json.dump({test_1: 0.5}, f)
+
+        testdir.runpytest(
+            "--store-durations", "--durations-path", durations_path, "--split-variances"
+        )
+
+        with open(durations_path) as f:
+            variances = json.load(f)["__pytest_split__"]["variances"]
+        assert list(variances) == [test_1]
+        assert 0.1 < variances[test_1] <= 0.125  # noqa: PLR2004
+        assert test_2 not in variances
+
+    def test_it_stores_compact_durations(self, testdir, durations_path):
+        testdir.makepyfile(
+            """
+            import pytest
+
+            @pytest.mark.parametrize("value", range(6))
+            def test_a(value): pass
+
+            def test_b(): pass
+            """
+        )
+        prefix = "test_it_stores_compact_durations.py"
+
+        testdir.runpytest(
+            "--store-durations",
+            "--durations-path",
+            durations_path,
+            "--split-compact-durations",
+        )
+
+        with open(durations_path) as f:
+            stored = json.load(f)
+        assert sorted(stored) == ["__pytest_split__", f"{prefix}::test_b"]
+        family = stored["__pytest_split__"]["families"][f"{prefix}::test_a"]
+        assert family["params"] == [str(value) for value in range(6)]
+
+    def test_it_keeps_compact_layout_without_option(self, testdir, durations_path):
+        testdir.makepyfile(
+            """
+            import pytest
+
+            @pytest.mark.parametrize("value", range(6))
+            def test_a(value): pass
+            """
+        )
+        prefix = (
+            f"{testdir.tmpdir.basename}/test_it_keeps_compact_layout_without_option.py"
+        )
+        with open(durations_path, "w") as f:
+            json.dump({}, f)
+        testdir.runpytest(
+            "--store-durations",
+            "--durations-path",
+            durations_path,
+            "--split-compact-durations",
+        )
+
+        testdir.runpytest("--store-durations", "--durations-path", durations_path)
+
+        with open(durations_path) as f:
+            stored = json.load(f)
+        assert list(stored) == ["__pytest_split__"]
+        assert list(stored["__pytest_split__"]["families"]) == [f"{prefix}::test_a"]
+
+    def test_it_keeps_durations_of_skipped_and_errored_tests(
+        self, testdir, durations_path
+    ):
+        testdir.makepyfile(
+            """
+            import pytest
+
+            @pytest.fixture
+            def broken():
+                raise RuntimeError
+
+            def test_pass(): pass
+            def test_fail(): assert False
+            def test_skip(): pytest.skip()
+            def test_error(broken): pass
+            def test_new_skip(): pytest.skip()
+            """
+        )
+        prefix = f"{testdir.tmpdir.basename}/test_it_keeps_durations_of_skipped_and_errored_tests.py"
+        with open(durations_path, "w") as f:
+            json.dump(
+                {
+                    f"{prefix}::test_pass": 5.0,
+                    f"{prefix}::test_fail": 5.0,
+                    f"{prefix}::test_skip": 5.0,
+                    f"{prefix}::test_error": 5.0,
+                },
+                f,
+            )
+
+        result = testdir.runpytest(
+            "--store-durations", "--durations-path", durations_path
+        )
+
+        with open(durations_path) as f:
+            durations = json.load(f)
+        assert durations[f"{prefix}::test_pass"] < 1
+        assert 2.5 <= durations[f"{prefix}::test_fail"] < 3  # noqa: PLR2004
+        assert durations[f"{prefix}::test_skip"] == 5  # noqa: PLR2004
+        assert durations[f"{prefix}::test_error"] == 5  # noqa: PLR2004
+        assert f"{prefix}::test_new_skip" not in durations
+        result.stdout.re_match_lines(
+            [
+                r"\[pytest-split\] Updated 2 durations, kept 2 and ignored 1 of skipped or errored tests"
+            ]
+        )
+
+    def test_it_stores_under_durations_key(self, example_suite, durations_path):
+        with open(durations_path, "w") as f:
+            json.dump({"test_old1": 1}, f)
+
+        example_suite.runpytest(
+            "--store-durations",
+            "--durations-path",
+            durations_path,
+            "--durations-key",
+            "py312",
+        )
+
+        with open(durations_path) as f:
+            durations = json.load(f)
+
+        keyed = durations.pop("__pytest_split__")["keys"]["py312"]
+        assert len(keyed) == EXAMPLE_SUITE_TEST_COUNT
+        assert keyed.keys() < durations.keys()
+        assert "test_old1" in durations
+
     def test_it_does_not_store_without_flag(self, example_suite, durations_path):
         example_suite.runpytest("--durations-path", durations_path)
         assert not os.path.exists(durations_path)
@@ -254,6 +503,229 @@ class TestSplitToSuites:
         result.assertoutcome(passed=3)
         assert _passed_test_names(result) == ["test_8", "test_9", "test_10"]
 
+    def test_it_splits_with_durations_key(self, example_suite, durations_path):
+        test_path = "test_it_splits_with_durations_key0/test_it_splits_with_durations_key.py::{}"
+        durations = {test_path.format(f"test_{num}"): 1 for num in range(1, 11)}
+        # test_10 is much slower relative to test_1 under the key, the rest scales along
+        durations["__pytest_split__"] = {  # type: ignore[assignment]
+            "keys": {
+                "slow": {test_path.format("test_1"): 1, test_path.format("test_10"): 17}
+            }
+        }
+        with open(durations_path, "w") as f:
+            json.dump(durations, f)
+
+        result = example_suite.inline_run(
+            "--splits", "2", "--group", "1", "--durations-path", durations_path
+        )
+        assert _passed_test_names(result) == [f"test_{num}" for num in range(1, 6)]
+
+        result = example_suite.inline_run(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--durations-key",
+            "slow",
+        )
+        assert _passed_test_names(result) == [f"test_{num}" for num in range(1, 7)]
+
+    @pytest.mark.parametrize("algo", Algorithms.names())
+    def test_it_splits_with_file_costs(self, algo, testdir, durations_path):
+        testdir.makepyfile(
+            test_one="def test_a(): pass\ndef test_b(): pass\n",
+            test_two="def test_c(): pass\ndef test_d(): pass\n",
+        )
+        prefix = f"{testdir.tmpdir.basename}/"
+        with open(durations_path, "w") as f:
+            json.dump(
+                {
+                    **{f"{prefix}test_one.py::test_{x}": 1 for x in "ab"},
+                    **{f"{prefix}test_two.py::test_{x}": 1 for x in "cd"},
+                    "__pytest_split__": {
+                        "file_costs": {
+                            f"{prefix}test_one.py": 10,
+                            f"{prefix}test_two.py": 10,
+                        }
+                    },
+                },
+                f,
+            )
+
+        args = ["--splits", "2", "--group", "1", "--durations-path", durations_path]
+        args += ["--splitting-algorithm", algo]
+        result = testdir.inline_run(*args, "--split-file-costs")
+        assert _passed_test_names(result) == ["test_a", "test_b"]
+
+    def test_it_splits_with_expected_cost_of_reruns(
+        self, example_suite, durations_path
+    ):
+        prefix = f"{example_suite.tmpdir.basename}/test_it_splits_with_expected_cost_of_reruns.py"
+        stored: dict[str, Any] = {f"{prefix}::test_{num}": 1.0 for num in range(1, 11)}
+        stored["__pytest_split__"] = {
+            "reruns": {f"{prefix}::test_1": {"runs": 1, "reruns": 8, "failures": 0}}
+        }
+        with open(durations_path, "w") as f:
+            json.dump(stored, f)
+
+        result = example_suite.inline_run(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--splitting-algorithm",
+            "least_duration",
+        )
+        # test_1 is expected to take as long as the other tests together
+        assert _passed_test_names(result) == ["test_1"]
+
+    @pytest.mark.parametrize("algo", Algorithms.names())
+    def test_it_runs_several_groups(self, algo, example_suite, durations_path):
+        with open(durations_path, "w") as f:
+            json.dump({}, f)
+
+        def run(group):
+            result = example_suite.inline_run(
+                "--splits",
+                "4",
+                "--group",
+                group,
+                "--durations-path",
+                durations_path,
+                "--splitting-algorithm",
+                algo,
+            )
+            return _passed_test_names(result)
+
+        expected = set(run("1")) | set(run("3"))
+        names = run("3,1")
+        assert set(names) == expected
+        # Collection order is maintained
+        assert names == sorted(names, key=lambda name: int(name.split("_")[1]))
+
+    def test_it_splits_with_group_capabilities(self, testdir, durations_path):
+        testdir.makepyfile(
+            "import pytest\n"
+            "@pytest.mark.requires_capability('db')\ndef test_db_1(): pass\n"
+            "@pytest.mark.requires_capability('db')\ndef test_db_2(): pass\n"
+            "def test_a(): pass\ndef test_b(): pass\n"
+        )
+        with open(durations_path, "w") as f:
+            json.dump({}, f)
+
+        def run(group):
+            result = testdir.inline_run(
+                "--splits",
+                "3",
+                "--group",
+                group,
+                "--durations-path",
+                durations_path,
+                "--splitting-algorithm",
+                "least_duration",
+                "--group-capabilities",
+                "1=db",
+                "--group-capabilities",
+                "3=db,redis",
+            )
+            return _passed_test_names(result)
+
+        assert run("1") == ["test_db_1", "test_b"]
+        assert run("2") == ["test_a"]
+        assert run("3") == ["test_db_2"]
+
+    def test_it_splits_with_variances(self, testdir, durations_path):
+        testdir.makepyfile("".join(f"def test_{num}(): pass\n" for num in range(1, 5)))
+        prefix = f"{testdir.tmpdir.basename}/test_it_splits_with_variances.py"
+        with open(durations_path, "w") as f:
+            json.dump(
+                {
+                    f"{prefix}::test_1": 4.0,
+                    f"{prefix}::test_2": 1.0,
+                    f"{prefix}::test_3": 8.0,
+                    f"{prefix}::test_4": 2.0,
+                    "__pytest_split__": {
+                        "variances": {
+                            f"{prefix}::test_1": 36.0,
+                            f"{prefix}::test_4": 16.0,
+                        }
+                    },
+                },
+                f,
+            )
+
+        results = [
+            testdir.inline_run(
+                "--splits",
+                "2",
+                "--group",
+                str(group),
+                "--durations-path",
+                durations_path,
+                "--splitting-algorithm",
+                "least_tail_duration",
+            )
+            for group in (1, 2)
+        ]
+
+        assert _passed_test_names(results[0]) == ["test_1", "test_2"]
+        assert _passed_test_names(results[1]) == ["test_3", "test_4"]
+
+    def test_it_splits_with_compact_durations(self, testdir, durations_path):
+        testdir.makepyfile(
+            """
+            import pytest
+
+            @pytest.mark.parametrize("value", range(5))
+            def test_a(value): pass
+
+            def test_b(): pass
+            """
+        )
+        prefix = f"{testdir.tmpdir.basename}/test_it_splits_with_compact_durations.py"
+        with open(durations_path, "w") as f:
+            json.dump(
+                {
+                    f"{prefix}::test_b": 3.0,
+                    "__pytest_split__": {
+                        "families": {
+                            f"{prefix}::test_a": {
+                                "duration": 1.0,
+                                "params": {
+                                    "0": 0.0,
+                                    "1": 0.0,
+                                    "2": 0.0,
+                                    "3": 0.0,
+                                    "4": 2.0,
+                                },
+                            }
+                        }
+                    },
+                },
+                f,
+            )
+
+        results = [
+            testdir.inline_run(
+                "--splits",
+                "2",
+                "--group",
+                str(group),
+                "--durations-path",
+                durations_path,
+                "--splitting-algorithm",
+                "least_duration",
+            )
+            for group in (1, 2)
+        ]
+
+        assert _passed_test_names(results[0]) == ["test_a[0]", "test_a[2]", "test_a[4]"]
+        assert _passed_test_names(results[1]) == ["test_a[1]", "test_a[3]", "test_b"]
+
     def test_handles_case_of_no_durations_for_group(
         self, example_suite, durations_path
     ):
@@ -312,69 +784,996 @@ class TestSplitToSuites:
             result.assertoutcome(passed=len(expected_tests))
             assert _passed_test_names(result) == expected_tests
 
+    def test_it_orders_tests_by_fixtures(self, testdir, durations_path):
+        testdir.makeconftest(
+            """
+            import pytest
+            from _pytest import fixtures
 
-class TestRaisesUsageErrors:
-    def test_returns_nonzero_when_group_but_not_splits(self, example_suite, capsys):
-        result = example_suite.inline_run("--group", "1")
-        assert result.ret == ExitCode.USAGE_ERROR
+            SETUPS = []
 
-        outerr = capsys.readouterr()
-        assert "argument `--splits` is required" in outerr.err
+            @pytest.fixture(scope="session", params=["sqlite", "postgres"])
+            def database(request):
+                SETUPS.append(request.param)
+                return request.param
 
-    def test_returns_nonzero_when_splits_but_not_group(self, example_suite, capsys):
-        result = example_suite.inline_run("--splits", "1")
-        assert result.ret == ExitCode.USAGE_ERROR
+            # Interleave the parameters instead of grouping them, like a plugin shuffling the tests would
+            reorder_items = fixtures.reorder_items
+            fixtures.reorder_items = lambda items: sorted(
+                items, key=lambda item: item.name.split("[")[0]
+            )
 
-        outerr = capsys.readouterr()
-        assert "argument `--group` is required" in outerr.err
+            def pytest_sessionfinish():
+                print(f"database setups: {len(SETUPS)}")
 
-    def test_returns_nonzero_when_group_below_one(self, example_suite, capsys):
-        result = example_suite.inline_run("--splits", "3", "--group", "0")
-        assert result.ret == ExitCode.USAGE_ERROR
+            def pytest_unconfigure():
+                fixtures.reorder_items = reorder_items
+            """
+        )
+        testdir.makepyfile(
+            "".join(f"def test_{num}(database): pass\n" for num in range(1, 4))
+        )
+        with open(durations_path, "w") as f:
+            json.dump({}, f)
 
-        outerr = capsys.readouterr()
-        assert "argument `--group` must be >= 1 and <= 3" in outerr.err
+        result = testdir.runpytest(
+            "--splits",
+            "1",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-order-fixtures",
+            "-s",
+        )
 
-    def test_returns_nonzero_when_group_larger_than_splits(self, example_suite, capsys):
-        result = example_suite.inline_run("--splits", "3", "--group", "4")
-        assert result.ret == ExitCode.USAGE_ERROR
+        result.assert_outcomes(passed=6)
+        result.stdout.re_match_lines(
+            [
+                (
+                    r"\[pytest-split\] Reordered tests to share fixtures, "
+                    r"saving 4 of 6 setups of higher-scoped fixtures"
+                ),
+                r".*database setups: 2",
+            ]
+        )
 
-        outerr = capsys.readouterr()
-        assert "argument `--group` must be >= 1 and <= 3" in outerr.err
 
-    def test_returns_nonzero_when_splits_below_one(self, example_suite, capsys):
-        result = example_suite.inline_run("--splits", "0", "--group", "1")
-        assert result.ret == ExitCode.USAGE_ERROR
+class TestProgress:
+    def test_reports_remaining_time(self, example_suite, durations_path):
+        with open(durations_path, "w") as f:
+            json.dump({}, f)
 
-        outerr = capsys.readouterr()
-        assert "argument `--splits` must be >= 1" in outerr.err
+        result = example_suite.runpytest(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-progress",
+        )
 
-    def test_returns_nonzero_when_invalid_algorithm_name(self, example_suite, capsys):
-        result = example_suite.inline_run(
-            "--splits", "0", "--group", "1", "--splitting-algorithm", "NON_EXISTENT"
+        result.stdout.re_match_lines(
+            [
+                r"\[pytest-split\] 1/5 tests finished in .*s, estimated 4.00s remaining",
+                r"\[pytest-split\] 5/5 tests finished in .*s, estimated 0.00s remaining",
+            ]
         )
-        assert result.ret == ExitCode.USAGE_ERROR
 
-        outerr = capsys.readouterr()
-        for err_content in [
-            "argument --splitting-algorithm: invalid choice: 'NON_EXISTENT' ",
-            *Algorithms.names(),
-        ]:
-            assert err_content in outerr.err
+    def test_reports_and_writes_stragglers(self, testdir, durations_path, tmpdir):
+        testdir.makepyfile(
+            "import time\ndef test_slow(): time.sleep(0.2)\ndef test_fast(): pass\n"
+        )
+        test_path = (
+            f"{testdir.tmpdir.basename}/test_reports_and_writes_stragglers.py::{{}}"
+        )
+        with open(durations_path, "w") as f:
+            json.dump(
+                {test_path.format("test_slow"): 0.01, test_path.format("test_fast"): 1},
+                f,
+            )
+        overruns_path = str(tmpdir.join("overruns.json"))
 
+        result = testdir.runpytest(
+            "--splits",
+            "1",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-progress",
+            "--split-overruns-path",
+            overruns_path,
+        )
 
-class TestHasExpectedOutput:
-    def test_prints_splitting_summary_when_durations_present(
-        self, example_suite, capsys, durations_path
+        result.stdout.re_match_lines(
+            [
+                (
+                    r"\[pytest-split\] Straggler: .*::test_slow took .*s, "
+                    r".*x its estimated duration of 0.01s"
+                ),
+                r"\[pytest-split\] Wrote 1 stragglers to .*overruns.json",
+            ]
+        )
+        with open(overruns_path) as f:
+            overruns = json.load(f)
+        assert list(overruns) == [test_path.format("test_slow")]
+        assert overruns[test_path.format("test_slow")]["estimated"] == 0.01  # noqa: PLR2004
+        assert overruns[test_path.format("test_slow")]["actual"] >= 0.2  # noqa: PLR2004
+
+    def test_splits_with_durations_of_stragglers(
+        self, example_suite, durations_path, tmpdir
     ):
-        test_name = "test_prints_splitting_summary_when_durations_present"
-        with open(durations_path, "w") as f:
-            json.dump([[f"{test_name}0/{test_name}.py::test_1", 0.5]], f)
-        result = example_suite.inline_run(
-            "--splits", "1", "--group", "1", "--durations-path", durations_path
+        test_path = (
+            f"{example_suite.tmpdir.basename}/"
+            "test_splits_with_durations_of_stragglers.py::{}"
         )
-        assert result.ret == ExitCode.OK
-
+        with open(durations_path, "w") as f:
+            json.dump({test_path.format(f"test_{num}"): 1 for num in range(1, 11)}, f)
+        overruns_path = str(tmpdir.join("overruns.json"))
+        overruns = {
+            test_path.format("test_1"): {"estimated": 1, "actual": 100, "stored": 1}
+        }
+        with open(overruns_path, "w") as f:
+            json.dump(overruns, f)
+
+        for _ in range(2):
+            result = example_suite.inline_run(
+                "--splits",
+                "2",
+                "--group",
+                "1",
+                "--durations-path",
+                durations_path,
+                "--split-overruns-path",
+                overruns_path,
+            )
+
+            assert _passed_test_names(result) == ["test_1"]
+            # test_1 finished within the factor of its new estimate, but its stored duration is still the old one
+            with open(overruns_path) as f:
+                assert json.load(f) == overruns
+
+    def test_forgets_stragglers_once_their_durations_are_stored(
+        self, example_suite, durations_path, tmpdir
+    ):
+        test_path = (
+            f"{example_suite.tmpdir.basename}/"
+            "test_forgets_stragglers_once_their_durations_are_stored.py::{}"
+        )
+        with open(durations_path, "w") as f:
+            json.dump({test_path.format(f"test_{num}"): 1 for num in range(1, 11)}, f)
+        overruns_path = str(tmpdir.join("overruns.json"))
+        with open(overruns_path, "w") as f:
+            json.dump(
+                {
+                    test_path.format("test_1"): {
+                        "estimated": 0.5,
+                        "actual": 100,
+                        "stored": 0.5,
+                    }
+                },
+                f,
+            )
+
+        result = example_suite.inline_run(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-overruns-path",
+            overruns_path,
+        )
+
+        assert len(_passed_test_names(result)) == 5  # noqa: PLR2004
+        with open(overruns_path) as f:
+            assert json.load(f) == {}
+
+    def test_machine_speed_does_not_change_split(
+        self, example_suite, durations_path, tmpdir, monkeypatch
+    ):
+        test_path = (
+            f"{example_suite.tmpdir.basename}/"
+            "test_machine_speed_does_not_change_split.py::{}"
+        )
+        with open(durations_path, "w") as f:
+            json.dump({test_path.format(f"test_{num}"): 1 for num in range(1, 11)}, f)
+        overruns_path = str(tmpdir.join("overruns.json"))
+
+        selected = []
+        for speed in (1.0, 10.0):
+            monkeypatch.setattr(calibration, "measure_speed", lambda speed=speed: speed)
+            with open(overruns_path, "w") as f:
+                json.dump(
+                    {test_path.format("test_1"): {"estimated": 1, "actual": 5}}, f
+                )
+            result = example_suite.inline_run(
+                "--splits",
+                "2",
+                "--group",
+                "1",
+                "--durations-path",
+                durations_path,
+                "--split-overruns-path",
+                overruns_path,
+                "--split-calibrate",
+            )
+            selected.append(_passed_test_names(result))
+
+        assert selected[0] == selected[1]
+
+
+class TestRunnerHistory:
+    def test_records_runner(self, example_suite, durations_path, tmpdir, monkeypatch):
+        test_path = f"{example_suite.tmpdir.basename}/test_records_runner.py::{{}}"
+        with open(durations_path, "w") as f:
+            json.dump({test_path.format(f"test_{num}"): 1 for num in range(1, 11)}, f)
+        history_path = str(tmpdir.join("runners.json"))
+        history = {"runners": {"runner-2": [1.0]}, "groups": {"2/2": "runner-2"}}
+        with open(history_path, "w") as f:
+            json.dump(history, f)
+        record_path = str(tmpdir.join("record.json"))
+        monkeypatch.setenv("PYTEST_SPLIT_RUNNER", "runner-1")
+
+        result = example_suite.runpytest(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--splitting-algorithm",
+            "least_duration",
+            "--durations-path",
+            durations_path,
+            "--split-runner-history",
+            history_path,
+            "--split-runner-record",
+            record_path,
+        )
+
+        result.stdout.re_match_lines(
+            [
+                (
+                    r"\[pytest-split\] Recorded runner runner-1: the tests took .*s, "
+                    r".*x their estimated duration of 5.00s"
+                )
+            ]
+        )
+        # The history which the groups split with is left to 'pytest-split merge-runner-history'
+        with open(history_path) as f:
+            assert json.load(f) == history
+        with open(record_path) as f:
+            record = json.load(f)
+        assert record["groups"] == {"1/2": "runner-1"}
+        assert len(record["runners"]["runner-1"]) == 1
+
+    def test_gives_less_work_to_slower_runners(
+        self, example_suite, durations_path, tmpdir, monkeypatch
+    ):
+        test_path = (
+            f"{example_suite.tmpdir.basename}/"
+            "test_gives_less_work_to_slower_runners.py::{}"
+        )
+        with open(durations_path, "w") as f:
+            json.dump({test_path.format(f"test_{num}"): 1 for num in range(1, 11)}, f)
+        history_path = str(tmpdir.join("runners.json"))
+        with open(history_path, "w") as f:
+            json.dump(
+                {
+                    "runners": {"slow": [2.1, 1.9, 2.0], "fast": [1.0]},
+                    "groups": {"1/2": "slow", "2/2": "fast"},
+                },
+                f,
+            )
+        monkeypatch.delenv("PYTEST_SPLIT_RUNNER", raising=False)
+
+        result = example_suite.runpytest(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--splitting-algorithm",
+            "least_duration",
+            "--durations-path",
+            durations_path,
+            "--split-runner-history",
+            history_path,
+            "--split-runner-record",
+            str(tmpdir.join("record.json")),
+        )
+
+        result.assert_outcomes(passed=3)
+        result.stdout.re_match_lines(
+            [
+                r"\[pytest-split\] Weighting the groups by the slowness of their runners: 2.00, 1.00",
+                r"\[pytest-split\] Not recording the speed of the runner, \$PYTEST_SPLIT_RUNNER is not set",
+            ]
+        )
+
+
+class TestSplitFailed:
+    @pytest.mark.parametrize(
+        ("group", "expected_tests", "message"),
+        [
+            (1, ["test_2", "test_5"], r"\[pytest-split\] Running group 1/2 .*"),
+            (2, ["test_9"], r"\[pytest-split\] Running group 2/2 .*"),
+            (3, [], r"\[pytest-split\] No failed tests to rerun in group 3"),
+        ],
+    )
+    def test_reruns_failed_tests_of_all_groups_in_fewer_groups(  # noqa: PLR0913
+        self, example_suite, durations_path, tmpdir, group, expected_tests, message
+    ):
+        prefix = f"{example_suite.tmpdir.basename}/test_reruns_failed_tests_of_all_groups_in_fewer_groups.py"
+        with open(durations_path, "w") as f:
+            json.dump({f"{prefix}::test_{num}": 100.0 for num in range(1, 11)}, f)
+        # The lastfailed data of one group and a list of the failed tests of another one
+        lastfailed = tmpdir.join("lastfailed")
+        lastfailed.write(
+            json.dumps({f"{prefix}::test_2": True, f"{prefix}::test_9": True})
+        )
+        failed = tmpdir.join("failed.txt")
+        failed.write(f"{prefix}::test_5\n")
+
+        result = example_suite.runpytest(
+            "--splits",
+            "4",
+            "--group",
+            str(group),
+            "--durations-path",
+            durations_path,
+            "--split-failed",
+            "--split-failed-from",
+            str(lastfailed),
+            "--split-failed-from",
+            str(failed),
+            "--split-target-duration",
+            "200",
+            "-v",
+        )
+
+        result.assert_outcomes(passed=len(expected_tests))
+        result.stdout.re_match_lines(
+            [
+                r"\[pytest-split\] Rerunning 3 failed tests in 2 of 4 groups",
+                message,
+                *(f".*::{name} PASSED.*" for name in expected_tests),
+            ]
+        )
+
+    def test_reruns_tests_which_failed_in_last_run(
+        self, testdir, durations_path, monkeypatch
+    ):
+        testdir.makepyfile(
+            "import os\n"
+            "def test_1(): pass\n"
+            "def test_2(): assert not os.environ.get('FAIL')\n"
+            "def test_3(): pass\n"
+        )
+        monkeypatch.setenv("FAIL", "1")
+        testdir.inline_run()
+        monkeypatch.delenv("FAIL")
+
+        result = testdir.inline_run(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-failed",
+        )
+
+        result.assertoutcome(passed=1)
+        assert _passed_test_names(result) == ["test_2"]
+
+
+class TestSplitPlan:
+    @pytest.fixture()
+    def rootdirs(self, testdir):
+        for name in ("pkg_a", "pkg_b"):
+            root = testdir.mkdir(name)
+            root.join("pytest.ini").write("[pytest]\n")
+            root.join(f"test_{name}.py").write(
+                "def test_1(): pass\ndef test_2(): pass\n"
+            )
+        split_plan = {
+            "splits": 2,
+            "rootdirs": ["pkg_a", "pkg_b"],
+            "groups": [
+                {
+                    "duration": 2.0,
+                    "roots": [
+                        {"rootdir": "pkg_a", "nodeids": ["test_pkg_a.py::test_1"]},
+                        {"rootdir": "pkg_b", "nodeids": ["test_pkg_b.py::test_1"]},
+                    ],
+                },
+                {
+                    "duration": 2.0,
+                    "roots": [
+                        {
+                            "rootdir": "pkg_a",
+                            "nodeids": [
+                                "test_pkg_a.py::test_2",
+                                "test_pkg_a.py::test_3",
+                            ],
+                        }
+                    ],
+                },
+            ],
+        }
+        testdir.tmpdir.join("plan.json").write(json.dumps(split_plan))
+        return testdir.tmpdir
+
+    def test_runs_planned_tests_of_root_directory(self, testdir, rootdirs, monkeypatch):
+        monkeypatch.chdir(rootdirs.join("pkg_a"))
+        result = testdir.runpytest(
+            f"--split-plan={rootdirs.join('plan.json')}", "--group", "2"
+        )
+
+        result.assert_outcomes(passed=1)
+        result.stdout.re_match_lines(
+            [
+                (
+                    r"\[pytest-split\] Running 1 tests of pkg_a in group 2/2 of the plan "
+                    r"\(estimated duration: 1.00s\)"
+                ),
+                r"\[pytest-split\] 1 planned tests were not collected",
+            ]
+        )
+
+    def test_stores_durations_with_prefix_of_root_directory(
+        self, testdir, rootdirs, monkeypatch
+    ):
+        durations_path = str(rootdirs.join(".durations"))
+        with open(durations_path, "w") as f:
+            json.dump(
+                {
+                    "pkg_a/test_pkg_a.py::test_1": 5.0,
+                    "pkg_b/test_pkg_b.py::test_1": 5.0,
+                },
+                f,
+            )
+
+        monkeypatch.chdir(rootdirs.join("pkg_b"))
+        testdir.runpytest(
+            f"--split-plan={rootdirs.join('plan.json')}",
+            "--group",
+            "1",
+            "--store-durations",
+            f"--durations-path={durations_path}",
+            "--clean-durations",
+        )
+
+        with open(durations_path) as f:
+            stored = json.load(f)
+        assert sorted(stored) == [
+            "pkg_a/test_pkg_a.py::test_1",
+            "pkg_b/test_pkg_b.py::test_1",
+        ]
+        assert stored["pkg_a/test_pkg_a.py::test_1"] == 5.0  # noqa: PLR2004
+        assert stored["pkg_b/test_pkg_b.py::test_1"] < 5.0  # noqa: PLR2004
+
+
+class TestPrecompile:
+    def test_precompiles_files_of_group(
+        self, example_suite, durations_path, monkeypatch
+    ):
+        monkeypatch.setattr(sys, "dont_write_bytecode", False)
+        prefix = f"{example_suite.tmpdir.basename}/test_precompiles_files_of_group.py"
+        with open(durations_path, "w") as f:
+            json.dump({f"{prefix}::test_{num}": 1.0 for num in range(1, 11)}, f)
+
+        result = example_suite.runpytest(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-precompile",
+        )
+
+        result.stdout.re_match_lines(
+            [
+                (
+                    r"\[pytest-split\] Precompiled 1 of 1 test files and conftests in \d+\.\d\ds, "
+                    r"saving about \d+\.\d\ds of compiling during collection"
+                )
+            ]
+        )
+
+    def test_does_not_precompile_without_bytecode(
+        self, example_suite, durations_path, monkeypatch
+    ):
+        monkeypatch.setattr(sys, "dont_write_bytecode", True)
+        result = example_suite.runpytest(
+            "--splits", "2", "--group", "1", "--split-precompile"
+        )
+
+        result.stdout.fnmatch_lines(
+            ["[[]pytest-split] Not precompiling, writing bytecode is turned off"]
+        )
+
+    def test_skipped_with_old_pytest(self, example_suite, monkeypatch):
+        monkeypatch.setattr(precompile, "SUPPORTED", False)
+        result = example_suite.runpytest(
+            "--splits", "2", "--group", "1", "--split-precompile"
+        )
+
+        result.assert_outcomes(passed=5)
+        result.stdout.fnmatch_lines(
+            ["[[]pytest-split] Not precompiling, pytest * is too old, *"]
+        )
+
+
+class TestFailFast:
+    def test_publishes_first_failure_and_stops(self, testdir, durations_path, tmpdir):
+        testdir.makepyfile(
+            "def test_1(): assert False\n"
+            "def test_2(): assert False\n"
+            "def test_3(): pass\n"
+        )
+        marker_path = str(tmpdir.join("failed.json"))
+
+        result = testdir.runpytest(
+            "--splits",
+            "1",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-fail-fast",
+            marker_path,
+        )
+
+        result.assert_outcomes(failed=1)
+        result.stdout.re_match_lines(
+            [r".*Interrupted: pytest-split: .*test_1 failed in group 1/1"]
+        )
+        with open(marker_path) as f:
+            failure = json.load(f)
+        assert failure["nodeid"].endswith(
+            "test_publishes_first_failure_and_stops.py::test_1"
+        )
+        assert failure["group"] == "group 1/1"
+
+    def test_stops_on_failure_in_other_group(
+        self, example_suite, durations_path, server
+    ):
+        server.documents["/failed"] = {
+            "nodeid": "test_x.py::test_x",
+            "group": "group 2/2",
+        }
+
+        result = example_suite.runpytest(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-fail-fast",
+            f"{server.url}/failed",
+        )
+
+        result.assert_outcomes(passed=1)
+        result.stdout.re_match_lines(
+            [r".*Interrupted: pytest-split: test_x.py::test_x failed in group 2/2"]
+        )
+        assert ("PUT", "/failed") not in server.requests
+
+    def test_runs_all_tests_when_failure_cannot_be_published(
+        self, testdir, durations_path, tmpdir
+    ):
+        testdir.makepyfile("def test_1(): assert False\ndef test_2(): pass\n")
+
+        result = testdir.runpytest(
+            "--splits",
+            "1",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-fail-fast",
+            str(tmpdir.join("missing", "failed.json")),
+        )
+
+        result.assert_outcomes(passed=1, failed=1)
+        result.stdout.re_match_lines(
+            [r"\[pytest-split\] Could not publish the failure: .*"]
+        )
+
+    def test_reports_unreadable_marker_once(
+        self, example_suite, durations_path, tmpdir, monkeypatch
+    ):
+        monkeypatch.setattr(fail_fast, "CHECK_INTERVAL", 0)
+        marker_path = tmpdir.join("failed.json")
+        marker_path.write("not json")
+
+        result = example_suite.runpytest(
+            "--splits",
+            "1",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-fail-fast",
+            str(marker_path),
+        )
+
+        result.assert_outcomes(passed=EXAMPLE_SUITE_TEST_COUNT)
+        assert result.stdout.str().count("Could not check for failures") == 1
+
+
+class TestTrace:
+    def test_writes_trace_of_group(self, example_suite, durations_path, tmpdir):
+        trace_path = str(tmpdir.join("trace.json"))
+
+        result = example_suite.runpytest(
+            "--splits",
+            "2",
+            "--group",
+            "2",
+            "--durations-path",
+            durations_path,
+            "--split-trace",
+            trace_path,
+        )
+
+        result.assert_outcomes(passed=5)
+        result.stdout.re_match_lines([rf"\[pytest-split\] Wrote trace to {trace_path}"])
+        with open(trace_path) as f:
+            events = json.load(f)["traceEvents"]
+        assert {
+            "name": "process_name",
+            "ph": "M",
+            "pid": 2,
+            "tid": 0,
+            "args": {"name": "group 2/2"},
+        } in events
+        spans = [event for event in events if event["ph"] == "X"]
+        assert [span["name"] for span in spans if span["cat"] == "pytest-split"] == [
+            "load durations",
+            "split",
+        ]
+        tests = [span for span in spans if span["cat"] in ("setup", "call", "teardown")]
+        assert len(tests) == 5 * 3
+        assert [span["cat"] for span in tests[:3]] == ["setup", "call", "teardown"]
+        assert tests[0]["name"].endswith("::test_6")
+        assert tests[0]["args"] == {"phase": "setup", "outcome": "passed"}
+        assert all(span["pid"] == 2 and span["tid"] == 0 for span in spans)  # noqa: PLR2004
+        assert spans[-1]["name"] == "session"
+
+
+class TestTimeBudget:
+    def test_runs_failed_and_changed_tests_within_budget(
+        self, testdir, tmpdir, monkeypatch
+    ):
+        testdir.makepyfile(
+            test_foo="def test_foo(): pass\n",
+            test_bar="import os\ndef test_bar(): assert not os.environ.get('FAIL')\n",
+            test_baz="def test_baz(): pass\n",
+        )
+        durations_path = str(tmpdir.join(".durations"))
+        with open(durations_path, "w") as f:
+            json.dump(
+                {
+                    f"{testdir.tmpdir.basename}/test_foo.py::test_foo": 1.0,
+                    f"{testdir.tmpdir.basename}/test_bar.py::test_bar": 1.0,
+                    f"{testdir.tmpdir.basename}/test_baz.py::test_baz": 1.0,
+                },
+                f,
+            )
+        changed_path = str(tmpdir.join("changed.txt"))
+        with open(changed_path, "w") as f:
+            f.write("src/foo.py\n")
+
+        monkeypatch.setenv("FAIL", "1")
+        testdir.inline_run()
+        monkeypatch.delenv("FAIL")
+
+        result = testdir.runpytest(
+            "--split-time-budget",
+            "2",
+            "--durations-path",
+            durations_path,
+            "--split-changed-files",
+            changed_path,
+        )
+
+        result.assert_outcomes(passed=2)
+        result.stdout.re_match_lines(
+            [
+                (
+                    r"\[pytest-split\] Running 2 of 3 tests within the time budget of 2.00s "
+                    r"\(estimated duration: 2.00s\)"
+                ),
+                r"\[pytest-split\] Deselected 1 tests \(estimated duration: 1.00s\):",
+                r"\[pytest-split\]   .*/test_baz.py: 1 tests \(1.00s\)",
+            ]
+        )
+        assert "test_baz.py::test_baz PASSED" not in result.stdout.str()
+
+
+class TestRaisesUsageErrors:
+    def test_returns_nonzero_when_group_but_not_splits(self, example_suite, capsys):
+        result = example_suite.inline_run("--group", "1")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--splits` is required" in outerr.err
+
+    def test_returns_nonzero_when_splits_but_not_group(self, example_suite, capsys):
+        result = example_suite.inline_run("--splits", "1")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--group` is required" in outerr.err
+
+    def test_returns_nonzero_when_group_below_one(self, example_suite, capsys):
+        result = example_suite.inline_run("--splits", "3", "--group", "0")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--group` must be >= 1 and <= 3" in outerr.err
+
+    def test_returns_nonzero_when_group_larger_than_splits(self, example_suite, capsys):
+        result = example_suite.inline_run("--splits", "3", "--group", "4")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--group` must be >= 1 and <= 3" in outerr.err
+
+    def test_returns_nonzero_when_one_of_groups_larger_than_splits(
+        self, example_suite, capsys
+    ):
+        result = example_suite.inline_run("--splits", "3", "--group", "1,4")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--group` must be >= 1 and <= 3" in outerr.err
+
+    def test_returns_nonzero_when_group_not_an_integer(self, example_suite, capsys):
+        result = example_suite.inline_run("--splits", "3", "--group", "1,a")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "invalid group: 'a'" in outerr.err
+
+    def test_returns_nonzero_when_splits_below_one(self, example_suite, capsys):
+        result = example_suite.inline_run("--splits", "0", "--group", "1")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--splits` must be >= 1" in outerr.err
+
+    def test_returns_nonzero_when_prune_durations_after_below_one(
+        self, example_suite, capsys
+    ):
+        result = example_suite.inline_run(
+            "--store-durations", "--prune-durations-after", "0"
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--prune-durations-after` must be >= 1" in outerr.err
+
+    def test_returns_nonzero_when_overrun_factor_below_one(self, example_suite, capsys):
+        result = example_suite.inline_run("--split-overrun-factor", "0.5")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--split-overrun-factor` must be >= 1" in outerr.err
+
+    def test_returns_nonzero_when_runner_history_with_chunks(
+        self, example_suite, capsys
+    ):
+        result = example_suite.inline_run(
+            "--splits", "3", "--group", "1", "--split-runner-history", "runners.json"
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert (
+            "argument `--split-runner-history` requires `--splitting-algorithm least_duration`"
+            in outerr.err
+        )
+
+    def test_returns_nonzero_when_group_capabilities_with_chunks(
+        self, example_suite, capsys
+    ):
+        result = example_suite.inline_run(
+            "--splits", "3", "--group", "1", "--group-capabilities", "1=db"
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert (
+            "argument `--group-capabilities` requires `--splitting-algorithm least_duration`"
+            in outerr.err
+        )
+
+    @pytest.mark.parametrize(
+        ("value", "error"),
+        [
+            ("4=db", "argument `--group-capabilities` groups must be >= 1 and <= 3"),
+            ("db", "invalid group capabilities: 'db'"),
+            ("a=db", "invalid group capabilities: 'a=db'"),
+        ],
+    )
+    def test_returns_nonzero_when_invalid_group_capabilities(
+        self, example_suite, capsys, value, error
+    ):
+        result = example_suite.inline_run(
+            "--splits",
+            "3",
+            "--group",
+            "1",
+            "--splitting-algorithm",
+            "least_duration",
+            "--group-capabilities",
+            value,
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert error in outerr.err
+
+    def test_returns_nonzero_when_no_group_has_required_capabilities(
+        self, testdir, capsys
+    ):
+        testdir.makepyfile(
+            "import pytest\n"
+            "@pytest.mark.requires_capability('db', 'gpu')\ndef test_db(): pass\n"
+        )
+        result = testdir.inline_run(
+            "--splits",
+            "2",
+            "--group",
+            "1",
+            "--splitting-algorithm",
+            "least_duration",
+            "--group-capabilities",
+            "1=db",
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "No group has the capabilities db, gpu required by" in outerr.err
+
+    def test_returns_nonzero_when_time_budget_not_positive(self, example_suite, capsys):
+        result = example_suite.inline_run("--split-time-budget", "0")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--split-time-budget` must be > 0" in outerr.err
+
+    def test_returns_nonzero_when_time_budget_with_splits(self, example_suite, capsys):
+        result = example_suite.inline_run(
+            "--split-time-budget", "10", "--splits", "2", "--group", "1"
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert (
+            "argument `--split-time-budget` can't be combined with `--splits` and `--group`"
+            in outerr.err
+        )
+
+    def test_returns_nonzero_when_split_failed_without_splits(
+        self, example_suite, capsys
+    ):
+        result = example_suite.inline_run("--split-failed")
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert (
+            "argument `--split-failed` requires `--splits` and `--group`" in outerr.err
+        )
+
+    def test_returns_nonzero_when_target_duration_not_positive(
+        self, example_suite, capsys
+    ):
+        result = example_suite.inline_run(
+            "--splits", "2", "--group", "1", "--split-target-duration", "0"
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--split-target-duration` must be > 0" in outerr.err
+
+    def test_returns_nonzero_when_split_plan_with_splits(
+        self, example_suite, capsys, tmpdir
+    ):
+        plan_path = tmpdir.join("plan.json")
+        plan_path.write(json.dumps({"splits": 2, "rootdirs": ["."], "groups": []}))
+        result = example_suite.inline_run(
+            "--split-plan", str(plan_path), "--splits", "2", "--group", "1"
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "argument `--split-plan` can't be combined with `--splits`" in outerr.err
+
+    @pytest.mark.parametrize(
+        "option",
+        [
+            ["--split-fail-fast", "failed.json"],
+            ["--split-progress"],
+            ["--split-order-fixtures"],
+        ],
+    )
+    def test_returns_nonzero_when_split_only_option_without_splits(
+        self, example_suite, capsys, option
+    ):
+        result = example_suite.inline_run(*option)
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert f"argument `{option[0]}` requires `--splits` and `--group`" in outerr.err
+
+    def test_returns_nonzero_when_split_plan_with_group_capabilities(
+        self, example_suite, capsys, tmpdir
+    ):
+        plan_path = tmpdir.join("plan.json")
+        plan_path.write(json.dumps({"splits": 2, "rootdirs": ["."], "groups": []}))
+        result = example_suite.inline_run(
+            "--split-plan",
+            str(plan_path),
+            "--group",
+            "1",
+            "--group-capabilities",
+            "1=db",
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert (
+            "argument `--split-plan` can't be combined with `--group-capabilities`"
+            in outerr.err
+        )
+
+    def test_returns_nonzero_when_root_directory_not_in_plan(
+        self, example_suite, capsys, tmpdir
+    ):
+        plan_path = tmpdir.join("plan.json")
+        plan_path.write(json.dumps({"splits": 2, "rootdirs": ["pkg"], "groups": []}))
+        result = example_suite.inline_run(
+            "--split-plan", str(plan_path), "--group", "1"
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        assert "is not part of the plan" in outerr.err
+
+    def test_returns_nonzero_when_invalid_algorithm_name(self, example_suite, capsys):
+        result = example_suite.inline_run(
+            "--splits", "0", "--group", "1", "--splitting-algorithm", "NON_EXISTENT"
+        )
+        assert result.ret == ExitCode.USAGE_ERROR
+
+        outerr = capsys.readouterr()
+        for err_content in [
+            "argument --splitting-algorithm: invalid choice: 'NON_EXISTENT' ",
+            *Algorithms.names(),
+        ]:
+            assert err_content in outerr.err
+
+
+class TestHasExpectedOutput:
+    def test_prints_splitting_summary_when_durations_present(
+        self, example_suite, capsys, durations_path
+    ):
+        test_name = "test_prints_splitting_summary_when_durations_present"
+        with open(durations_path, "w") as f:
+            json.dump([[f"{test_name}0/{test_name}.py::test_1", 0.5]], f)
+        result = example_suite.inline_run(
+            "--splits", "1", "--group", "1", "--durations-path", durations_path
+        )
+        assert result.ret == ExitCode.OK
+
         outerr = capsys.readouterr()
         assert "[pytest-split] Running group 1/1" in outerr.out
 
@@ -415,6 +1814,53 @@ class TestHasExpectedOutput:
             "[pytest-split] Running group 1/5 (estimated duration: 1.00s)" in outerr.out
         )
 
+    def test_prints_estimated_duration_for_speed_of_machine(
+        self, example_suite, capsys, durations_path, monkeypatch
+    ):
+        monkeypatch.setattr(calibration, "measure_speed", lambda: 2.0)
+        with open(durations_path, "w") as f:
+            json.dump(
+                {
+                    f"{example_suite.tmpdir.basename}/test_prints_estimated_duration_for_speed_of_machine.py::test_{num}": 4.0
+                    for num in range(1, EXAMPLE_SUITE_TEST_COUNT + 1)
+                },
+                f,
+            )
+        result = example_suite.inline_run(
+            "--splits",
+            "5",
+            "--group",
+            "1",
+            "--durations-path",
+            durations_path,
+            "--split-calibrate",
+        )
+        assert result.ret == ExitCode.OK
+
+        outerr = capsys.readouterr()
+        assert (
+            "[pytest-split] Running group 1/5 (estimated duration: 4.00s)" in outerr.out
+        )
+
+    def test_prints_estimated_duration_of_each_group(
+        self, example_suite, capsys, durations_path
+    ):
+        with open(durations_path, "w") as f:
+            json.dump({}, f)
+        result = example_suite.inline_run(
+            "--splits", "5", "--group", "1,3", "--durations-path", durations_path
+        )
+        assert result.ret == ExitCode.OK
+
+        outerr = capsys.readouterr()
+        assert (
+            "[pytest-split] Running groups 1,3/5 (estimated duration: 4.00s)"
+            in outerr.out
+        )
+        assert "[pytest-split]   group 1: estimated duration 2.00s" in outerr.out
+        assert "[pytest-split]   group 3: estimated duration 2.00s" in outerr.out
+        assert "collected 10 items / 6 deselected / 4 selected" in outerr.out
+
     def test_prints_used_algorithm(self, example_suite, capsys, durations_path):
         test_name = "test_prints_used_algorithm"
         with open(durations_path, "w") as f:
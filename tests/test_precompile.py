@@ -0,0 +1,57 @@
+import importlib.util
+from pathlib import Path
+
+from _pytest.assertion import rewrite
+from pytest_split import precompile
+
+
+def test_get_files_of_tests_and_conftests(tmpdir):
+    for fpath in (
+        "conftest.py",
+        "tests/conftest.py",
+        "tests/sub/test_a.py",
+        "tests/sub/test_b.ipynb",
+        "other/conftest.py",
+    ):
+        tmpdir.join(fpath).write("", ensure=True)
+
+    files = precompile.get_files(
+        [
+            "tests/sub/test_a.py::test_1",
+            "tests/sub/test_a.py::test_2",
+            "tests/sub/test_b.ipynb::Cell 0",
+        ],
+        str(tmpdir),
+    )
+
+    assert files == [
+        str(tmpdir.join("conftest.py")),
+        str(tmpdir.join("tests", "conftest.py")),
+        str(tmpdir.join("tests", "sub", "test_a.py")),
+    ]
+
+
+def test_writes_pyc_which_pytest_reads(tmpdir):
+    path = tmpdir.join("test_a.py")
+    path.write("def test_a():\n    assert 1 + 1 == 2\n")
+
+    result = precompile.precompile([str(path)], workers=1)
+
+    assert result[:3] == (1, 0, 0)
+    pyc = rewrite.get_cache_dir(Path(path)) / f"test_a{rewrite.PYC_TAIL}"
+    assert rewrite._read_pyc(Path(path), pyc) is not None  # noqa: SLF001
+    assert precompile.precompile([str(path)], workers=1)[:3] == (0, 1, 0)
+
+
+def test_writes_plain_pyc_and_counts_failures(tmpdir):
+    path = tmpdir.join("test_a.py")
+    path.write("def test_a(): pass\n")
+    broken = tmpdir.join("test_b.py")
+    broken.write("def test_b(:\n")
+
+    result = precompile.precompile(
+        [str(path), str(broken)], rewrite_asserts=False, workers=2
+    )
+
+    assert result[:3] == (1, 0, 1)
+    assert Path(importlib.util.cache_from_source(str(path))).exists()
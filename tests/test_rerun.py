@@ -0,0 +1,37 @@
+import json
+
+from pytest_split.rerun import count_groups, load_failed
+
+
+class TestLoadFailed:
+    def test_reads_lastfailed_and_text_files(self, tmpdir):
+        lastfailed = tmpdir.join("lastfailed")
+        lastfailed.write(json.dumps({"test_a.py::test_1": True, "test_b.py": False}))
+        text = tmpdir.join("failed.txt")
+        text.write("test_c.py::test_2\n\n  test_a.py::test_1\n")
+
+        assert load_failed([str(lastfailed), str(text)]) == [
+            "test_a.py::test_1",
+            "test_c.py::test_2",
+        ]
+
+
+class TestCountGroups:
+    def test_fills_groups_up_to_target_duration(self):
+        durations = {"a": 100.0, "b": 250.0, "c": 300.0}
+
+        assert count_groups(["a", "b", "c"], durations, 300) == 3  # noqa: PLR2004
+        assert count_groups(["a", "b"], durations, 300) == 2  # noqa: PLR2004
+        assert count_groups(["a"], durations, 300) == 1
+
+    def test_unknown_tests_take_average_duration(self):
+        assert count_groups(["a", "b", "c"], {"a": 200.0}, 300) == 2  # noqa: PLR2004
+
+    def test_limits_groups(self):
+        durations = {"a": 1000.0, "b": 1000.0}
+
+        assert count_groups(["a", "b"], durations, 1) == 2  # noqa: PLR2004
+        assert count_groups(["a", "b"], durations, 1, max_groups=1) == 1
+
+    def test_no_failed_tests(self):
+        assert count_groups([], {"a": 1.0}, 300) == 0
@@ -0,0 +1,72 @@
+import pytest
+from pytest_split import runners
+
+
+class TestRecord:
+    def test_keeps_latest_ratios_and_groups_of_runner(self):
+        history = runners.load("missing.json")
+
+        for _ in range(runners.MAX_RUNS):
+            runners.record(history, "runner-1", 3, [1], estimated=10.0, actual=10.0)
+        runners.record(history, "runner-1", 3, [1, 3], estimated=10.0, actual=15.0)
+
+        assert history["runners"]["runner-1"] == [1.0] * (runners.MAX_RUNS - 1) + [1.5]
+        assert history["groups"] == {"1/3": "runner-1", "3/3": "runner-1"}
+
+
+def test_merge():
+    history = {
+        "runners": {"runner-1": [1.0] * runners.MAX_RUNS, "runner-2": [0.9]},
+        "groups": {"1/2": "runner-2", "2/2": "runner-1"},
+    }
+    records = [
+        {"runners": {"runner-1": [1.5]}, "groups": {"1/2": "runner-1"}},
+        {"runners": {"runner-3": [1.2]}, "groups": {"2/2": "runner-3"}},
+    ]
+
+    runners.merge(history, records)
+
+    assert history == {
+        "runners": {
+            "runner-1": [1.0] * (runners.MAX_RUNS - 1) + [1.5],
+            "runner-2": [0.9],
+            "runner-3": [1.2],
+        },
+        "groups": {"1/2": "runner-1", "2/2": "runner-3"},
+    }
+
+
+@pytest.mark.parametrize(
+    ("ratios", "slowness"),
+    [([1.2, 5.0, 1.1], 1.2), ([10.0], runners.MAX_SLOWNESS), ([0.1], 0.5)],
+)
+def test_get_slowness(ratios, slowness):
+    assert runners.get_slowness({"runners": {"runner-1": ratios}}, "runner-1") == (
+        slowness
+    )
+
+
+def test_get_slowness_of_unknown_runner():
+    assert runners.get_slowness({"runners": {}}, "runner-1") is None
+
+
+def test_get_group_weights():
+    history = {
+        "runners": {"slow": [1.5], "fast": [0.9]},
+        "groups": {"1/3": "slow", "2/3": "fast", "1/2": "fast"},
+    }
+
+    # the third group hasn't run yet, it gets the mean slowness of the others
+    assert runners.get_group_weights(history, 3) == [1.5, 0.9, 1.2]
+    assert runners.get_group_weights(history, 2) == [0.9, 0.9]
+    assert runners.get_group_weights(history, 4) == [1.0] * 4
+
+
+def test_dump_and_load(tmpdir):
+    path = str(tmpdir.join("runners.json"))
+    history = {"runners": {"runner-1": [1.1]}, "groups": {"1/2": "runner-1"}}
+
+    runners.dump(path, history)
+
+    assert runners.load(path) == history
+    assert tmpdir.listdir() == [tmpdir.join("runners.json")]
@@ -0,0 +1,93 @@
+from pytest_split import trace
+
+
+class TestTracer:
+    def test_spans_and_metadata(self):
+        tracer = trace.Tracer(2, "group 2/4")
+        tracer.span("split", "pytest-split", 10.0, 10.5)
+        tracer.span("test_a.py::test_1", "call", 11.0, 11.25, thread="gw1")
+
+        assert tracer.to_json() == {
+            "traceEvents": [
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": 2,
+                    "tid": 0,
+                    "args": {"name": "group 2/4"},
+                },
+                {
+                    "name": "process_sort_index",
+                    "ph": "M",
+                    "pid": 2,
+                    "tid": 0,
+                    "args": {"sort_index": 2},
+                },
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 2,
+                    "tid": 0,
+                    "args": {"name": "main"},
+                },
+                {
+                    "name": "thread_sort_index",
+                    "ph": "M",
+                    "pid": 2,
+                    "tid": 0,
+                    "args": {"sort_index": 0},
+                },
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 2,
+                    "tid": 1,
+                    "args": {"name": "gw1"},
+                },
+                {
+                    "name": "thread_sort_index",
+                    "ph": "M",
+                    "pid": 2,
+                    "tid": 1,
+                    "args": {"sort_index": 1},
+                },
+                {
+                    "name": "split",
+                    "cat": "pytest-split",
+                    "ph": "X",
+                    "ts": 10_000_000,
+                    "dur": 500_000,
+                    "pid": 2,
+                    "tid": 0,
+                },
+                {
+                    "name": "test_a.py::test_1",
+                    "cat": "call",
+                    "ph": "X",
+                    "ts": 11_000_000,
+                    "dur": 250_000,
+                    "pid": 2,
+                    "tid": 1,
+                },
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+
+class TestMerge:
+    def test_gives_every_process_its_own_id(self):
+        first = trace.Tracer(1, "group 1/2")
+        first.span("a", "call", 1.0, 2.0)
+        second = trace.Tracer(1, "group 1/2 of another run")
+        second.span("b", "call", 1.0, 2.0)
+
+        merged = trace.merge([first.to_json(), second.to_json()])
+
+        spans = [event for event in merged["traceEvents"] if event["ph"] == "X"]
+        assert [(span["name"], span["pid"]) for span in spans] == [("a", 1), ("b", 2)]
+        names = {
+            event["pid"]: event["args"]["name"]
+            for event in merged["traceEvents"]
+            if event["name"] == "process_name"
+        }
+        assert names == {1: "group 1/2", 2: "group 1/2 of another run"}
@@ -0,0 +1,68 @@
+import random
+from collections import namedtuple
+
+import pytest
+from pytest_split import algorithms, vectorized
+from pytest_split.algorithms import Algorithms
+
+item = namedtuple("item", "nodeid")  # noqa: PYI024
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(vectorized, "HAS_NUMPY", False)
+    return request.param
+
+
+@pytest.fixture()
+def split(monkeypatch):
+    def _split(algo_name, splits, items, durations, *, vectorize):
+        monkeypatch.setattr(
+            algorithms, "VECTORIZED_MIN_ITEMS", 0 if vectorize else len(items) + 1
+        )
+        return Algorithms[algo_name].value(splits, items, durations)
+
+    return _split
+
+
+class TestVectorized:
+    @pytest.mark.parametrize("algo_name", Algorithms.names())
+    @pytest.mark.parametrize("splits", [1, 2, 3, 7, 16])
+    def test_identical_to_item_by_item_implementation(
+        self, algo_name, splits, backend, split
+    ):
+        rng = random.Random(splits)  # noqa: S311
+        items = [item(f"test_{i}") for i in range(500)]
+        rng.shuffle(items)
+        # A mix of unique, repeated and missing durations to exercise the tie breaking
+        durations = {
+            f"test_{i}": rng.choice([0.5, 1.0, 2.0, round(rng.random() * 10, 3)])
+            for i in range(500)
+            if i % 7
+        }
+
+        expected = split(algo_name, splits, items, durations, vectorize=False)
+        result = split(algo_name, splits, items, durations, vectorize=True)
+
+        assert result == expected
+
+    @pytest.mark.parametrize("algo_name", Algorithms.names())
+    def test_more_splits_than_items(self, algo_name, backend, split):
+        items = [item(x) for x in ["a", "b"]]
+        durations = {"a": 1, "b": 2}
+
+        expected = split(algo_name, 4, items, durations, vectorize=False)
+        result = split(algo_name, 4, items, durations, vectorize=True)
+
+        assert result == expected
+
+    def test_chunk_boundaries(self, backend):
+        boundaries, durations = vectorized.duration_based_chunks_boundaries(
+            3, [1, 1, 1, 1, 1, 1, 3], 3
+        )
+
+        assert boundaries == [0, 3, 6, 7]
+        assert durations == [3, 3, 3]